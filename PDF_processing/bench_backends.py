@@ -0,0 +1,147 @@
+"""
+Equivalence and speed of the text-layer backends (pdf_backends.py).
+
+Every backend is compared with pdfplumber, the reference, on each PDF:
+  words:     per page, the words text_page_words returns and the scanned-page
+             decision. A word matches when its text and font name are the
+             same (without the "ABCDEF+" subset tag, which PDFium doesn't
+             report) and its box and size are within --tolerance pt.
+  sections:  the sections pdf_summariser_ocr.py extracts with PDF_BACKEND set
+             (a subprocess per backend, sections cache off). OCR'd pages go
+             through Tesseract whatever the backend.
+and timed: the text-layer pass per page (best of --repeat) and the whole
+extraction run.
+
+Exits non-zero when a backend's sections differ from the reference.
+
+Usage:
+    python bench_backends.py <pdf> [pdf ...] [--backends pdfium] [--repeat 3] [--tolerance 0.1]
+
+Fixtures: node bench/fixtures.js /tmp/fixtures --pages 80 --scanned-pages 10
+"""
+import argparse
+import difflib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from pdf_backends import BACKENDS, open_pdf
+from pdf_summariser_ocr import is_scanned_words, text_page_words
+
+REFERENCE = "pdfplumber"
+SUBSET_TAG = re.compile(r"^[A-Z]{6}\+")
+BOX_FIELDS = ("x0", "x1", "top", "bottom", "size")
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def page_words(pdf_path, backend):
+    """[(scanned, words)] per page, as extract_page_range sees them."""
+    pages = []
+    with open_pdf(pdf_path, backend) as pdf:
+        for page in pdf.pages:
+            words = text_page_words(page)
+            pages.append((is_scanned_words(page, words), words))
+            page.close()
+    return pages
+
+
+def ms_per_page(pdf_path, backend, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        pages = page_words(pdf_path, backend)
+        best = min(best, time.perf_counter() - t0)
+    return 1000 * best / max(1, len(pages))
+
+
+def word_key(word):
+    return word["text"], SUBSET_TAG.sub("", word["fontname"])
+
+
+def compare_words(expected, actual, tolerance):
+    """(words matched, reference words, pages that differ)"""
+    matched = total = 0
+    differing = []
+    for page_number, ((ref_scanned, ref), (scanned, words)) in enumerate(zip(expected, actual), start=1):
+        total += len(ref)
+        same = 0
+        blocks = difflib.SequenceMatcher(None, [word_key(w) for w in ref], [word_key(w) for w in words], autojunk=False)
+        for block in blocks.get_matching_blocks():
+            for i in range(block.size):
+                a, b = ref[block.a + i], words[block.b + i]
+                if all(abs(a[f] - b[f]) <= tolerance for f in BOX_FIELDS):
+                    same += 1
+        matched += same
+        if same != len(ref) or len(words) != len(ref) or scanned != ref_scanned:
+            differing.append(page_number)
+    if len(actual) != len(expected):
+        differing.append(min(len(actual), len(expected)) + 1)
+    return matched, total, differing
+
+
+def run_sections(pdf_path, backend):
+    """(sections, seconds) of a pdf_summariser_ocr.py run with PDF_BACKEND=backend."""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "out.txt")
+        env = {**os.environ, "PDF_BACKEND": backend, "PDF_CACHE": "0"}
+        t0 = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "pdf_summariser_ocr.py", os.path.abspath(pdf_path), output],
+            cwd=HERE, env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+        elapsed = time.perf_counter() - t0
+        with open(os.path.join(tmp, "out.sections.json"), encoding="utf-8") as f:
+            return json.load(f), elapsed
+
+
+def describe_section_diff(expected, actual):
+    """First differing section, for the report."""
+    if len(expected) != len(actual):
+        return f"{len(actual)} sections vs {len(expected)}"
+    for index, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            return f"section {index + 1} ({a['title'][:40]!r}) differs"
+    return "identical"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--backends", nargs="+", default=[b for b in BACKENDS if b != REFERENCE],
+                        choices=[b for b in BACKENDS if b != REFERENCE])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.1, help="box tolerance in pt")
+    args = parser.parse_args()
+
+    status = 0
+    for pdf_path in args.pdfs:
+        ref_pages = page_words(pdf_path, REFERENCE)
+        ref_ms = ms_per_page(pdf_path, REFERENCE, args.repeat)
+        ref_sections, ref_s = run_sections(pdf_path, REFERENCE)
+
+        scanned = sum(1 for is_scanned, _ in ref_pages if is_scanned)
+        print(f"{pdf_path}: {len(ref_pages)} pages ({scanned} scanned), {len(ref_sections)} sections")
+        print(f"  {REFERENCE + ':':12} {ref_ms:7.1f} ms/page  extraction {ref_s:7.2f} s  (reference)")
+
+        for backend in args.backends:
+            matched, total, differing = compare_words(ref_pages, page_words(pdf_path, backend), args.tolerance)
+            ms = ms_per_page(pdf_path, backend, args.repeat)
+            sections, seconds = run_sections(pdf_path, backend)
+
+            print(f"  {backend + ':':12} {ms:7.1f} ms/page  extraction {seconds:7.2f} s  "
+                  f"({ref_ms / ms:.1f}x per page, {ref_s / seconds:.1f}x overall)")
+            pages_note = f", pages {', '.join(map(str, differing[:10]))}{' ...' if len(differing) > 10 else ''} differ" if differing else ""
+            print(f"  {'':12} words {matched}/{total} match ({100 * matched / max(1, total):.2f}%){pages_note}")
+            print(f"  {'':12} sections {describe_section_diff(ref_sections, sections)}")
+            if sections != ref_sections:
+                status = 1
+
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Time and memory benchmarks for PDF extraction.
+
+Default: the page classification + word pass. Compares, on the same PDF(s):
+  two-pass:    is_scanned_page (extract_text) and then extract_words, no cache
+               flushing (the previous extract_words)
+  single-pass: extract_words once, is_scanned_words on the result, page.close()
+
+Both must agree on every page (same scanned/text decision, same words),
+otherwise the script exits non-zero. OCR is not run: scanned pages are only
+classified, so the numbers isolate the text-layer work.
+
+--pipeline: whole-document extract_sections vs the streaming iter_sections
+(time to first section, total time, peak memory, identical sections).
+
+Usage:
+    python bench_extraction.py <pdf> [pdf ...] [--repeat 3] [--pipeline]
+
+Fixtures: node bench/fixtures.js /tmp/fixtures --pages 80 --scanned-pages 10
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+import pdfplumber
+
+from pdf_summariser_ocr import (
+    extract_sections,
+    is_scanned_page,
+    is_scanned_words,
+    iter_sections,
+    text_page_words,
+)
+
+
+def two_pass(pdf_path):
+    result = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            if is_scanned_page(page):
+                result.append(None)
+            else:
+                result.append(text_page_words(page))
+    return result
+
+
+def single_pass(pdf_path):
+    result = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            words = text_page_words(page)
+            result.append(None if is_scanned_words(page, words) else words)
+            page.close()
+    return result
+
+
+def best_time(fn, pdf_path, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(pdf_path)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def peak_memory(fn, pdf_path):
+    tracemalloc.start()
+    try:
+        fn(pdf_path)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def first_and_total(sections):
+    """(seconds to the first section, seconds to the last, sections)"""
+    t0 = time.perf_counter()
+    first = None
+    result = []
+    for section in sections:
+        if first is None:
+            first = time.perf_counter() - t0
+        result.append(section)
+    return first, time.perf_counter() - t0, result
+
+
+def bench_pipeline(pdf_path, repeat):
+    stats = {}
+    _, _, streamed = first_and_total(iter_sections(pdf_path, stats))
+    batch = extract_sections(pdf_path)
+    if streamed != batch:
+        if stats["body_font_size"] == stats["exact_body_font_size"]:
+            print(f"{pdf_path}: MISMATCH between streamed and batch sections", file=sys.stderr)
+            return 1
+        # Expected: headings were decided against a different body size
+        print(f"{pdf_path}: sampled body size {stats['body_font_size']} != "
+              f"{stats['exact_body_font_size']}, sections differ", file=sys.stderr)
+
+    def batch_run():
+        t0 = time.perf_counter()
+        extract_sections(pdf_path)
+        elapsed = time.perf_counter() - t0
+        return elapsed, elapsed  # nothing is available before the end
+
+    runs = {
+        "batch": [batch_run() for _ in range(repeat)],
+        "stream": [first_and_total(iter_sections(pdf_path))[:2] for _ in range(repeat)],
+    }
+    peaks = {
+        "batch": peak_memory(lambda path: extract_sections(path), pdf_path),
+        "stream": peak_memory(lambda path: list(iter_sections(path)), pdf_path),
+    }
+
+    same = "identical output" if streamed == batch else "output differs"
+    print(f"{pdf_path}: {len(batch)} sections, {same}")
+    for name in ("batch", "stream"):
+        first = min(r[0] for r in runs[name])
+        total = min(r[1] for r in runs[name])
+        print(f"  {name + ':':8} first section {first:7.2f} s  all {total:7.2f} s  peak {peaks[name] / 1e6:8.1f} MB")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pipeline", action="store_true", help="extract_sections vs iter_sections")
+    args = parser.parse_args()
+
+    status = 0
+    for pdf_path in args.pdfs:
+        if args.pipeline:
+            status |= bench_pipeline(pdf_path, args.repeat)
+            continue
+
+        expected = two_pass(pdf_path)
+        actual = single_pass(pdf_path)
+        if actual != expected:
+            bad = next(i for i, (a, e) in enumerate(zip(actual, expected)) if a != e) + 1
+            print(f"{pdf_path}: MISMATCH on page {bad}", file=sys.stderr)
+            status = 1
+            continue
+
+        scanned = sum(1 for page in expected if page is None)
+        old_t = best_time(two_pass, pdf_path, args.repeat)
+        new_t = best_time(single_pass, pdf_path, args.repeat)
+        old_m = peak_memory(two_pass, pdf_path) / 1e6
+        new_m = peak_memory(single_pass, pdf_path) / 1e6
+
+        print(f"{pdf_path}: {len(expected)} pages ({scanned} scanned), identical output")
+        print(f"  two-pass:    {old_t:7.2f} s  peak {old_m:8.1f} MB")
+        print(f"  single-pass: {new_t:7.2f} s  peak {new_m:8.1f} MB  ({old_t / new_t:.1f}x faster, {old_m / new_m:.1f}x less memory)")
+
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
+import crypto from "crypto";
 import fs from "fs";
 import path from "path";
 import { pipeline } from "stream/promises";
-import { Readable } from "stream";
+import { Readable, Transform } from "stream";
 
 function usage() {
   console.log(
@@ -19,7 +20,15 @@ function usage() {
   );
 }
 
-async function downloadPdf({ lectureHash, pdfUrl, outputDir }) {
+/**
+ * Download a PDF to <outputDir>/<lectureHash>.pdf, hashing it on the way.
+ *
+ * With etag / lastModified from an earlier download the request is
+ * conditional: a 304 writes nothing and returns notModified: true.
+ *
+ * @returns {Promise<{ outPath: string, notModified: boolean, etag: string|null, lastModified: string|null, sha256: string|null }>}
+ */
+export async function downloadPdf({ lectureHash, pdfUrl, outputDir, etag, lastModified }) {
   if (!lectureHash) throw new Error("lectureHash is required");
   if (!pdfUrl) throw new Error("pdfUrl is required");
 
@@ -28,15 +37,23 @@ async function downloadPdf({ lectureHash, pdfUrl, outputDir }) {
 
   fs.mkdirSync(path.dirname(outPath), { recursive: true });
 
+  const headers = {
+    // Some CDNs / origins behave better with a UA
+    "User-Agent": "Summariser/1.0 (pdf-downloader)",
+  };
+  if (etag) headers["If-None-Match"] = etag;
+  if (lastModified) headers["If-Modified-Since"] = lastModified;
+
   const res = await fetch(pdfUrl, {
     method: "GET",
     redirect: "follow",
-    headers: {
-      // Some CDNs / origins behave better with a UA
-      "User-Agent": "Summariser/1.0 (pdf-downloader)",
-    },
+    headers,
   });
 
+  if (res.status === 304) {
+    return { outPath, notModified: true, etag: etag || null, lastModified: lastModified || null, sha256: null };
+  }
+
   if (!res.ok) {
     throw new Error(`Failed to download PDF: ${res.status} ${res.statusText}`);
   }
@@ -53,9 +70,22 @@ async function downloadPdf({ lectureHash, pdfUrl, outputDir }) {
 
   // Node fetch returns a web ReadableStream; convert to Node stream for pipeline
   const nodeStream = Readable.fromWeb(res.body);
-  await pipeline(nodeStream, fs.createWriteStream(outPath));
+  const hash = crypto.createHash("sha256");
+  const hashing = new Transform({
+    transform(chunk, _encoding, callback) {
+      hash.update(chunk);
+      callback(null, chunk);
+    },
+  });
+  await pipeline(nodeStream, hashing, fs.createWriteStream(outPath));
 
-  return outPath;
+  return {
+    outPath,
+    notModified: false,
+    etag: res.headers.get("etag"),
+    lastModified: res.headers.get("last-modified"),
+    sha256: hash.digest("hex"),
+  };
 }
 
 async function main() {
@@ -65,12 +95,15 @@ async function main() {
     process.exit(1);
   }
 
-  const outPath = await downloadPdf({ lectureHash, pdfUrl, outputDir });
+  const { outPath } = await downloadPdf({ lectureHash, pdfUrl, outputDir });
   console.log(`Saved PDF to: ${outPath}`);
 }
 
-main().catch((err) => {
-  console.error(err?.stack || String(err));
-  process.exit(1);
-});
+// Run only when called directly, not when imported (pdf_pipeline.js)
+if (import.meta.url === `file://${process.argv[1]}`) {
+  main().catch((err) => {
+    console.error(err?.stack || String(err));
+    process.exit(1);
+  });
+}
 
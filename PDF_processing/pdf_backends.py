@@ -0,0 +1,306 @@
+"""
+Text-layer backends for the PDF summarisers.
+
+The extraction stages only need, per page, its words (text, x0, x1, top,
+bottom, size, fontname, page), its size for OCR rendering and, for nearly
+empty pages, its laid-out text. A backend is the object open_pdf returns:
+a context manager with a .pages sequence whose pages have page_number,
+width, height, extract_words(**kwargs), extract_text() and close(), i.e. the
+part of pdfplumber's API the summarisers use.
+
+  pdfplumber  the reference: pdfminer.six parses the content streams in
+              Python (the slow part of a text page)
+  pdfium      pypdfium2 (already installed as a pdfplumber dependency):
+              PDFium's C++ text page supplies the characters, with boxes and
+              sizes rebuilt the way pdfminer computes them (the 14 standard
+              fonts from pdfminer's own AFM metrics), and pdfplumber's own
+              WordExtractor groups them into words, so the words match the
+              reference wherever the characters do
+
+Where the two can differ, all on embedded fonts: PDFium keeps glyph widths
+in whole font units and its box covers a glyph's overhang, so positions
+drift by hundredths of a point along a line and a tight gap after e.g. a
+Computer Modern "f" can fall under the word tolerance ("of the" → "ofthe");
+font names lose their "ABCDEF+" subset tag; PDFium finds Unicode for some
+glyphs pdfminer reports as "(cid:N)"; ligatures come out as their letters.
+Rotated (non-axis-aligned) glyph advances are approximated from PDFium's
+loose box. bench_backends.py measures the time and the differences on real
+PDFs.
+
+Configuration (environment):
+    PDF_BACKEND=pdfplumber      (default) or pdfium
+"""
+import ctypes
+import os
+from collections.abc import Sequence
+
+import pdfplumber
+from pdfplumber.utils import extract_text as chars_to_text
+from pdfplumber.utils.text import WordExtractor
+
+BACKENDS = ("pdfplumber", "pdfium")
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pdfplumber")
+
+# PDFium reports a hyphen that ends a line as U+0002
+PDFIUM_HYPHEN = "\x02"
+HYPHEN = "-"
+
+
+def open_pdf(pdf_path, backend=None):
+    """The PDF opened with `backend` (default PDF_BACKEND); use as a context manager."""
+    backend = backend or PDF_BACKEND
+    if backend == "pdfplumber":
+        return pdfplumber.open(pdf_path)
+    if backend == "pdfium":
+        return PdfiumDocument(pdf_path)
+    raise ValueError(f"Unknown PDF_BACKEND {backend!r}, expected one of: {', '.join(BACKENDS)}")
+
+
+# =========================
+# PDFIUM BACKEND
+# =========================
+def _standard_metrics():
+    """
+    {fontname: (descent, {char: width})} of the 14 standard fonts. pdfminer
+    takes their metrics from its AFM tables whatever the PDF says; PDFium
+    substitutes its own fonts, whose descents and widths differ.
+    """
+    from pdfminer.fontmetrics import FONT_METRICS
+    return {
+        name: (descriptor.get("Descent", 0), widths)
+        for name, (descriptor, widths) in FONT_METRICS.items()
+    }
+
+
+def _rotation_ctm(rotation, mediabox):
+    """pdfminer's page matrix: /Rotate applied, MediaBox origin moved to (0, 0)."""
+    x0, y0, x1, y1 = mediabox
+    if rotation == 90:
+        return (0, -1, 1, 0, -y0, x1)
+    if rotation == 180:
+        return (-1, 0, 0, -1, x1, y1)
+    if rotation == 270:
+        return (0, 1, -1, 0, y1, -x0)
+    return (1, 0, 0, 1, -x0, -y0)
+
+
+def _text_object_address():
+    """
+    FPDFText_GetTextObject returning a plain address: pypdfium2's binding
+    returns a typed pointer, which can't be compared to the previous char's.
+    """
+    import pypdfium2.raw as pdfium_c
+
+    address = ctypes.cast(pdfium_c.FPDFText_GetTextObject, ctypes.c_void_p).value
+    return ctypes.CFUNCTYPE(ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int)(address)
+
+
+class PdfiumDocument:
+    """A PDF opened with PDFium; pages are loaded one at a time."""
+
+    def __init__(self, pdf_path):
+        import pypdfium2
+
+        self._pdf = pypdfium2.PdfDocument(pdf_path)
+        self.pages = _PdfiumPages(self)
+        self._standard_metrics = None
+
+    def font_info(self, font):
+        """(fontname, descent per unit of font size, AFM widths or None) of a PDFium font handle."""
+        import pypdfium2.raw as pdfium_c
+
+        length = pdfium_c.FPDFFont_GetBaseFontName(font, None, 0)
+        buffer = ctypes.create_string_buffer(length)
+        pdfium_c.FPDFFont_GetBaseFontName(font, buffer, length)
+        name = buffer.value.decode("utf-8", "replace") or "unknown"
+
+        if self._standard_metrics is None:
+            self._standard_metrics = _standard_metrics()
+        if name in self._standard_metrics:
+            descent, widths = self._standard_metrics[name]
+        else:
+            # At size 1000 the descent comes back in glyph units, as in the font descriptor
+            value = ctypes.c_float()
+            pdfium_c.FPDFFont_GetDescent(font, 1000, value)
+            descent, widths = -abs(value.value), None
+
+        return name, descent * 0.001, widths
+
+    def close(self):
+        self._pdf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _PdfiumPages(Sequence):
+    def __init__(self, document):
+        self._document = document
+
+    def __len__(self):
+        return len(self._document._pdf)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("page index out of range")
+        return PdfiumPage(self._document, index)
+
+
+class PdfiumPage:
+    """One page; chars are read from PDFium's text page on first use."""
+
+    def __init__(self, document, index):
+        import pypdfium2.raw as pdfium_c
+
+        self._document = document
+        self._page = document._pdf[index]
+        self._textpage = None
+        self._chars = None
+        self.page_number = index + 1
+
+        # Page size and MediaBox offsets as pdfplumber reports them
+        raw = self._page.raw
+        self.rotation = pdfium_c.FPDFPage_GetRotation(raw) * 90
+        # An inherited MediaBox isn't in the page dict; PDFium's bounding box
+        # (MediaBox ∩ CropBox) is the page's box then. PDFium stores floats,
+        # pdfminer the PDF's decimals: rounding recovers those
+        box = self._page.get_mediabox(fallback_ok=False) or self._page.get_bbox()
+        left, bottom, right, top = (round(v, 4) for v in box)
+        x0, x1 = sorted((left, right))
+        y0, y1 = sorted((bottom, top))
+        self._ctm = _rotation_ctm(self.rotation, (left, bottom, right, top))
+        if self.rotation in (90, 270):
+            x0, y0, x1, y1 = y0, x0, y1, x1
+        self.width = x1 - x0
+        self.height = y1 - y0
+        self._x_offset = x0
+        self._top_offset = self.height - y1
+
+    @property
+    def chars(self):
+        if self._chars is None:
+            self._chars = self._read_chars()
+        return self._chars
+
+    def _read_chars(self):
+        """
+        Chars in pdfplumber's format (the keys word extraction reads). Boxes
+        follow pdfminer's LTChar: from descent below the baseline to one font
+        size above it, advance wide, through the glyph matrix and page ctm.
+        Font, size and matrix belong to the text object, so they're read
+        again only when it changes.
+        """
+        import pypdfium2.raw as pdfium_c
+
+        self._textpage = self._page.get_textpage()
+        textpage = self._textpage.raw
+        get_text_object = _text_object_address()
+        textpage_address = ctypes.cast(textpage, ctypes.c_void_p).value
+        ctm_a, ctm_b, ctm_c, ctm_d, ctm_e, ctm_f = self._ctm
+        x_offset = self._x_offset
+        y_flip = self.height + self._top_offset
+
+        origin_x, origin_y = ctypes.c_double(), ctypes.c_double()
+        box = pdfium_c.FS_RECTF()
+        m = pdfium_c.FS_MATRIX()
+        current = None
+        # Per page: PDFium may free a page's fonts when it closes, so addresses can be reused
+        fonts = {}
+        chars = []
+
+        for i in range(pdfium_c.FPDFText_CountChars(textpage)):
+            # Spaces / line breaks PDFium infers from the layout aren't glyphs
+            if pdfium_c.FPDFText_IsGenerated(textpage, i) != 0:
+                continue
+            text_object = get_text_object(textpage_address, i)
+            if not text_object:
+                continue
+
+            if text_object != current:
+                current = text_object
+                font = pdfium_c.FPDFTextObj_GetFont(ctypes.cast(text_object, pdfium_c.FPDF_PAGEOBJECT))
+                font_address = ctypes.cast(font, ctypes.c_void_p).value
+                if font_address not in fonts:
+                    fonts[font_address] = self._document.font_info(font)
+                fontname, descent, widths = fonts[font_address]
+                fontsize = pdfium_c.FPDFText_GetFontSize(textpage, i)
+                pdfium_c.FPDFText_GetMatrix(textpage, i, m)
+                # Glyph matrix times the page ctm (mult_matrix without the translation)
+                a = m.a * ctm_a + m.b * ctm_c
+                b = m.a * ctm_b + m.b * ctm_d
+                c = m.c * ctm_a + m.d * ctm_c
+                d = m.c * ctm_b + m.d * ctm_d
+                upright = a * d > 0 and b * c <= 0
+                # Advance in text space from PDFium's loose box: exact for axis-aligned glyphs
+                if m.b == 0 and m.a != 0:
+                    advance_scale, horizontal = abs(m.a), True
+                elif m.a == 0 and m.b != 0:
+                    advance_scale, horizontal = abs(m.b), False
+                else:
+                    advance_scale, horizontal = max(abs(m.a), abs(m.b)), True
+                y_low = descent * fontsize
+                y_high = y_low + fontsize
+
+            code = pdfium_c.FPDFText_GetUnicode(textpage, i)
+            if pdfium_c.FPDFText_HasUnicodeMapError(textpage, i):
+                # No Unicode for the glyph: PDFium returns the char code, pdfminer names it
+                text = f"(cid:{code})"
+            else:
+                text = chr(code)
+                if text == PDFIUM_HYPHEN:
+                    text = HYPHEN
+            pdfium_c.FPDFText_GetCharOrigin(textpage, i, origin_x, origin_y)
+            width = widths.get(text) if widths else None
+            if width is not None:
+                adv = width * 0.001 * fontsize
+            else:
+                pdfium_c.FPDFText_GetLooseCharBox(textpage, i, box)
+                extent = box.right - box.left if horizontal else box.top - box.bottom
+                adv = abs(extent) / advance_scale
+
+            # apply_matrix_rect over (0, y_low, adv, y_high) at the glyph origin
+            e = origin_x.value * ctm_a + origin_y.value * ctm_c + ctm_e
+            f = origin_x.value * ctm_b + origin_y.value * ctm_d + ctm_f
+            xs = (c * y_low + e, a * adv + c * y_low + e, a * adv + c * y_high + e, c * y_high + e)
+            ys = (d * y_low + f, b * adv + d * y_low + f, b * adv + d * y_high + f, d * y_high + f)
+            x0, x1 = min(xs), max(xs)
+            y0, y1 = min(ys), max(ys)
+            top = y_flip - y1
+
+            chars.append({
+                "text": text,
+                "x0": x0 + x_offset,
+                "x1": x1 + x_offset,
+                "top": top,
+                "bottom": y_flip - y0,
+                "doctop": top,
+                "width": x1 - x0,
+                "height": y1 - y0,
+                "upright": upright,
+                "size": y1 - y0,
+                "fontname": fontname,
+            })
+
+        return chars
+
+    def extract_words(self, **kwargs):
+        return WordExtractor(**kwargs).extract_words(self.chars)
+
+    def extract_text(self):
+        return chars_to_text(self.chars)
+
+    def close(self):
+        """Release PDFium's page and text page (the chars stay readable)."""
+        if self._textpage is not None:
+            self._textpage.close()
+            self._textpage = None
+        if self._page is not None:
+            self._page.close()
+            self._page = None
@@ -1,13 +1,25 @@
-import { exec } from "child_process";
+import { exec, spawn } from "child_process";
 import { promisify } from "util";
 import path from "path";
+import readline from "readline";
 import { fileURLToPath } from "url";
 import fs from "fs";
+import { downloadPdf as fetchPdf } from "./download_whiteboard_pdf.js";
+import { getPdfPool, resolvePdfPython, shutdownPdfPool } from "./pdf_worker.js";
 
 const execAsync = promisify(exec);
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
+// ---------- Sections cache (PDF_processing/sections_cache.py) ----------
+// The extractor caches sections by PDF hash + config; here each URL's
+// ETag / Last-Modified and PDF hash are kept so an unchanged PDF is neither
+// downloaded nor extracted again.
+const PDF_CACHE = process.env.PDF_CACHE !== "0";
+const CACHE_DIR = path.dirname(process.env.PDF_CACHE_PATH || path.join(__dirname, ".cache", "sections.sqlite"));
+const SOURCES_PATH = path.join(CACHE_DIR, "sources.json");
+const MAX_SOURCES = Number(process.env.PDF_CACHE_MAX_SOURCES || 1000);
+
 function usage() {
   console.log(
     [
@@ -23,48 +35,58 @@ function usage() {
       "- Downloads PDF from URL",
       "- Extracts text using OCR if needed",
       "- Saves extracted text to <outputDir>/<lectureHash>.txt",
+      "- Saves full sections to <outputDir>/<lectureHash>.sections.json",
+      "- Unchanged PDFs (ETag / same bytes) reuse cached sections; PDF_CACHE=0 disables",
       "- If lectureHash is not provided, uses timestamp",
     ].join("\n")
   );
 }
 
+async function readSources() {
+  try {
+    return JSON.parse(await fs.promises.readFile(SOURCES_PATH, "utf8"));
+  } catch {
+    return {};
+  }
+}
+
+// Updates run one at a time: concurrent processPdf calls would otherwise
+// read the same sources.json and the last write would drop the others' URLs
+let sourcesUpdate = Promise.resolve();
+
+/** Remember a URL's validators and PDF hash; the least recently used URLs beyond MAX_SOURCES are dropped. */
+function rememberSource(pdfUrl, { etag, lastModified, sha256 }) {
+  if ((!etag && !lastModified) || !sha256) return sourcesUpdate; // nothing to revalidate with
+
+  sourcesUpdate = sourcesUpdate
+    .then(async () => {
+      const sources = await readSources();
+      sources[pdfUrl] = { etag, lastModified, sha256, usedAt: Date.now() };
+      const urls = Object.keys(sources).sort((a, b) => sources[a].usedAt - sources[b].usedAt);
+      for (const url of urls.slice(0, Math.max(0, urls.length - MAX_SOURCES))) delete sources[url];
+
+      // Write-then-rename: a reader (or another process) never sees a half-written file
+      await fs.promises.mkdir(CACHE_DIR, { recursive: true });
+      const tmpPath = `${SOURCES_PATH}.${process.pid}.tmp`;
+      await fs.promises.writeFile(tmpPath, JSON.stringify(sources));
+      await fs.promises.rename(tmpPath, SOURCES_PATH);
+    })
+    .catch((err) => console.warn(`Could not update ${SOURCES_PATH}: ${err.message}`));
+  return sourcesUpdate;
+}
+
 export async function downloadPdf(pdfUrl, lectureHash, outputDir) {
-  const downloadScript = path.join(__dirname, "download_whiteboard_pdf.js");
-  const outDir = outputDir || "pdfs";
-  
-  // Ensure output directory exists
-  const outDirPath = path.join(process.cwd(), outDir);
-  fs.mkdirSync(outDirPath, { recursive: true });
-  
-  const command = `node "${downloadScript}" "${lectureHash}" "${pdfUrl}" "${outDir}"`;
-  
   console.log(`Downloading PDF from: ${pdfUrl}`);
-  const { stdout, stderr } = await execAsync(command);
-  
-  if (stderr) {
-    console.warn("Download warnings:", stderr);
-  }
-  
-  const pdfPath = path.join(process.cwd(), outDir, `${lectureHash}.pdf`);
-  return pdfPath;
+  const { outPath } = await fetchPdf({ lectureHash, pdfUrl, outputDir: outputDir || "pdfs" });
+  return outPath;
 }
 
 export async function extractText(pdfPath, outputPath) {
   const pythonScript = path.join(__dirname, "pdf_summariser_ocr.py");
 
-  // Use dedicated PDF venv: PDF_processing/pdf_env
-  const venvPythonPath = path.join(__dirname, "pdf_env", "bin", "python3");
-
   console.log(`Extracting text from: ${pdfPath}`);
 
-  if (!fs.existsSync(venvPythonPath)) {
-    throw new Error(
-      `Python venv not found at ${venvPythonPath}. ` +
-      `Create the virtual environment there (named pdf_env) with required PDF OCR deps or update pdf_pipeline.js to point to your PDF OCR venv.`
-    );
-  }
-
-  const command = `"${venvPythonPath}" "${pythonScript}" "${pdfPath}" "${outputPath}"`;
+  const command = `"${resolvePdfPython()}" "${pythonScript}" "${pdfPath}" "${outputPath}"`;
 
   try {
     const { stdout, stderr } = await execAsync(command);
@@ -83,30 +105,102 @@ export async function extractText(pdfPath, outputPath) {
   }
 }
 
+/**
+ * Sections of a local PDF, yielded as the extractor finds them
+ * (pdf_summariser_ocr.py --stream), so a consumer can start on the first
+ * sections before the last pages are read. With outputPath the .txt and
+ * .sections.json are written at the end, as extractText does.
+ * @param {string} pdfPath
+ * @param {string} [outputPath]
+ * @returns {AsyncGenerator<{ title: string, paragraphs: string[] }>}
+ */
+export async function* streamSections(pdfPath, outputPath) {
+  const pythonScript = path.join(__dirname, "pdf_summariser_ocr.py");
+  const args = [pythonScript, "--stream", pdfPath, ...(outputPath ? [outputPath] : [])];
+  const child = spawn(resolvePdfPython(), args, { stdio: ["ignore", "pipe", "pipe"] });
+
+  let stderr = "";
+  child.stderr.on("data", (d) => (stderr += d));
+  const exited = new Promise((resolve, reject) => {
+    child.on("error", reject);
+    child.on("close", resolve);
+  });
+
+  try {
+    for await (const line of readline.createInterface({ input: child.stdout })) {
+      if (line.trim()) yield JSON.parse(line);
+    }
+    const code = await exited;
+    if (code !== 0) throw new Error(`PDF extraction failed (exit ${code}): ${stderr.trim()}`);
+  } finally {
+    // Consumer stopped early: don't leave the extractor running
+    if (child.exitCode === null) child.kill();
+  }
+}
+
 export async function processPdf(pdfUrl, lectureHash, outputDir) {
   // Generate lectureHash from timestamp if not provided
   const hash = lectureHash || Date.now().toString();
   const outDir = outputDir || "pdfs";
-  
-  // Step 1: Download PDF
-  const pdfPath = await downloadPdf(pdfUrl, hash, outDir);
-  console.log(`PDF downloaded to: ${pdfPath}`);
-  
-  // Step 2: Extract text and save to file
-  const outputPath = path.join(process.cwd(), outDir, `${hash}.txt`);
-  await extractText(pdfPath, outputPath);
-  
-  // Step 3: Read extracted text
-  const pdfText = fs.readFileSync(outputPath, "utf8");
-  
+
+  // Step 1: Download PDF (conditional when this URL was fetched before)
+  const source = PDF_CACHE ? (await readSources())[pdfUrl] : null;
+  console.log(`Downloading PDF from: ${pdfUrl}`);
+  let download = await fetchPdf({
+    lectureHash: hash,
+    pdfUrl,
+    outputDir: outDir,
+    etag: source?.etag,
+    lastModified: source?.lastModified,
+  });
+
+  // Step 2: Sections from the resident extractor (skipped by it for already seen PDF bytes)
+  const extractor = getPdfPool();
+  let extraction = null;
+  if (download.notModified) {
+    console.log(`PDF not modified since last download (sha256 ${source.sha256.slice(0, 12)})`);
+    extraction = await extractor.cached(source.sha256);
+    if (extraction) {
+      await rememberSource(pdfUrl, source);
+    } else {
+      // Sections were evicted or the extractor config changed: fetch the bytes
+      download = await fetchPdf({ lectureHash: hash, pdfUrl, outputDir: outDir });
+    }
+  }
+
+  const fromCache = Boolean(extraction);
+  if (!extraction) {
+    console.log(`PDF downloaded to: ${download.outPath}`);
+    if (PDF_CACHE) await rememberSource(pdfUrl, download);
+
+    console.log(`Extracting text from: ${download.outPath}`);
+    extraction = await extractor.extract(download.outPath);
+  }
+  if (extraction.cached) console.log("Sections cache hit: extraction skipped");
+
   return {
     lectureHash: hash,
-    pdfPath,
-    textPath: outputPath,
-    text: pdfText
+    pdfPath: fromCache ? null : download.outPath, // not downloaded when served from the cache
+    fromCache,
+    text: extraction.text,
+    sections: extraction.sections,
   };
 }
 
+/**
+ * Write an extraction the way the file-based extractor does:
+ * <outputDir>/<lectureHash>.txt and .sections.json.
+ * @returns {string} Path of the .txt
+ */
+export function writeExtraction(result, outputDir) {
+  const outDir = path.join(process.cwd(), outputDir || "pdfs");
+  fs.mkdirSync(outDir, { recursive: true });
+  const textPath = path.join(outDir, `${result.lectureHash}.txt`);
+  fs.writeFileSync(textPath, result.text);
+  fs.writeFileSync(path.join(outDir, `${result.lectureHash}.sections.json`), JSON.stringify(result.sections));
+  return textPath;
+}
+
 async function main() {
   const [, , pdfUrl, lectureHash, outputDir] = process.argv;
   
@@ -117,18 +211,25 @@ async function main() {
   
   try {
     const result = await processPdf(pdfUrl, lectureHash, outputDir);
+    const textPath = writeExtraction(result, outputDir);
     console.log(`\nPipeline completed successfully!`);
-    console.log(`PDF: ${result.pdfPath}`);
-    console.log(`Extracted text: ${result.textPath}`);
+    console.log(`PDF: ${result.pdfPath ?? "unchanged, sections served from cache"}`);
+    console.log(`Extracted text: ${textPath}`);
   } catch (error) {
     console.error("Pipeline error:", error.message);
     if (error.stdout) console.error("Stdout:", error.stdout);
     if (error.stderr) console.error("Stderr:", error.stderr);
-    process.exit(1);
+    process.exitCode = 1;
+  } finally {
+    // The resident PDF workers would otherwise keep the CLI alive
+    await shutdownPdfPool();
   }
 }
 
-main().catch((err) => {
-  console.error("Fatal error:", err?.stack || String(err));
-  process.exit(1);
-});
+// Run only when called directly, not when imported (overall_pipeline.js, bench)
+if (import.meta.url === `file://${process.argv[1]}`) {
+  main().catch((err) => {
+    console.error("Fatal error:", err?.stack || String(err));
+    process.exit(1);
+  });
+}
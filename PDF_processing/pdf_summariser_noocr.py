@@ -1,6 +1,19 @@
-import pdfplumber
-from collections import defaultdict
-from statistics import median
+import os
+import sys
+
+from pdf_backends import open_pdf
+from word_table import (
+    SizeCounts,
+    WordTable,
+    heading_mask,
+    median_font_size,
+    page_paragraphs,
+    paragraph_starts,
+    paragraph_records,
+    same_font_size,
+    sections_from_paragraphs,
+    sort_into_lines,
+)
 
 # =========================
 # CONFIG
@@ -8,131 +21,117 @@ from statistics import median
 Y_LINE_THRESHOLD = 3       # tolerance for grouping words into lines
 PARA_GAP_THRESHOLD = 10    # vertical gap → new paragraph
 HEADING_SIZE_DELTA = 1.0   # heading font size > body + delta
+BODY_SAMPLE_PAGES = int(os.getenv("BODY_SAMPLE_PAGES", 8))  # streaming: pages sampled for the body size
 
 
 # =========================
 # STAGE 1: WORD EXTRACTION
 # =========================
-def extract_words(pdf_path):
-    all_pages_words = []
+def page_words(page):
+    words = page.extract_words(
+        use_text_flow=False,
+        keep_blank_chars=False,
+        extra_attrs=["size", "fontname"]
+    )
+    for w in words:
+        w["page"] = page.page_number
+    table = WordTable.from_words(words)
+    page.close()
+    return table
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            words = page.extract_words(
-                use_text_flow=False,
-                keep_blank_chars=False,
-                extra_attrs=["size", "fontname"]
-            )
-            for w in words:
-                w["page"] = page.page_number
-            all_pages_words.extend(words)
 
-    return all_pages_words
+def extract_words(pdf_path):
+    """All words of the PDF as a WordTable, built page by page."""
+    with open_pdf(pdf_path) as pdf:
+        return WordTable.concat([page_words(page) for page in pdf.pages])
 
 
 # =========================
 # STAGE 2: WORDS → LINES
 # =========================
 def group_words_into_lines(words):
-    lines_map = defaultdict(list)
-
-    for w in words:
-        key = round(w["top"] / Y_LINE_THRESHOLD) * Y_LINE_THRESHOLD
-        lines_map[(w["page"], key)].append(w)
-
-    lines = []
-    for (_, _), line_words in sorted(lines_map.items()):
-        line_words = sorted(line_words, key=lambda x: x["x0"])
-        lines.append(line_words)
-
-    return lines
+    """(words in reading order, row where each line starts)"""
+    return sort_into_lines(words, Y_LINE_THRESHOLD)
 
 
 # =========================
 # STAGE 3: LINES → PARAGRAPHS
 # =========================
 def lines_to_paragraphs(lines):
-    paragraphs = []
-    current_para = []
-    prev_bottom = None
-    prev_page = None
-
-    for line in lines:
-        top = min(w["top"] for w in line)
-        bottom = max(w["bottom"] for w in line)
-        page = line[0]["page"]
-
-        new_para = False
-
-        if prev_page is not None and page != prev_page:
-            new_para = True
-        elif prev_bottom is not None and top - prev_bottom > PARA_GAP_THRESHOLD:
-            new_para = True
-
-        if new_para and current_para:
-            paragraphs.append(current_para)
-            current_para = []
-
-        current_para.append(line)
-        prev_bottom = bottom
-        prev_page = page
-
-    if current_para:
-        paragraphs.append(current_para)
-
-    return paragraphs
-
-
-def paragraph_to_text(paragraph):
-    return " ".join(
-        " ".join(w["text"] for w in line)
-        for line in paragraph
-    ).strip()
+    """(words in reading order, row where each paragraph starts)"""
+    words, line_starts = lines
+    return words, paragraph_starts(words, line_starts, PARA_GAP_THRESHOLD)
 
 
 # =========================
 # STAGE 4: BODY FONT SIZE
 # =========================
 def estimate_body_font_size(words):
-    sizes = [w["size"] for w in words]
-    return median(sizes)
+    return median_font_size(words)
 
 
 # =========================
 # STAGE 5: HEADING DETECTION
 # =========================
-def is_heading(paragraph, body_font_size):
-    sizes = [w["size"] for line in paragraph for w in line]
-    avg_size = sum(sizes) / len(sizes)
-    return avg_size > body_font_size + HEADING_SIZE_DELTA
+def is_heading(paragraphs, body_font_size):
+    words, starts = paragraphs
+    return heading_mask(words, starts, body_font_size, HEADING_SIZE_DELTA)
 
 
 # =========================
 # STAGE 6: BUILD SECTIONS
 # =========================
 def build_sections(paragraphs, body_font_size):
-    sections = []
-    current_section = {
-        "title": "Introduction",
-        "paragraphs": []
-    }
+    words, starts = paragraphs
+    headings = is_heading(paragraphs, body_font_size)
+    return list(sections_from_paragraphs(paragraph_records(words, starts, headings)))
+
+
+# =========================
+# STREAMING PIPELINE
+# =========================
+def sample_body_font_size(pdf_path):
+    """
+    Body size estimated from up to BODY_SAMPLE_PAGES pages spread through the
+    PDF, and those pages' tables ({page_number: WordTable}) for reuse.
+    """
+    prefetched = {}
+    counts = SizeCounts()
+    with open_pdf(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        k = min(page_count, max(1, BODY_SAMPLE_PAGES))
+        for index in sorted({(2 * i + 1) * page_count // (2 * k) for i in range(k)}):
+            table = page_words(pdf.pages[index])
+            counts.add(table)
+            prefetched[index + 1] = table
+    return counts.median(default=10), prefetched
+
+
+def iter_sections(pdf_path, stats=None):
+    """
+    Sections yielded as soon as the next heading is found, reading one page
+    at a time. Headings use the sampled body size; stats (a dict) receives it
+    and the exact one, and when they match the output equals build_sections.
+    """
+    body_font_size, prefetched = sample_body_font_size(pdf_path)
+    counts = SizeCounts()
 
-    for para in paragraphs:
-        text = paragraph_to_text(para)
-        if not text:
-            continue
+    def paragraphs():
+        with open_pdf(pdf_path) as pdf:
+            for page in pdf.pages:
+                words = prefetched.pop(page.page_number, None)
+                if words is None:
+                    words = page_words(page)
+                counts.add(words)
+                ordered, starts = page_paragraphs(words, Y_LINE_THRESHOLD, PARA_GAP_THRESHOLD)
+                headings = heading_mask(ordered, starts, body_font_size, HEADING_SIZE_DELTA)
+                yield from paragraph_records(ordered, starts, headings)
 
-        if is_heading(para, body_font_size):
-            sections.append(current_section)
-            current_section = {
-                "title": text,
-                "paragraphs": []
-            }
-        else:
-            current_section["paragraphs"].append(text)
+    yield from sections_from_paragraphs(paragraphs())
 
-    sections.append(current_section)
-    return sections
+    if stats is not None:
+        stats["body_font_size"] = body_font_size
+        stats["exact_body_font_size"] = counts.median(default=10)
 
 
 # =========================
@@ -150,26 +149,34 @@ def summarize_section(section):
 # =========================
 # MAIN PIPELINE
 # =========================
+def section_key(section):
+    return section["title"], tuple(section["paragraphs"])
+
+
 def run_pipeline(pdf_path):
-    words = extract_words(pdf_path)
-    print(words)
-    lines = group_words_into_lines(words)
-    print(lines)
-    paragraphs = lines_to_paragraphs(lines)
-    print(paragraphs)
-    body_font_size = estimate_body_font_size(words)
-    print(body_font_size)
-    sections = build_sections(paragraphs, body_font_size)
-    print(sections)
-
-    summaries = []
-    for section in sections:
-        summaries.append({
-            "title": section["title"],
-            "summary": summarize_section(section)
-        })
-    
-    return summaries
+    """
+    Sections summarised as they stream in. If the sampled body size turns out
+    to differ from the exact one, the sections are rebuilt from a full
+    extraction and only those that changed are summarised again.
+    """
+    stats = {}
+    summarised = [(section, summarize_section(section)) for section in iter_sections(pdf_path, stats)]
+
+    if not same_font_size(stats["body_font_size"], stats["exact_body_font_size"]):
+        print(
+            f"Warning: sampled body font size {stats['body_font_size']} != "
+            f"{stats['exact_body_font_size']}; rebuilding sections from a full extraction",
+            file=sys.stderr,
+        )
+        done = {section_key(section): summary for section, summary in summarised}
+        words = extract_words(pdf_path)
+        paragraphs = lines_to_paragraphs(group_words_into_lines(words))
+        summarised = [
+            (section, done[key] if (key := section_key(section)) in done else summarize_section(section))
+            for section in build_sections(paragraphs, stats["exact_body_font_size"])
+        ]
+
+    return [{"title": section["title"], "summary": summary} for section, summary in summarised]
 
 
 # =========================
@@ -1,8 +1,23 @@
-import pdfplumber
+import os
+import sys
 import pytesseract
 from pdf2image import convert_from_path
-from collections import defaultdict
-from statistics import median
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from word_table import (
+    SizeCounts,
+    WordTable,
+    heading_mask,
+    median_font_size,
+    page_paragraphs,
+    paragraph_starts,
+    paragraph_records,
+    same_font_size,
+    sections_from_paragraphs,
+    sort_into_lines,
+)
+from pdf_backends import PDF_BACKEND, open_pdf
+from sections_cache import SectionsCache, cache_enabled, file_sha256, make_key
 
 # =========================
 # CONFIG
@@ -12,29 +27,72 @@ PARA_GAP_THRESHOLD = 10
 HEADING_SIZE_DELTA = 1.0
 OCR_DPI = 300
 
+# OCR stage: scanned pages are rasterized in batches of consecutive pages (one
+# poppler run each) and Tesseract runs on OCR_WORKERS threads
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", min(4, os.cpu_count() or 1)))
+OCR_BATCH_PAGES = int(os.getenv("OCR_BATCH_PAGES", 8))      # bounds rendered images held in memory
+# Adaptive DPI: pages whose long side would exceed this many pixels at OCR_DPI
+# (e.g. whiteboard canvases) are rendered at a lower DPI, never below OCR_MIN_DPI.
+# Letter/A4 pages stay at OCR_DPI. 0 disables.
+OCR_MAX_SIDE_PX = int(os.getenv("OCR_MAX_SIDE_PX", 4200))
+OCR_MIN_DPI = int(os.getenv("OCR_MIN_DPI", 100))
+
+# Parallel extraction: page ranges sharded across worker processes (1 = serial)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", 1))
+SHARDS_PER_WORKER = 4      # smaller shards even out OCR-heavy page ranges
+
+# Streaming pipeline: the body font size is estimated from this many pages,
+# spread over the document, before the first section is emitted
+BODY_SAMPLE_PAGES = int(os.getenv("BODY_SAMPLE_PAGES", 8))
+
+# Part of the sections cache key (sections_cache.py): bump when a change to the
+# extraction code alters its output, so cached sections aren't reused
+EXTRACTOR_VERSION = 2
+
 
 # =========================
 # PAGE TYPE DETECTION
 # =========================
+SCANNED_TEXT_MIN_CHARS = 20
+
+
 def is_scanned_page(page):
     text = page.extract_text()
-    return text is None or len(text.strip()) < 20
+    return text is None or len(text.strip()) < SCANNED_TEXT_MIN_CHARS
+
+
+def is_scanned_words(page, words):
+    """
+    is_scanned_page, decided from the page's already-extracted words.
+
+    extract_text() lays the same words out with exactly one separator
+    (space or newline) between neighbours, so its stripped length lies between
+    the words' characters and that plus len(words) - 1. Only when the
+    threshold falls inside that range (a nearly empty page) is the text laid
+    out a second time to decide.
+    """
+    chars = sum(len(w["text"]) for w in words)
+    if chars >= SCANNED_TEXT_MIN_CHARS:
+        return False
+    if chars + max(0, len(words) - 1) < SCANNED_TEXT_MIN_CHARS:
+        return True
+    return is_scanned_page(page)
 
 
 # =========================
 # OCR PAGE → WORDS
 # =========================
-def ocr_page_to_words(pdf_path, page_number):
-    images = convert_from_path(
-        pdf_path,
-        dpi=OCR_DPI,
-        first_page=page_number,
-        last_page=page_number
-    )
-
-    image = images[0]
+def image_to_words(image, page_number, scale=1.0):
+    """
+    Tesseract words of one rendered page. Coordinates are reported in
+    OCR_DPI pixel space (scale = OCR_DPI / render DPI), so line and paragraph
+    thresholds behave the same whatever DPI the page was rendered at.
+    """
     data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
 
+    def px(value):
+        return value if scale == 1.0 else value * scale
+
     words = []
     for i in range(len(data["text"])):
         if data["text"][i].strip() == "":
@@ -42,10 +100,10 @@ def ocr_page_to_words(pdf_path, page_number):
 
         words.append({
             "text": data["text"][i],
-            "x0": data["left"][i],
-            "x1": data["left"][i] + data["width"][i],
-            "top": data["top"][i],
-            "bottom": data["top"][i] + data["height"][i],
+            "x0": px(data["left"][i]),
+            "x1": px(data["left"][i] + data["width"][i]),
+            "top": px(data["top"][i]),
+            "bottom": px(data["top"][i] + data["height"][i]),
             "size": 10,          # OCR has no font size → fake but consistent
             "fontname": "OCR",
             "page": page_number
@@ -54,132 +112,353 @@ def ocr_page_to_words(pdf_path, page_number):
     return words
 
 
+def ocr_dpi(width_pt, height_pt):
+    """Render DPI for a page of the given size in points (1/72 in)."""
+    if OCR_MAX_SIDE_PX <= 0:
+        return OCR_DPI
+    long_side_in = max(width_pt, height_pt) / 72
+    if long_side_in * OCR_DPI <= OCR_MAX_SIDE_PX:
+        return OCR_DPI
+    return max(OCR_MIN_DPI, int(OCR_MAX_SIDE_PX / long_side_in))
+
+
+def ocr_batches(pages):
+    """
+    Group (page_number, dpi) into runs of consecutive pages at the same DPI,
+    at most OCR_BATCH_PAGES long: each run is one convert_from_path call.
+    """
+    batches = []
+    for page_number, dpi in sorted(pages):
+        last = batches[-1] if batches else None
+        if (
+            last
+            and last["dpi"] == dpi
+            and last["last"] == page_number - 1
+            and last["last"] - last["first"] + 1 < OCR_BATCH_PAGES
+        ):
+            last["last"] = page_number
+        else:
+            batches.append({"first": page_number, "last": page_number, "dpi": dpi})
+    return batches
+
+
+def ocr_pages(pdf_path, pages, workers=None):
+    """
+    OCR scanned pages.
+
+    Args:
+        pages: [(page_number, width_pt, height_pt)]
+        workers: Tesseract threads (defaults to OCR_WORKERS)
+
+    Returns:
+        dict: {page_number: [word dicts]}
+    """
+    workers = OCR_WORKERS if workers is None else workers
+    if not pages:
+        return {}
+
+    if workers > 1:
+        # Parallelism comes from the pool; keep each Tesseract single-threaded
+        os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+    batches = ocr_batches([(n, ocr_dpi(w, h)) for n, w, h in pages])
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = []
+        for batch in batches:
+            # poppler renders the whole run in one process (threads share the work)
+            images = convert_from_path(
+                pdf_path,
+                dpi=batch["dpi"],
+                first_page=batch["first"],
+                last_page=batch["last"],
+                thread_count=max(1, min(workers, batch["last"] - batch["first"] + 1)),
+            )
+            scale = OCR_DPI / batch["dpi"]
+            for offset, image in enumerate(images):
+                page_number = batch["first"] + offset
+                pending.append((page_number, pool.submit(image_to_words, image, page_number, scale)))
+
+            # Bound memory: don't render further ahead than the pool can consume
+            while len(pending) > 2 * OCR_BATCH_PAGES:
+                page_number, future = pending.pop(0)
+                results[page_number] = future.result()
+
+        for page_number, future in pending:
+            results[page_number] = future.result()
+
+    return results
+
+
 # =========================
 # EXTRACT WORDS (TEXT + OCR)
 # =========================
-def extract_words(pdf_path):
-    all_words = []
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            if is_scanned_page(page):
-                ocr_words = ocr_page_to_words(pdf_path, page.page_number)
-                all_words.extend(ocr_words)
-            else:
-                words = page.extract_words(
-                    use_text_flow=False,
-                    keep_blank_chars=False,
-                    extra_attrs=["size", "fontname"]
-                )
-                for w in words:
-                    w["page"] = page.page_number
-                all_words.extend(words)
+def text_page_words(page):
+    words = page.extract_words(
+        use_text_flow=False,
+        keep_blank_chars=False,
+        extra_attrs=["size", "fontname"]
+    )
+    for w in words:
+        w["page"] = page.page_number
+    return words
 
-    return all_words
 
+def extract_page_range(pdf_path, first, last, ocr_workers=None):
+    """
+    WordTable of pages [first, last) (0-based), in page order.
+    Each page is laid out once; scanned pages are collected and OCR'd together
+    afterwards. Each worker opens the PDF itself.
+    """
+    by_page = {}
+    scanned = []
+    with open_pdf(pdf_path) as pdf:
+        for page in pdf.pages[first:last]:
+            # One layout pass per page: the words also decide whether it's a scan
+            words = text_page_words(page)
+            if is_scanned_words(page, words):
+                scanned.append((page.page_number, float(page.width), float(page.height)))
+            else:
+                # Columns per page; the page's word dicts are dropped right away
+                by_page[page.page_number] = WordTable.from_words(words)
+            # Drop the page's parsed objects so memory stays flat on long PDFs
+            page.close()
 
-# =========================
-# WORDS → LINES
-# =========================
-def group_words_into_lines(words):
-    lines_map = defaultdict(list)
+    for page_number, words in ocr_pages(pdf_path, scanned, ocr_workers).items():
+        by_page[page_number] = WordTable.from_words(words)
 
-    for w in words:
-        key = round(w["top"] / Y_LINE_THRESHOLD) * Y_LINE_THRESHOLD
-        lines_map[(w["page"], key)].append(w)
+    return WordTable.concat(by_page[page_number] for page_number in sorted(by_page))
 
-    lines = []
-    for (_, _), line_words in sorted(lines_map.items()):
-        line_words = sorted(line_words, key=lambda x: x["x0"])
-        lines.append(line_words)
 
-    return lines
+def page_shards(page_count, workers):
+    """Contiguous [first, last) page ranges, SHARDS_PER_WORKER per worker."""
+    shards = min(page_count, workers * SHARDS_PER_WORKER)
+    bounds = [round(i * page_count / shards) for i in range(shards + 1)]
+    return list(zip(bounds, bounds[1:]))
 
 
-# =========================
-# LINES → PARAGRAPHS
-# =========================
-def lines_to_paragraphs(lines):
-    paragraphs = []
-    current_para = []
-    prev_bottom = None
-    prev_page = None
+def extract_words(pdf_path, workers=None):
+    """
+    All words of the PDF as a WordTable, in page order.
 
-    for line in lines:
-        top = min(w["top"] for w in line)
-        bottom = max(w["bottom"] for w in line)
-        page = line[0]["page"]
+    With workers > 1 the page ranges are extracted in a process pool and
+    concatenated in page order, so the result is the same as the serial path.
+    """
+    workers = PDF_WORKERS if workers is None else workers
 
-        new_para = False
-        if prev_page is not None and page != prev_page:
-            new_para = True
-        elif prev_bottom is not None and top - prev_bottom > PARA_GAP_THRESHOLD:
-            new_para = True
+    with open_pdf(pdf_path) as pdf:
+        page_count = len(pdf.pages)
 
-        if new_para and current_para:
-            paragraphs.append(current_para)
-            current_para = []
+    if workers <= 1 or page_count < 2:
+        return extract_page_range(pdf_path, 0, page_count)
 
-        current_para.append(line)
-        prev_bottom = bottom
-        prev_page = page
+    shards = page_shards(page_count, workers)
+    # Share the OCR threads between the processes instead of multiplying them
+    ocr_workers = max(1, OCR_WORKERS // workers)
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+        parts = pool.map(
+            extract_page_range,
+            [pdf_path] * len(shards),
+            [first for first, _ in shards],
+            [last for _, last in shards],
+            [ocr_workers] * len(shards),
+        )
+        return WordTable.concat(list(parts))
 
-    if current_para:
-        paragraphs.append(current_para)
 
-    return paragraphs
+# =========================
+# WORDS → LINES
+# =========================
+def group_words_into_lines(words):
+    """
+    Bucket words into lines by (page, rounded top), each sorted by x0.
+    Returns (words in reading order, row where each line starts).
+    """
+    return sort_into_lines(words, Y_LINE_THRESHOLD)
 
 
-def paragraph_to_text(paragraph):
-    return " ".join(
-        " ".join(w["text"] for w in line)
-        for line in paragraph
-    ).strip()
+# =========================
+# LINES → PARAGRAPHS
+# =========================
+def lines_to_paragraphs(lines):
+    """
+    Split lines into paragraphs at page changes and vertical gaps.
+    Returns (words in reading order, row where each paragraph starts).
+    """
+    words, line_starts = lines
+    return words, paragraph_starts(words, line_starts, PARA_GAP_THRESHOLD)
 
 
 # =========================
 # BODY FONT SIZE (OCR SAFE)
 # =========================
 def estimate_body_font_size(words):
-    sizes = [w["size"] for w in words if w["fontname"] != "OCR"]
-    return median(sizes) if sizes else 10
+    return median_font_size(words, exclude_font="OCR", default=10)
 
 
 # =========================
 # HEADING DETECTION
 # =========================
-def is_heading(paragraph, body_font_size):
-    sizes = [w["size"] for line in paragraph for w in line]
-    avg_size = sum(sizes) / len(sizes)
-    return avg_size > body_font_size + HEADING_SIZE_DELTA
+def is_heading(paragraphs, body_font_size):
+    """Per paragraph: mean word size above the body size + HEADING_SIZE_DELTA."""
+    words, starts = paragraphs
+    return heading_mask(words, starts, body_font_size, HEADING_SIZE_DELTA)
 
 
 # =========================
 # BUILD SECTIONS
 # =========================
 def build_sections(paragraphs, body_font_size):
+    words, starts = paragraphs
+    headings = is_heading(paragraphs, body_font_size)
+    return list(sections_from_paragraphs(paragraph_records(words, starts, headings, ocr_font="OCR")))
+
+
+# =========================
+# STREAMING PIPELINE
+# =========================
+def sample_body_font_size(pdf_path, sample_pages=None):
+    """
+    First pass over up to sample_pages pages spread evenly through the PDF.
+
+    Returns (estimated body font size, prefetched) where prefetched maps each
+    sampled page number to its WordTable, or to (width, height) for a scanned
+    page, so iter_page_words doesn't parse those pages twice.
+    """
+    sample_pages = BODY_SAMPLE_PAGES if sample_pages is None else sample_pages
+    prefetched = {}
+    counts = SizeCounts(exclude_font="OCR")
+
+    with open_pdf(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        k = min(page_count, max(1, sample_pages))
+        for index in sorted({(2 * i + 1) * page_count // (2 * k) for i in range(k)}):
+            page = pdf.pages[index]
+            words = text_page_words(page)
+            if is_scanned_words(page, words):
+                prefetched[page.page_number] = (float(page.width), float(page.height))
+            else:
+                table = WordTable.from_words(words)
+                counts.add(table)
+                prefetched[page.page_number] = table
+            page.close()
+
+    return counts.median(default=10), prefetched
+
+
+def iter_page_words(pdf_path, prefetched=None, ocr_workers=None):
+    """
+    (page_number, WordTable) for every page, in page order, one page parsed at
+    a time. Consecutive scanned pages are OCR'd together (up to
+    OCR_BATCH_PAGES) and yielded when the run ends.
+    """
+    prefetched = dict(prefetched or {})
+    scanned = []
+
+    def flush():
+        words = ocr_pages(pdf_path, scanned, ocr_workers)
+        for page_number, _, _ in scanned:
+            yield page_number, WordTable.from_words(words.get(page_number, []))
+        scanned.clear()
+
+    with open_pdf(pdf_path) as pdf:
+        for page in pdf.pages:
+            entry = prefetched.pop(page.page_number, None)
+            if entry is None:
+                words = text_page_words(page)
+                if is_scanned_words(page, words):
+                    entry = (float(page.width), float(page.height))
+                else:
+                    entry = WordTable.from_words(words)
+            page.close()
+
+            if isinstance(entry, WordTable):
+                yield from flush()
+                yield page.page_number, entry
+            else:
+                scanned.append((page.page_number, *entry))
+                if len(scanned) >= OCR_BATCH_PAGES:
+                    yield from flush()
+
+    yield from flush()
+
+
+def iter_paragraphs(pages, body_font_size, size_counts=None):
+    """(text, is_heading, page, ocr) per paragraph of each (page_number, WordTable)."""
+    for _, words in pages:
+        if size_counts is not None:
+            size_counts.add(words)
+        ordered, starts = page_paragraphs(words, Y_LINE_THRESHOLD, PARA_GAP_THRESHOLD)
+        headings = heading_mask(ordered, starts, body_font_size, HEADING_SIZE_DELTA)
+        yield from paragraph_records(ordered, starts, headings, ocr_font="OCR")
+
+
+def iter_sections(pdf_path, stats=None):
+    """
+    Sections of the PDF, each yielded as soon as the next heading is found.
+
+    Memory is bounded by a page (or an OCR run) plus the open section, not
+    the document. Headings are decided against a sampled body font size; the
+    exact one is counted along the way and, with stats (a dict), reported as
+    stats["body_font_size"] / stats["exact_body_font_size"]. When they match
+    (same_font_size) the sections are those of extract_sections.
+    """
+    body_font_size, prefetched = sample_body_font_size(pdf_path)
+    counts = SizeCounts(exclude_font="OCR")
+    paragraphs = iter_paragraphs(iter_page_words(pdf_path, prefetched), body_font_size, counts)
+
+    yield from sections_from_paragraphs(paragraphs)
+
+    if stats is not None:
+        stats["body_font_size"] = body_font_size
+        stats["exact_body_font_size"] = counts.median(default=10)
+
+
+def stream_cached_sections(pdf_path, emit):
+    """
+    cached_sections, streaming: emit(section) is called for every section as
+    soon as it is known. If the sampled body font size turns out wrong, the
+    emitted sections were approximate: the returned ones are then rebuilt from
+    a full extraction, and only exact sections are ever cached.
+    Returns (sections, hit).
+    """
+    if cache_enabled():
+        pdf_sha256 = file_sha256(pdf_path)
+        key = make_key(pdf_sha256, extractor_config())
+        cache = SectionsCache()
+        try:
+            sections = cache.get(key)
+        finally:
+            cache.close()
+        if sections is not None:
+            for section in sections:
+                emit(section)
+            return sections, True
+
+    stats = {}
     sections = []
-    current_section = {
-        "title": "Introduction",
-        "paragraphs": []
-    }
+    for section in iter_sections(pdf_path, stats):
+        emit(section)
+        sections.append(section)
 
-    for para in paragraphs:
-        text = paragraph_to_text(para)
-        if not text:
-            continue
+    if not same_font_size(stats["body_font_size"], stats["exact_body_font_size"]):
+        print(
+            f"Warning: sampled body font size {stats['body_font_size']} != "
+            f"{stats['exact_body_font_size']}; streamed headings may differ, "
+            "rebuilding sections from a full extraction",
+            file=sys.stderr,
+        )
+        sections = extract_sections(pdf_path)
 
-        if is_heading(para, body_font_size):
-            sections.append(current_section)
-            current_section = {
-                "title": text,
-                "paragraphs": []
-            }
-        else:
-            current_section["paragraphs"].append(text)
+    if cache_enabled():
+        cache = SectionsCache()
+        try:
+            cache.put(key, pdf_sha256, sections)
+        finally:
+            cache.close()
 
-    sections.append(current_section)
-    return sections
+    return sections, False
 
 
 # =========================
@@ -193,54 +472,240 @@ def summarize_section(section):
 # =========================
 # MAIN PIPELINE
 # =========================
-def run_pipeline(pdf_path):
+def extractor_config():
+    """Every setting that changes the extracted sections (worker counts don't)."""
+    return {
+        "version": EXTRACTOR_VERSION,
+        "backend": PDF_BACKEND,
+        "Y_LINE_THRESHOLD": Y_LINE_THRESHOLD,
+        "PARA_GAP_THRESHOLD": PARA_GAP_THRESHOLD,
+        "HEADING_SIZE_DELTA": HEADING_SIZE_DELTA,
+        "SCANNED_TEXT_MIN_CHARS": SCANNED_TEXT_MIN_CHARS,
+        "OCR_DPI": OCR_DPI,
+        "OCR_MAX_SIDE_PX": OCR_MAX_SIDE_PX,
+        "OCR_MIN_DPI": OCR_MIN_DPI,
+    }
+
+
+def extract_sections(pdf_path):
     words = extract_words(pdf_path)
     lines = group_words_into_lines(words)
     paragraphs = lines_to_paragraphs(lines)
     body_font_size = estimate_body_font_size(words)
-    sections = build_sections(paragraphs, body_font_size)
+    return build_sections(paragraphs, body_font_size)
+
+
+def cached_sections(pdf_path=None, pdf_sha256=None):
+    """
+    Sections of a PDF through the sections cache.
+
+    With pdf_path the PDF is hashed, looked up and, on a miss, extracted and
+    stored. With only pdf_sha256 (the file wasn't downloaded) a miss returns
+    None. Returns (sections, hit).
+    """
+    if not cache_enabled():
+        return (extract_sections(pdf_path), False) if pdf_path else (None, False)
+
+    pdf_sha256 = pdf_sha256 or file_sha256(pdf_path)
+    key = make_key(pdf_sha256, extractor_config())
+    cache = SectionsCache()
+    try:
+        sections = cache.get(key)
+        if sections is not None or not pdf_path:
+            return sections, sections is not None
+        sections = extract_sections(pdf_path)
+        cache.put(key, pdf_sha256, sections)
+        return sections, False
+    finally:
+        cache.close()
+
+
+def section_key(section):
+    return section["title"], tuple(section["paragraphs"])
+
+
+def run_pipeline(pdf_path, sections=None):
+    """
+    Summaries of the given sections or, without them, of the PDF's sections
+    as they stream (iter_sections). If the sampled body size turns out to
+    differ from the exact one, the sections are rebuilt from a full
+    extraction and only those that changed are summarised again.
+    """
+    if sections is not None:
+        return [{"title": section["title"], "summary": summarize_section(section)} for section in sections]
+
+    stats = {}
+    summarised = [(section, summarize_section(section)) for section in iter_sections(pdf_path, stats)]
+
+    if not same_font_size(stats["body_font_size"], stats["exact_body_font_size"]):
+        print(
+            f"Warning: sampled body font size {stats['body_font_size']} != "
+            f"{stats['exact_body_font_size']}; rebuilding sections from a full extraction",
+            file=sys.stderr,
+        )
+        done = {section_key(section): summary for section, summary in summarised}
+        summarised = [
+            (section, done[key] if (key := section_key(section)) in done else summarize_section(section))
+            for section in extract_sections(pdf_path)
+        ]
+
+    return [{"title": section["title"], "summary": summary} for section, summary in summarised]
+
+
+def summaries_text(summaries):
+    """The flattened "## title" + summary text written to <hash>.txt."""
+    output_lines = []
+    for s in summaries:
+        output_lines.append(f"\n## {s['title']}")
+        output_lines.append(s["summary"])
+    return "\n".join(output_lines)
 
-    summaries = []
-    for section in sections:
-        summaries.append({
-            "title": section["title"],
-            "summary": summarize_section(section)
-        })
 
-    return summaries
+# =========================
+# RESIDENT WORKER
+# =========================
+def run_worker():
+    """
+    Serve extraction jobs over stdin/stdout (JSON lines) until stdin closes,
+    so the PDF backend / pytesseract are imported once for every PDF.
+
+    Jobs:   {"id", "path"}    extract (through the sections cache)
+            {"id", "sha256"}  cached sections only; "sections": null on a miss
+    Reply:  {"id", "sections", "text", "cached"} or {"id", "error"}
+
+    Extractions run one at a time on a background thread; cache lookups are
+    answered as they arrive, so a quick {sha256} job never waits behind a
+    long OCR run. Replies can therefore come out of order (match them by id).
+
+    stdout is reserved for replies; anything else printed while a job runs
+    goes to stderr.
+    """
+    import json
+    import queue
+    import threading
+
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    write_lock = threading.Lock()
+    extractions = queue.Queue()
+
+    def send(reply):
+        with write_lock:
+            out.write(json.dumps(reply, ensure_ascii=False) + "\n")
+            out.flush()
+
+    def answer(job_id, work):
+        try:
+            sections, hit = work()
+            text = summaries_text(run_pipeline(None, sections)) if sections is not None else None
+            send({"id": job_id, "sections": sections, "text": text, "cached": hit})
+        except Exception as e:
+            send({"id": job_id, "error": str(e)})
+
+    def extract(path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"PDF file not found: {path}")
+        return cached_sections(pdf_path=path)
+
+    def extraction_loop():
+        while (item := extractions.get()) is not None:
+            answer(*item)
+
+    extractor = threading.Thread(target=extraction_loop, daemon=True)
+    extractor.start()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        job_id = None
+        try:
+            job = json.loads(line)
+            job_id = job.get("id")
+            if "sha256" in job:
+                answer(job_id, lambda sha256=job["sha256"]: cached_sections(pdf_sha256=sha256))
+            else:
+                extractions.put((job_id, lambda path=job["path"]: extract(path)))
+        except Exception as e:
+            send({"id": job_id, "error": str(e)})
+
+    # stdin closed: finish the queued extractions before exiting
+    extractions.put(None)
+    extractor.join()
 
 
 # =========================
 # ENTRY POINT
 # =========================
 if __name__ == "__main__":
+    import json
     import sys
     import os
     
-    if len(sys.argv) < 2:
-        print("Usage: python pdf_summariser_ocr.py <pdf_path> [output_file]")
-        sys.exit(1)
-    
-    PDF_PATH = sys.argv[1]
-    
-    if not os.path.exists(PDF_PATH):
-        print(f"Error: PDF file not found: {PDF_PATH}")
+    # Exit status when --cached finds nothing (the caller downloads and retries)
+    CACHE_MISS_EXIT = 3
+
+    if sys.argv[1:] == ["--worker"]:
+        run_worker()
+        sys.exit(0)
+
+    args = sys.argv[1:]
+    # --stream: each section is written to stdout as a JSON line as soon as
+    # it is known; status messages go to stderr
+    STREAM = "--stream" in args
+    if STREAM:
+        args.remove("--stream")
+    log = (lambda *a: print(*a, file=sys.stderr)) if STREAM else print
+
+    def emit(section):
+        print(json.dumps(section, ensure_ascii=False), flush=True)
+
+    PDF_SHA256 = None
+    if len(args) >= 2 and args[0] == "--cached":
+        PDF_SHA256 = args[1]
+        args = args[2:]
+
+    if PDF_SHA256 is None and not args:
+        print("Usage: python pdf_summariser_ocr.py [--stream] <pdf_path> [output_file]")
+        print("       python pdf_summariser_ocr.py [--stream] --cached <pdf_sha256> [output_file]")
+        print("       python pdf_summariser_ocr.py --worker      # long-lived JSON-lines worker")
         sys.exit(1)
-    
-    summaries = run_pipeline(PDF_PATH)
-    
-    output_lines = []
-    for s in summaries:
-        output_lines.append(f"\n## {s['title']}")
-        output_lines.append(s["summary"])
-    
-    output_text = "\n".join(output_lines)
+
+    if PDF_SHA256 is None:
+        PDF_PATH = args.pop(0)
+        if not os.path.exists(PDF_PATH):
+            log(f"Error: PDF file not found: {PDF_PATH}")
+            sys.exit(1)
+        if STREAM:
+            sections, hit = stream_cached_sections(PDF_PATH, emit)
+        else:
+            sections, hit = cached_sections(pdf_path=PDF_PATH)
+    else:
+        PDF_PATH = None
+        sections, hit = cached_sections(pdf_sha256=PDF_SHA256)
+        if sections is None:
+            log(f"Sections cache miss: {PDF_SHA256}")
+            sys.exit(CACHE_MISS_EXIT)
+        if STREAM:
+            for section in sections:
+                emit(section)
+
+    if hit:
+        log("Sections cache hit: extraction skipped")
+    output_text = summaries_text(run_pipeline(PDF_PATH, sections))
     
     # If output file is provided, save to file; otherwise print to stdout
-    if len(sys.argv) >= 3:
-        output_file = sys.argv[2]
+    if args:
+        output_file = args[0]
         with open(output_file, "w", encoding="utf-8") as f:
             f.write(output_text)
-        print(f"Extracted text saved to: {output_file}")
-    else:
+
+        # Full (untruncated) sections for per-section note generation
+        sections_file = os.path.splitext(output_file)[0] + ".sections.json"
+        with open(sections_file, "w", encoding="utf-8") as f:
+            json.dump(sections, f, ensure_ascii=False)
+
+        log(f"Extracted text saved to: {output_file}")
+    elif not STREAM:
         print(output_text)
@@ -0,0 +1,134 @@
+import path from "path";
+import fs from "fs";
+import { fileURLToPath } from "url";
+import { JsonLinesWorker, WorkerPool } from "../json_lines_worker.js";
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+/**
+ * Interpreter of the dedicated PDF venv (PDF_processing/pdf_env).
+ * @returns {string}
+ */
+export function resolvePdfPython() {
+  const venvPythonPath = path.join(__dirname, "pdf_env", "bin", "python3");
+
+  if (!fs.existsSync(venvPythonPath)) {
+    throw new Error(
+      `Python venv not found at ${venvPythonPath}. ` +
+      `Create the virtual environment there (named pdf_env) with required PDF OCR deps or update pdf_worker.js to point to your PDF OCR venv.`
+    );
+  }
+  return venvPythonPath;
+}
+
+/**
+ * @typedef {Object} PdfSection
+ * @property {string} title
+ * @property {string[]} paragraphs
+ * @property {[number, number]|null} pages - First and last page (1-based), null when empty
+ * @property {boolean} ocr - Some of the section's text came from OCR
+ */
+
+/**
+ * @typedef {Object} PdfExtraction
+ * @property {PdfSection[]} sections
+ * @property {string} text - Flattened "## title" summaries (what <hash>.txt holds)
+ * @property {boolean} cached - Served from the sections cache
+ */
+
+/**
+ * Long-lived `pdf_summariser_ocr.py --worker` process.
+ *
+ * pdfplumber / pytesseract are imported once and PDFs are answered as
+ * JSON-lines jobs with structured sections, so there is no per-PDF Python
+ * start-up and no .txt / .sections.json round trip. The process is spawned
+ * lazily on the first job and respawned if it dies.
+ */
+export class PdfWorker extends JsonLinesWorker {
+  constructor({ pythonCmd, env = {} } = {}) {
+    super({
+      name: "PDF worker",
+      // Resolved at spawn time, so a missing venv fails the job rather than the import
+      pythonCmd: pythonCmd || resolvePdfPython,
+      // Run from PDF_processing so local imports work correctly
+      args: ["pdf_summariser_ocr.py", "--worker"],
+      cwd: __dirname,
+      env,
+    });
+  }
+
+  /**
+   * Extract a local PDF (through the sections cache).
+   * @param {string} pdfPath
+   * @returns {Promise<PdfExtraction>}
+   */
+  async extract(pdfPath) {
+    const reply = await this.request({ path: path.resolve(pdfPath) });
+    return { sections: reply.sections, text: reply.text, cached: reply.cached };
+  }
+
+  /**
+   * Cached extraction of a PDF known only by its SHA-256.
+   * @param {string} sha256
+   * @returns {Promise<PdfExtraction|null>} null on a cache miss
+   */
+  async cached(sha256) {
+    const reply = await this.request({ sha256 });
+    return reply.sections ? { sections: reply.sections, text: reply.text, cached: true } : null;
+  }
+}
+
+/**
+ * Pool of PdfWorkers, so concurrent pipeline runs extract in parallel
+ * (PDF_POOL_SIZE processes, default 2; each spawned only when needed).
+ *
+ * Extractions queue for a free worker. Cache lookups by SHA-256 skip the
+ * queue: the Python worker answers them while an extraction is running, so
+ * a conditional re-download never waits behind someone else's OCR.
+ */
+export class PdfPool extends WorkerPool {
+  constructor({ size, pythonCmd } = {}) {
+    const poolSize = Math.max(1, size || Number(process.env.PDF_POOL_SIZE) || 2);
+    super(Array.from({ length: poolSize }, () => new PdfWorker({ pythonCmd })));
+  }
+
+  /**
+   * @param {string} pdfPath
+   * @returns {Promise<PdfExtraction>} See PdfWorker.extract
+   */
+  extract(pdfPath) {
+    return this.run((worker) => worker.extract(pdfPath));
+  }
+
+  /**
+   * @param {string} sha256
+   * @returns {Promise<PdfExtraction|null>} See PdfWorker.cached
+   */
+  cached(sha256) {
+    // Prefer a process that is already up over spawning one for a lookup
+    const worker = this.workers.find((w) => w.child) ?? this.workers[0];
+    return worker.cached(sha256);
+  }
+}
+
+let sharedPool = null;
+
+/**
+ * Shared pool reused across PDFs within this Node process.
+ * @returns {PdfPool}
+ */
+export function getPdfPool() {
+  if (!sharedPool) sharedPool = new PdfPool();
+  return sharedPool;
+}
+
+/**
+ * Stop the shared pool (call before exiting CLI scripts / on server shutdown).
+ */
+export async function shutdownPdfPool() {
+  if (!sharedPool) return;
+  const pool = sharedPool;
+  sharedPool = null;
+  await pool.close();
+}
@@ -0,0 +1,159 @@
+"""
+Content-addressed cache of extracted PDF sections.
+
+Sections are stored in a local SQLite file keyed by a SHA-256 of the PDF
+bytes plus the extractor config (extractor_config() in pdf_summariser_ocr.py),
+so the same PDF, whether re-downloaded, reused by another lecture or hit again
+on a retried run, is OCR'd once. Changing a threshold, the OCR DPI, PDF_BACKEND or
+EXTRACTOR_VERSION gives new keys; stale entries age out under the size bound.
+
+pdf_pipeline.js also remembers each URL's ETag / Last-Modified and PDF hash
+(sources.json next to the SQLite file) so an unchanged PDF isn't downloaded
+again either: see processPdf.
+
+Configuration (environment):
+    PDF_CACHE=0                 disable (extraction always runs, nothing is stored)
+    PDF_CACHE_PATH              SQLite file (default: PDF_processing/.cache/sections.sqlite)
+    PDF_CACHE_MAX_MB            LRU bound on stored sections size (default 256)
+
+Usage:
+    python sections_cache.py stats
+    python sections_cache.py clear
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "sections.sqlite")
+
+
+def cache_enabled():
+    return os.getenv("PDF_CACHE", "1") != "0"
+
+
+def file_sha256(path):
+    """SHA-256 hex digest of a file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(pdf_sha256, config):
+    """Cache key for a PDF hash under an extractor config dict."""
+    payload = json.dumps({"pdf": pdf_sha256, "config": config}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SectionsCache:
+    """SQLite-backed LRU of sections JSON, bounded by total stored size."""
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or os.getenv("PDF_CACHE_PATH") or DEFAULT_PATH
+        self.max_bytes = (
+            int(float(os.getenv("PDF_CACHE_MAX_MB", 256)) * 1024 * 1024)
+            if max_bytes is None else max_bytes
+        )
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sections ("
+                " key TEXT PRIMARY KEY,"
+                " pdf_sha256 TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sections_accessed ON sections (accessed_at)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _count(self, name, n=1):
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, n),
+        )
+
+    def get(self, key):
+        """Cached sections for `key`, or None on a miss."""
+        with self._conn:
+            row = self._conn.execute("SELECT value FROM sections WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count("misses")
+                return None
+            self._conn.execute("UPDATE sections SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._count("hits")
+            return json.loads(row[0])
+
+    def put(self, key, pdf_sha256, sections):
+        """Store sections, then evict least-recently-used entries over the size bound."""
+        now = time.time()
+        value = json.dumps(sections, ensure_ascii=False)
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sections (key, pdf_sha256, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, pdf_sha256, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM sections").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM sections ORDER BY accessed_at ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM sections WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+
+        self._count("evictions", evicted)
+
+    def stats(self):
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sections"
+        ).fetchone()
+        counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+        return {
+            "path": self.path,
+            "entries": count,
+            "bytes": total,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+        }
+
+    def clear(self):
+        with self._conn:
+            self._conn.execute("DELETE FROM sections")
+            self._conn.execute("DELETE FROM counters")
+
+    def close(self):
+        self._conn.close()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = SectionsCache()
+
+    if command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+    elif command == "clear":
+        cache.clear()
+        print(f"Cleared {cache.path}")
+    else:
+        print("Usage: python sections_cache.py [stats|clear]", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,316 @@
+"""
+Columnar word table for the PDF summarisers.
+
+Instead of one dict per word, words are parallel NumPy columns (page, top,
+bottom, x0, x1, size) plus ids into interned text and font-name tables.
+Lines and paragraphs are index ranges over the table sorted into reading
+order, so line bucketing, paragraph gaps, the body font median and heading
+detection are array operations. The stages reproduce the dict-based ones
+(pdf_summariser_*.py before the switch) exactly:
+
+  lines:      words bucketed by (page, round(top / y_threshold)), each line
+              sorted by x0 (stable, ties keep extraction order)
+  paragraphs: a new paragraph on a page change or when a line's top is more
+              than para_gap below the previous line's bottom
+  headings:   mean word size of the paragraph > body size + delta
+"""
+import math
+
+import numpy as np
+
+# Float columns, in the order they're stored
+FLOAT_COLUMNS = ("top", "bottom", "x0", "x1", "size")
+
+
+class WordTable:
+    """
+    Words as columns. texts/fonts are the interned strings; text_id/font_id
+    index into them. Build with from_words / concat, reorder with take.
+    """
+
+    def __init__(self, page, top, bottom, x0, x1, size, text_id, font_id, texts, fonts):
+        self.page = page
+        self.top = top
+        self.bottom = bottom
+        self.x0 = x0
+        self.x1 = x1
+        self.size = size
+        self.text_id = text_id
+        self.font_id = font_id
+        self.texts = texts
+        self.fonts = fonts
+
+    @classmethod
+    def empty(cls):
+        return cls.from_words([])
+
+    @classmethod
+    def from_words(cls, words):
+        """Table from word dicts with text, x0, x1, top, bottom, size, fontname, page."""
+        words = list(words)
+        text_index = {}
+        font_index = {}
+        text_id = np.fromiter(
+            (text_index.setdefault(w["text"], len(text_index)) for w in words),
+            dtype=np.int32, count=len(words),
+        )
+        font_id = np.fromiter(
+            (font_index.setdefault(w["fontname"], len(font_index)) for w in words),
+            dtype=np.int32, count=len(words),
+        )
+        columns = {
+            name: np.fromiter((w[name] for w in words), dtype=np.float64, count=len(words))
+            for name in FLOAT_COLUMNS
+        }
+        page = np.fromiter((w["page"] for w in words), dtype=np.int32, count=len(words))
+        return cls(page=page, text_id=text_id, font_id=font_id,
+                   texts=list(text_index), fonts=list(font_index), **columns)
+
+    @classmethod
+    def concat(cls, tables):
+        """Tables appended in order; the string tables are merged and re-interned."""
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return cls.empty()
+        if len(tables) == 1:
+            return tables[0]
+
+        def merge(vocabs, ids):
+            index = {}
+            remapped = []
+            for vocab, id_column in zip(vocabs, ids):
+                mapping = np.fromiter(
+                    (index.setdefault(s, len(index)) for s in vocab),
+                    dtype=np.int32, count=len(vocab),
+                )
+                remapped.append(mapping[id_column])
+            return list(index), np.concatenate(remapped)
+
+        texts, text_id = merge([t.texts for t in tables], [t.text_id for t in tables])
+        fonts, font_id = merge([t.fonts for t in tables], [t.font_id for t in tables])
+        columns = {
+            name: np.concatenate([getattr(t, name) for t in tables])
+            for name in ("page",) + FLOAT_COLUMNS
+        }
+        return cls(text_id=text_id, font_id=font_id, texts=texts, fonts=fonts, **columns)
+
+    def take(self, index):
+        """Rows in the given order (the string tables are shared)."""
+        columns = {name: getattr(self, name)[index] for name in ("page", "text_id", "font_id") + FLOAT_COLUMNS}
+        return WordTable(texts=self.texts, fonts=self.fonts, **columns)
+
+    def words(self):
+        """Rows as word dicts (for debugging and the legacy dict stages)."""
+        texts = np.asarray(self.texts, dtype=object)[self.text_id]
+        fonts = np.asarray(self.fonts, dtype=object)[self.font_id]
+        return [
+            {"text": t, "x0": x0, "x1": x1, "top": top, "bottom": bottom, "size": size, "fontname": f, "page": p}
+            for t, x0, x1, top, bottom, size, f, p in zip(
+                texts.tolist(), self.x0.tolist(), self.x1.tolist(), self.top.tolist(),
+                self.bottom.tolist(), self.size.tolist(), fonts.tolist(), self.page.tolist(),
+            )
+        ]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns (the string tables not included)."""
+        return sum(getattr(self, name).nbytes for name in ("page", "text_id", "font_id") + FLOAT_COLUMNS)
+
+    def __len__(self):
+        return len(self.page)
+
+    def __repr__(self):
+        pages = int(self.page.max()) if len(self) else 0
+        return f"WordTable({len(self)} words, {len(self.texts)} distinct, {pages} pages)"
+
+
+# =========================
+# WORDS → LINES
+# =========================
+def sort_into_lines(table, y_threshold):
+    """
+    The table in reading order and the row where each line starts.
+    Rows are sorted by (page, line bucket, x0); lexsort is stable, so words
+    with equal x0 keep their extraction order.
+    """
+    if not len(table):
+        return table, np.zeros(0, dtype=np.int64)
+
+    bucket = np.round(table.top / y_threshold).astype(np.int64)
+    order = np.lexsort((table.x0, bucket, table.page))
+    ordered = table.take(order)
+    bucket = bucket[order]
+
+    new_line = np.empty(len(ordered), dtype=bool)
+    new_line[0] = True
+    new_line[1:] = (ordered.page[1:] != ordered.page[:-1]) | (bucket[1:] != bucket[:-1])
+    return ordered, np.flatnonzero(new_line)
+
+
+# =========================
+# LINES → PARAGRAPHS
+# =========================
+def paragraph_starts(table, line_starts, para_gap):
+    """Row where each paragraph starts, given a table from sort_into_lines."""
+    if not len(line_starts):
+        return line_starts
+
+    line_top = np.minimum.reduceat(table.top, line_starts)
+    line_bottom = np.maximum.reduceat(table.bottom, line_starts)
+    line_page = table.page[line_starts]
+
+    new_para = np.empty(len(line_starts), dtype=bool)
+    new_para[0] = True
+    new_para[1:] = (line_page[1:] != line_page[:-1]) | (line_top[1:] - line_bottom[:-1] > para_gap)
+    return line_starts[new_para]
+
+
+def paragraph_texts(table, starts):
+    """Each paragraph's words joined with single spaces, stripped."""
+    tokens = np.asarray(table.texts, dtype=object)[table.text_id].tolist()
+    ends = list(starts[1:].tolist()) + [len(table)]
+    return [" ".join(tokens[s:e]).strip() for s, e in zip(starts.tolist(), ends)]
+
+
+def paragraph_pages(table, starts):
+    """Page of each paragraph (paragraphs never cross a page)."""
+    return table.page[starts]
+
+
+def paragraphs_in_font(table, starts, font):
+    """True for paragraphs with at least one word set in `font` (e.g. "OCR")."""
+    if font not in table.fonts or not len(starts):
+        return np.zeros(len(starts), dtype=bool)
+    return np.logical_or.reduceat(table.font_id == table.fonts.index(font), starts)
+
+
+def paragraph_records(table, starts, headings, ocr_font=None):
+    """(text, is_heading, page, ocr) per paragraph, the input of sections_from_paragraphs."""
+    ocr = (
+        paragraphs_in_font(table, starts, ocr_font)
+        if ocr_font is not None else np.zeros(len(starts), dtype=bool)
+    )
+    return zip(
+        paragraph_texts(table, starts),
+        np.asarray(headings).tolist(),
+        paragraph_pages(table, starts).tolist(),
+        ocr.tolist(),
+    )
+
+
+# =========================
+# BODY FONT SIZE / HEADINGS
+# =========================
+def median_font_size(table, exclude_font=None, default=None):
+    """Median word size, ignoring words set in exclude_font; default if none are left."""
+    sizes = table.size
+    if exclude_font is not None and exclude_font in table.fonts:
+        sizes = sizes[table.font_id != table.fonts.index(exclude_font)]
+    if not len(sizes):
+        return default
+    return float(np.median(sizes))
+
+
+def heading_mask(table, starts, body_font_size, delta):
+    """
+    True for paragraphs whose mean word size exceeds body_font_size + delta.
+
+    NumPy sums pairwise and Python's sum() doesn't, so a mean lying on the
+    threshold (e.g. 11.9 vs 10.9 + 1.0) can round either way; those few
+    paragraphs are re-decided with sum() to match the per-word stage.
+    """
+    if not len(starts):
+        return np.zeros(0, dtype=bool)
+    threshold = body_font_size + delta
+    ends = np.append(starts[1:], len(table))
+    mean_size = np.add.reduceat(table.size, starts) / (ends - starts)
+    mask = mean_size > threshold
+
+    near = np.flatnonzero(np.abs(mean_size - threshold) <= 1e-9 * max(1.0, abs(threshold)))
+    for i in near.tolist():
+        sizes = table.size[starts[i]:ends[i]].tolist()
+        mask[i] = sum(sizes) / len(sizes) > threshold
+    return mask
+
+
+# =========================
+# STREAMING (PAGE AT A TIME)
+# =========================
+def page_paragraphs(table, y_threshold, para_gap):
+    """
+    (words in reading order, paragraph starts) of a single page's table.
+    Lines and paragraphs never cross a page, so running this page by page
+    gives the same paragraphs as the whole-document stages.
+    """
+    ordered, line_starts = sort_into_lines(table, y_threshold)
+    return ordered, paragraph_starts(ordered, line_starts, para_gap)
+
+
+def same_font_size(a, b):
+    """
+    Two body sizes equal up to float noise: the same point size often comes
+    out of the PDF's matrices as e.g. 10.496899999999982 and 10.49690000000004.
+    """
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+
+
+class SizeCounts:
+    """Word sizes seen so far as counts per distinct size: an exact running median."""
+
+    def __init__(self, exclude_font=None):
+        self.exclude_font = exclude_font
+        self.counts = {}
+
+    def add(self, table):
+        sizes = table.size
+        if self.exclude_font is not None and self.exclude_font in table.fonts:
+            sizes = sizes[table.font_id != table.fonts.index(self.exclude_font)]
+        values, counts = np.unique(sizes, return_counts=True)
+        for value, count in zip(values.tolist(), counts.tolist()):
+            self.counts[value] = self.counts.get(value, 0) + count
+
+    def median(self, default=None):
+        """Same value as np.median over every size added; default if none."""
+        total = sum(self.counts.values())
+        if not total:
+            return default
+        middle = [(total - 1) // 2, total // 2]
+        found = []
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            while middle and middle[0] < seen:
+                middle.pop(0)
+                found.append(value)
+            if not middle:
+                break
+        return (found[0] + found[1]) / 2
+
+
+def sections_from_paragraphs(paragraphs):
+    """
+    build_sections over (text, is_heading, page, ocr) records, as a generator:
+    each section is yielded as soon as the next heading (or the end) closes it.
+
+    Sections are {"title", "paragraphs", "pages": [first, last] or None,
+    "ocr": any of its text came from OCR}; the heading counts towards both.
+    """
+    def new_section(title, page=None, ocr=False):
+        return {"title": title, "paragraphs": [], "pages": [page, page] if page else None, "ocr": ocr}
+
+    current_section = new_section("Introduction")
+
+    for text, heading, page, ocr in paragraphs:
+        if not text:
+            continue
+
+        if heading:
+            yield current_section
+            current_section = new_section(text, page, ocr)
+        else:
+            current_section["paragraphs"].append(text)
+            pages = current_section["pages"]
+            current_section["pages"] = [pages[0], page] if pages else [page, page]
+            current_section["ocr"] = current_section["ocr"] or ocr
+
+    yield current_section
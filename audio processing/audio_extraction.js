@@ -2,9 +2,71 @@ import ffmpeg from "fluent-ffmpeg";
 import ffmpegPath from "ffmpeg-static";
 import path from "path";
 import fs from "fs";
+import {
+  BYTES_PER_SECOND,
+  WAV_HEADER_SIZE,
+  secondsToBytes,
+  wavHeader
+} from "./wav.js";
 
 ffmpeg.setFfmpegPath(ffmpegPath);
 
+// Shared by extractAudio and streamAudioChunks so both produce identical PCM
+function hlsAudioCommand(m3u8Url) {
+  return ffmpeg()
+    .input(m3u8Url)
+    .inputOptions([
+      "-headers", "Referer:https://my.newtonschool.co/\r\n",
+      "-reconnect", "1",
+      "-reconnect_streamed", "1",
+      "-reconnect_delay_max", "5"
+    ])
+
+    .noVideo()
+    
+    // 🔑 LIMIT TO 1.5 HOURS (5400 seconds)
+    .duration(5400)
+
+    // 🔑 HARD AUDIO NORMALIZATION
+    .audioChannels(1)               // force mono
+    .audioFrequency(16000)           // 16kHz
+    .audioCodec("pcm_s16le")
+    .audioFilters([
+      {
+        filter: "silenceremove",
+        options: {
+          start_periods: 1,
+          start_threshold: "-45dB",
+          start_silence: 1.0
+        }
+      },
+      {
+        filter: "loudnorm",
+        options: {
+          I: -16,
+          TP: -1.5,
+          LRA: 11
+        }
+      },
+      {
+        filter: "afade",
+        options: {
+          t: "in",
+          ss: 0,
+          d: 0.05
+        }
+      }
+    ])
+    
+
+    // 🔑 CRITICAL FOR WHISPER
+    .outputOptions([
+      "-reset_timestamps", "1",
+      "-map_metadata", "-1",
+      "-fflags", "+bitexact"
+    ]);
+}
+
 export default function extractAudio({
   m3u8Url,
   outputDir,
@@ -17,63 +79,158 @@ export default function extractAudio({
 
     const outputPath = path.join(outputDir, `${lectureId}.wav`);
 
-    ffmpeg()
-      .input(m3u8Url)
-      .inputOptions([
-        "-headers", "Referer:https://my.newtonschool.co/\r\n",
-        "-reconnect", "1",
-        "-reconnect_streamed", "1",
-        "-reconnect_delay_max", "5"
-      ])
-
-      .noVideo()
-      
-      // 🔑 LIMIT TO 1.5 HOURS (5400 seconds)
-      .duration(5400)
-
-      // 🔑 HARD AUDIO NORMALIZATION
-      .audioChannels(1)               // force mono
-      .audioFrequency(16000)           // 16kHz
-      .audioCodec("pcm_s16le")
+    hlsAudioCommand(m3u8Url)
       .format("wav")
-      .audioFilters([
-        {
-          filter: "silenceremove",
-          options: {
-            start_periods: 1,
-            start_threshold: "-45dB",
-            start_silence: 1.0
-          }
-        },
-        {
-          filter: "loudnorm",
-          options: {
-            I: -16,
-            TP: -1.5,
-            LRA: 11
-          }
-        },
-        {
-          filter: "afade",
-          options: {
-            t: "in",
-            ss: 0,
-            d: 0.05
-          }
-        }
-      ])
-      
-
-      // 🔑 CRITICAL FOR WHISPER
-      .outputOptions([
-        "-reset_timestamps", "1",
-        "-map_metadata", "-1",
-        "-fflags", "+bitexact"
-      ])
-
       .on("start", cmd => console.log(cmd))
       .on("end", () => resolve(outputPath))
       .on("error", reject)
       .save(outputPath);
   });
 }
+
+/**
+ * Streaming variant of extractAudio: decodes the HLS stream to raw PCM and
+ * hands fixed-size windows to `onChunk` as soon as they are complete, so
+ * chunk 0 can be transcribed while the rest of the m3u8 is still downloading.
+ *
+ * Windows match chunkAudio: chunk i covers [i * chunkSize, i * chunkSize + chunkSize + overlap).
+ * The full lecture WAV is still written to <outputDir>/<lectureId>.wav.
+ *
+ * @param {Object} params
+ * @param {string} params.m3u8Url
+ * @param {string} params.outputDir - Directory for the full lecture WAV
+ * @param {string} params.chunksDir - Directory for chunk_N.wav files
+ * @param {string} params.lectureId
+ * @param {number} [params.chunkSize=600] - seconds
+ * @param {number} [params.overlap=5] - seconds
+ * @param {(chunk: {index: number, start: number, end: number, windowEnd: number, path: string}) => void} params.onChunk
+ * @returns {Promise<{audioPath: string, duration: number, chunks: Array}>}
+ */
+export function streamAudioChunks({
+  m3u8Url,
+  outputDir,
+  chunksDir,
+  lectureId,
+  chunkSize = 600,
+  overlap = 5,
+  onChunk
+}) {
+  return new Promise((resolve, reject) => {
+    for (const dir of [outputDir, chunksDir]) {
+      if (!fs.existsSync(dir)) {
+        fs.mkdirSync(dir, { recursive: true });
+      }
+    }
+
+    const audioPath = path.join(outputDir, `${lectureId}.wav`);
+    const chunks = [];
+
+    // Full lecture WAV: placeholder header now, real sizes once the stream ends
+    const wavOut = fs.createWriteStream(audioPath);
+    wavOut.write(wavHeader(0));
+
+    // Bytes received so far, and the buffered tail starting at bufferStart
+    let received = 0;
+    let bufferStart = 0;
+    let buffered = [];
+    let index = 0;
+    let writes = Promise.resolve();
+    let failed = false;
+    let command = null;
+    let pcm = null;
+
+    // Stop everything: without the kill, ffmpeg would keep pulling the HLS
+    // stream (up to the 1.5 h cap) into a pipe nobody reads
+    const fail = (err) => {
+      if (failed) return;
+      failed = true;
+      command?.kill("SIGKILL");
+      pcm?.destroy();
+      wavOut.destroy();
+      reject(err);
+    };
+
+    // Write chunk `index` covering [start, end) seconds from the buffered PCM
+    const emitChunk = (start, end, windowBytes) => {
+      const from = secondsToBytes(start) - bufferStart;
+      const data = Buffer.concat(buffered).subarray(from, from + windowBytes);
+      const chunk = {
+        index,
+        start,
+        end,
+        windowEnd: start + data.length / BYTES_PER_SECOND,
+        path: path.join(chunksDir, `chunk_${index}.wav`)
+      };
+      chunks.push(chunk);
+      index++;
+
+      // Each link is caught: a failed write or onChunk rejects the whole stream once, and later links skip
+      writes = writes
+        .then(() => failed || fs.promises.writeFile(chunk.path, Buffer.concat([wavHeader(data.length), data])))
+        .then(() => failed || onChunk?.(chunk))
+        .catch(fail);
+
+      // Drop what no later window needs
+      const keepFrom = secondsToBytes(index * chunkSize);
+      const all = Buffer.concat(buffered);
+      buffered = [all.subarray(Math.max(0, keepFrom - bufferStart))];
+      bufferStart = Math.max(bufferStart, keepFrom);
+    };
+
+    // Finish only once ffmpeg has exited cleanly AND all PCM has been consumed
+    let ffmpegDone;
+    const ffmpegExited = new Promise((res) => { ffmpegDone = res; });
+
+    command = hlsAudioCommand(m3u8Url)
+      .format("s16le")
+      .on("start", cmd => console.log(cmd))
+      .on("end", () => ffmpegDone())
+      .on("error", fail);
+    pcm = command.pipe();
+
+    pcm.on("data", (data) => {
+      if (failed) return;
+      // Disk slower than the download: hold the PCM stream until the WAV catches up
+      if (!wavOut.write(data)) {
+        pcm.pause();
+        wavOut.once("drain", () => {
+          if (!failed) pcm.resume();
+        });
+      }
+      buffered.push(data);
+      received += data.length;
+
+      // Emit every window that is now complete
+      while (received >= secondsToBytes(index * chunkSize + chunkSize + overlap)) {
+        const start = index * chunkSize;
+        emitChunk(start, start + chunkSize, secondsToBytes(chunkSize + overlap));
+      }
+    });
+
+    const pcmEnded = new Promise((res) => pcm.on("end", res));
+    pcm.on("error", fail);
+    wavOut.on("error", fail);
+
+    Promise.all([pcmEnded, ffmpegExited]).then(async () => {
+      if (failed) return;
+      const duration = received / BYTES_PER_SECOND;
+
+      // Remaining (shorter) windows at the end of the lecture
+      while (index * chunkSize < duration) {
+        const start = index * chunkSize;
+        emitChunk(start, Math.min(start + chunkSize, duration), received - secondsToBytes(start));
+      }
+
+      try {
+        await new Promise((res) => wavOut.end(res));
+        const fd = await fs.promises.open(audioPath, "r+");
+        await fd.write(wavHeader(received), 0, WAV_HEADER_SIZE, 0);
+        await fd.close();
+        await writes;
+        if (!failed) resolve({ audioPath, duration, chunks });
+      } catch (err) {
+        fail(err);
+      }
+    });
+  });
+}
@@ -0,0 +1,185 @@
+"""
+Equivalence check and micro-benchmark for normalization_engine.
+
+1. Runs the reference post_processing stages and NormalizationEngine over a
+   seeded corpus of synthetic Hinglish transcripts (plus hand-written regex
+   corner cases) and fails on the first output that differs. The incremental
+   UniqueRatio must agree with is_low_entropy, a bounded n-gram memory
+   larger than the transcript must not change the output, and tokens_from
+   over the transcript cut into pieces must match tokens over the whole.
+2. Times both on a long transcript and prints throughput in MB/s.
+
+Usage:
+    python bench_normalization.py [--cases 3000] [--words 200000] [--seed 0]
+"""
+import argparse
+import random
+import sys
+import time
+
+from normalization_engine import NormalizationEngine, UniqueRatio, collapse_ngram_runs
+from post_processing import (
+    FILLERS,
+    collapse_ngram_repetition,
+    collapse_token_repetition,
+    filter_by_script,
+    is_low_entropy,
+    normalize_text,
+    remove_fillers,
+    remove_numeric_spam,
+)
+
+VOCAB = (
+    "matlab yeh jo hai na array ka index zero se start hota toh basically time "
+    "complexity o of n log n hoga loop chalega i equals to minus plus function "
+    "f x square root derivative matrix select from table where join react "
+    "component state hook api request response node express"
+).split()
+
+DEVANAGARI = ["यह", "क्या", "है", "देखो", "समझो", "नमस्ते", "१२", "३"]
+
+NOISE = [
+    "(okay", "okay,", "okay.", "okay.okay", "x.okay", "okayx", "right)", "(right",
+    "theek", "hai", "hai,", "yes", "or", "no", "no.", "(yes",
+    "7", "7.5", "(7", "7,", "77", "a7", "1.1", "x=7", "2^2", "(a+b)", "x^2", "=",
+    "Okay", "OKAY", "don't", "it's", "snake_case", "naïve", "café", "…", "—", "😀",
+    " ", "\t", "\n", "1²",
+]
+
+CASES = [
+    "okay okay okay",
+    "(okay okay)",
+    "(okay okay x",
+    "okay okay.okay okay",
+    "okay okay, then",
+    "okay okay okayx",
+    "right okay okay right",
+    "okay right right okay",
+    "theek hai theek hai theek hai.",
+    "theek hai theek hai theek x",
+    "yes or no yes or no no",
+    "1 1 1.5",
+    "1 1 1.2 2 2",
+    "12 12 123",
+    "5 5 5 5x",
+    "x.7 7 7 7,",
+    "a b c a b c a b c d",
+    "देखो देखो समझो समझो १२ १२ १२",
+    "",
+    "   ",
+]
+
+
+def reference(text: str) -> str:
+    text = normalize_text(text)
+    text = filter_by_script(text)
+    text = remove_fillers(text)
+    text = collapse_token_repetition(text)
+    text = collapse_ngram_repetition(text)
+    return remove_numeric_spam(text)
+
+
+def synthetic_transcript(rng: random.Random, words: int) -> str:
+    """Hinglish-like text with bursts of fillers, stutters, repeated phrases and number spam."""
+    out = []
+    while len(out) < words:
+        roll = rng.random()
+        if roll < 0.55:
+            out.append(rng.choice(VOCAB))
+        elif roll < 0.70:
+            out.extend([rng.choice(FILLERS)] * rng.randint(1, 4))
+        elif roll < 0.78:
+            out.extend([rng.choice(VOCAB)] * rng.randint(2, 4))
+        elif roll < 0.86 and len(out) >= 3:
+            start = rng.randrange(len(out) - 2)
+            out.extend(out[start:start + 3])
+        elif roll < 0.90:
+            out.extend([str(rng.randint(0, 12))] * rng.randint(2, 5))
+        elif roll < 0.94:
+            out.append(rng.choice(DEVANAGARI))
+        else:
+            out.append(rng.choice(NOISE))
+    return " ".join(out[:words])
+
+
+def check_equivalence(engine: NormalizationEngine, cases: int, seed: int) -> int:
+    rng = random.Random(seed)
+    corpus = list(CASES)
+    corpus += [synthetic_transcript(rng, rng.randint(1, 60)) for _ in range(cases)]
+
+    for text in corpus:
+        expected = reference(text)
+        uniqueness = UniqueRatio()
+        actual = " ".join(uniqueness.observe(engine.tokens(text)))
+        if actual != expected:
+            print("MISMATCH", file=sys.stderr)
+            print(f"  input:     {text!r}", file=sys.stderr)
+            print(f"  reference: {expected!r}", file=sys.stderr)
+            print(f"  engine:    {actual!r}", file=sys.stderr)
+            return 1
+        if uniqueness.is_low() != is_low_entropy(expected):
+            print(f"is_low_entropy MISMATCH for {text!r}", file=sys.stderr)
+            return 1
+
+        # Streamed in pieces (as live segments arrive) it must come out the same
+        words = text.split(" ")
+        cuts = sorted(rng.sample(range(1, len(words)), min(len(words) - 1, 3))) if len(words) > 1 else []
+        pieces = [" ".join(words[a:b]) for a, b in zip([0] + cuts, cuts + [len(words)])]
+        streamed = " ".join(engine.tokens_from(iter(pieces)))
+        if streamed != expected:
+            print(f"tokens_from MISMATCH for {pieces!r}: {streamed!r}", file=sys.stderr)
+            return 1
+
+        # A bound larger than the transcript must not change anything
+        words = text.split()
+        exact = collapse_ngram_repetition(" ".join(words))
+        for bound in ({"window": len(words) + 1}, {"max_grams": len(words) + 1}):
+            if " ".join(collapse_ngram_runs(words, 3, **bound)) != exact:
+                print(f"collapse_ngram_runs({bound}) MISMATCH for {text!r}", file=sys.stderr)
+                return 1
+
+    print(f"equivalence: {len(corpus)} transcripts identical")
+    return 0
+
+
+def throughput(fn, text: str, repeat: int = 3) -> float:
+    size_mb = len(text.encode("utf-8")) / 1e6
+    best = min(_timed(fn, text) for _ in range(repeat))
+    return size_mb / best
+
+
+def _timed(fn, text):
+    t0 = time.perf_counter()
+    fn(text)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=3000, help="random transcripts for the equivalence check")
+    parser.add_argument("--words", type=int, default=200000, help="words in the benchmark transcript")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = NormalizationEngine(FILLERS)
+    if check_equivalence(engine, args.cases, args.seed):
+        sys.exit(1)
+
+    text = synthetic_transcript(random.Random(args.seed), args.words)
+    if engine.normalize(text) != reference(text):
+        print("MISMATCH on the benchmark transcript", file=sys.stderr)
+        sys.exit(1)
+
+    size_mb = len(text.encode("utf-8")) / 1e6
+    ref_rate = throughput(reference, text)
+    engine_rate = throughput(engine.normalize, text)
+    print(f"transcript: {args.words} words, {size_mb:.2f} MB")
+    print(f"reference:  {ref_rate:6.2f} MB/s")
+    print(f"engine:     {engine_rate:6.2f} MB/s  ({engine_rate / ref_rate:.1f}x)")
+
+    bounded = NormalizationEngine(FILLERS, ngram_window=4096)
+    print(f"engine, 4096-token n-gram window: {throughput(bounded.normalize, text):6.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import fs from "fs";
+import { SAMPLE_RATE, readWavInfo, secondsToBytes } from "./wav.js";
+
+// Boundary planning: one cheap energy pass over the lecture WAV, then cuts are
+// placed in real silences near the target chunk length. Because nothing is cut
+// mid-word, chunks need no overlap and no audio is decoded twice.
+
+const FRAME_MS = 30;
+const FRAME_SAMPLES = (SAMPLE_RATE * FRAME_MS) / 1000;
+const SILENCE_MARGIN_DB = 10;   // frames this close to the noise floor count as silence
+const MIN_CHUNK_SECONDS = 120;  // never shrink chunks below this to balance the pool
+
+/**
+ * Per-frame energy (dBFS) of a 16 kHz mono s16le WAV, computed in one streaming pass.
+ * @param {string} inputWav
+ * @param {number} duration - seconds to scan
+ * @returns {Promise<Float32Array>}
+ */
+export async function frameEnergies(inputWav, duration) {
+  const wav = await readWavInfo(inputWav);
+  const byteCount = Math.min(wav.dataSize, secondsToBytes(duration));
+  const energies = new Float32Array(Math.ceil(byteCount / 2 / FRAME_SAMPLES));
+
+  let frame = 0;
+  let sumSquares = 0;
+  let inFrame = 0;
+  let carry = null;
+
+  if (byteCount === 0) return energies;
+
+  const stream = fs.createReadStream(inputWav, {
+    start: wav.dataOffset,
+    end: wav.dataOffset + byteCount - 1
+  });
+
+  for await (let buf of stream) {
+    if (carry) {
+      buf = Buffer.concat([carry, buf]);
+      carry = null;
+    }
+    if (buf.length % 2) {
+      carry = buf.subarray(buf.length - 1);
+      buf = buf.subarray(0, buf.length - 1);
+    }
+    // Int16Array needs an aligned offset; copy only when the pool slice isn't
+    const aligned = buf.byteOffset % 2 === 0 ? buf : Buffer.from(buf);
+    const samples = new Int16Array(aligned.buffer, aligned.byteOffset, aligned.length / 2);
+
+    for (let i = 0; i < samples.length; i++) {
+      const s = samples[i] / 32768;
+      sumSquares += s * s;
+      if (++inFrame === FRAME_SAMPLES) {
+        energies[frame++] = 10 * Math.log10(sumSquares / FRAME_SAMPLES + 1e-10);
+        sumSquares = 0;
+        inFrame = 0;
+      }
+    }
+  }
+
+  if (inFrame > 0) {
+    energies[frame++] = 10 * Math.log10(sumSquares / inFrame + 1e-10);
+  }
+  return energies.subarray(0, frame);
+}
+
+/**
+ * Silence threshold: a margin above the noise floor (1st percentile of frame
+ * energy), but always clearly below typical (median) speech energy.
+ * @param {Float32Array} energies
+ * @returns {number} dBFS
+ */
+function silenceThreshold(energies) {
+  const sorted = Float32Array.from(energies).sort();
+  const floor = sorted[Math.floor(sorted.length * 0.01)] ?? -100;
+  const median = sorted[Math.floor(sorted.length * 0.5)] ?? 0;
+  return Math.min(floor + SILENCE_MARGIN_DB, median - SILENCE_MARGIN_DB);
+}
+
+/**
+ * Best cut (seconds) near `target`: the middle of the silence run that best
+ * trades length against distance from the target, or the quietest frame in
+ * the window if there is no silence at all.
+ */
+function findCut(energies, threshold, target, searchWindow, minCut, maxCut) {
+  const frameSec = FRAME_MS / 1000;
+  const lo = Math.max(0, Math.floor(Math.max(minCut, target - searchWindow) / frameSec));
+  const hi = Math.min(energies.length, Math.ceil(Math.min(maxCut, target + searchWindow) / frameSec));
+
+  let best = null;
+  let bestScore = -Infinity;
+  let quietest = lo;
+
+  let runStart = -1;
+  for (let f = lo; f <= hi; f++) {
+    if (f < hi && energies[f] < energies[quietest]) quietest = f;
+
+    const silent = f < hi && energies[f] < threshold;
+    if (silent && runStart < 0) runStart = f;
+
+    if (!silent && runStart >= 0) {
+      const runSec = (f - runStart) * frameSec;
+      const mid = ((runStart + f) / 2) * frameSec;
+      // Longer pauses are safer cuts; being far from the target costs balance
+      const score = Math.min(runSec, 2) - Math.abs(mid - target) / searchWindow;
+      if (score > bestScore) {
+        bestScore = score;
+        best = mid;
+      }
+      runStart = -1;
+    }
+  }
+
+  return best ?? (quietest + 0.5) * frameSec;
+}
+
+/**
+ * Plan chunk windows with cuts in silences and zero overlap.
+ *
+ * Chunk count is derived from the target size (rounded up to a multiple of
+ * `workers` when that keeps chunks >= MIN_CHUNK_SECONDS), and each cut aims at
+ * an equal share of the remaining audio, so a parallel pool finishes evenly.
+ *
+ * @param {Object} params
+ * @param {string} params.inputWav
+ * @param {number} params.duration - seconds
+ * @param {number} [params.targetSize=600] - seconds
+ * @param {number} [params.searchWindow=60] - seconds either side of each ideal cut
+ * @param {number} [params.workers=1] - parallel workers to balance for
+ * @returns {Promise<Array<{index: number, start: number, end: number, windowEnd: number}>>}
+ *   Same shape as planChunks (windowEnd === end: no overlap)
+ */
+export async function planAdaptiveChunks({
+  inputWav,
+  duration,
+  targetSize = 600,
+  searchWindow = 60,
+  workers = 1
+}) {
+  let count = Math.max(1, Math.ceil(duration / targetSize));
+  const balanced = Math.ceil(count / workers) * workers;
+  if (duration / balanced >= MIN_CHUNK_SECONDS) count = balanced;
+
+  const energies = count > 1 ? await frameEnergies(inputWav, duration) : null;
+  const threshold = energies ? silenceThreshold(energies) : 0;
+
+  const windows = [];
+  let start = 0;
+
+  for (let index = 0; index < count; index++) {
+    let end = duration;
+    if (index < count - 1) {
+      const remaining = count - index;
+      const target = start + (duration - start) / remaining;
+      // Keep every remaining chunk reasonably sized whatever the silences say
+      const minCut = start + (duration - start) / remaining / 2;
+      const maxCut = duration - ((duration - start) / remaining / 2) * (remaining - 1);
+      const window = Math.min(searchWindow, (duration - start) / remaining / 2);
+      end = findCut(energies, threshold, target, window, minCut, maxCut);
+    }
+
+    end = Math.round(end * 1000) / 1000;
+    windows.push({ index, start, end, windowEnd: end });
+    start = end;
+  }
+
+  return windows;
+}
@@ -1,10 +1,50 @@
-import ffmpeg from "fluent-ffmpeg";
-import ffmpegPath from "ffmpeg-static";
 import fs from "fs";
 import path from "path";
+import { pipeline } from "stream/promises";
+import {
+  SAMPLE_RATE,
+  CHANNELS,
+  BYTES_PER_SAMPLE,
+  readWavInfo,
+  secondsToBytes,
+  wavHeader
+} from "./wav.js";
 
-ffmpeg.setFfmpegPath(ffmpegPath);
 // chucnking and processig chunks
+//
+// The lecture WAV is already normalized to 16 kHz mono pcm_s16le by
+// extractAudio, so chunks are plain byte ranges of its PCM payload: no ffmpeg,
+// no seeking, no re-encoding.
+
+/**
+ * Plan chunk windows without touching any audio.
+ * Chunk i owns [start, end) and is decoded over [start, windowEnd), where
+ * windowEnd adds the overlap (capped at the duration).
+ * @returns {Array<{index: number, start: number, end: number, windowEnd: number}>}
+ */
+export function planChunks({
+  duration,
+  chunkSize = 600,
+  overlap = 5
+}) {
+  const windows = [];
+  let start = 0;
+  let index = 0;
+
+  while (start < duration) {
+    windows.push({
+      index,
+      start,
+      end: Math.min(start + chunkSize, duration),
+      windowEnd: Math.min(start + chunkSize + overlap, duration)
+    });
+
+    start += chunkSize;
+    index++;
+  }
+
+  return windows;
+}
 
 export async function chunkAudio({
   inputWav,
@@ -17,83 +57,50 @@ export async function chunkAudio({
     fs.mkdirSync(outputDir, { recursive: true });
   }
 
-  const chunks = [];
-  let start = 0;
-  let index = 0;
-
-  while (start < duration) {
-    const out = path.join(outputDir, `chunk_${index}.wav`);
-
-    const effectiveDuration = Math.min(
-      chunkSize + overlap,
-      duration - start
+  const wav = await readWavInfo(inputWav);
+  if (
+    wav.format !== 1 ||
+    wav.sampleRate !== SAMPLE_RATE ||
+    wav.channels !== CHANNELS ||
+    wav.bitsPerSample !== BYTES_PER_SAMPLE * 8
+  ) {
+    throw new Error(
+      `chunkAudio expects 16 kHz mono pcm_s16le input, got ` +
+      `format=${wav.format} rate=${wav.sampleRate} channels=${wav.channels} bits=${wav.bitsPerSample}`
     );
+  }
 
-    await new Promise((res, rej) => {
-      ffmpeg(inputWav)
-        .seekInput(start)
-        .duration(effectiveDuration)
-
-        // 🔑 HARD SANITIZATION
-        .audioChannels(1)                 // mono
-        .audioFrequency(16000)             // 16kHz
-        .audioCodec("pcm_s16le")           // Whisper-safe
-        .format("wav")
+  // Never read past the PCM payload, nor past the requested duration
+  const lastByte = Math.min(wav.dataSize, secondsToBytes(duration));
 
-        
-      //   .audioFilters([
-      //     {
-      //       filter: "silenceremove",
-      //       options: {
-      //         start_periods: 1,
-      //         start_threshold: "-45dB",
-      //         start_silence: 1.0,
-      //         stop_periods: 1,
-      //         stop_threshold: "-45dB",
-      //         stop_silence: 1.0
-      //       }
-      //     },
-      //     // 2️⃣ loudness normalization
-      //     {
-      //       filter: "loudnorm",
-      //       options: {
-      //         I: -16,
-      //         TP: -1.5,
-      //         LRA: 11
-      //       }
-      //     },
-      //     {
-      //       filter: "afade",
-      //       options: {
-      //         t: "in",
-      //         ss: 0,
-      //         d: 0.05
-      //       }
-      //     }
-    
-      // ])
-      // 🔑 TIMESTAMP RESET (CRITICAL)
-      .outputOptions([
-        "-fflags", "+bitexact",
-        "-reset_timestamps", "1",
-        "-map_metadata", "-1"
-      ])
+  const chunks = planChunks({ duration, chunkSize, overlap }).map((w) => ({
+    index: w.index,
+    start: w.start,
+    end: w.end,
+    path: path.join(outputDir, `chunk_${w.index}.wav`),
+    from: secondsToBytes(w.start),
+    to: Math.min(secondsToBytes(w.windowEnd), lastByte)
+  }));
 
-        .on("end", res)
-        .on("error", rej)
-        .save(out);
-    });
+  // All chunks are independent byte copies, so write them concurrently
+  await Promise.all(chunks.map(async ({ path: out, from, to }) => {
+    const size = Math.max(0, to - from);
+    const writer = fs.createWriteStream(out);
+    writer.write(wavHeader(size));
 
-    chunks.push({
-      index,
-      start,
-      end: Math.min(start + chunkSize, duration),
-      path: out
-    });
+    if (size === 0) {
+      await new Promise((res, rej) => writer.end((err) => (err ? rej(err) : res())));
+      return;
+    }
 
-    start += chunkSize;
-    index++;
-  }
+    await pipeline(
+      fs.createReadStream(inputWav, {
+        start: wav.dataOffset + from,
+        end: wav.dataOffset + to - 1   // inclusive
+      }),
+      writer
+    );
+  }));
 
-  return chunks;
+  return chunks.map(({ index, start, end, path }) => ({ index, start, end, path }));
 }
@@ -0,0 +1,124 @@
+"""
+Keyword-based subject classifier (Aho-Corasick over word tokens).
+
+Every keyword phrase of every subject goes into one automaton, built once.
+Classifying a transcript is then a single left-to-right pass over its tokens,
+whatever the number of subjects or keywords.
+
+The automaton runs on word tokens (runs of word characters, and each
+punctuation mark on its own) rather than on characters. Keywords therefore
+only match whole words: "ts" no longer matches inside "students". Dotted or
+hyphenated names ("next.js", "full-stack") match the same punctuation in the
+text.
+"""
+import math
+import re
+from collections import deque
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN.findall(text.lower())
+
+
+class KeywordClassifier:
+    """
+    Multi-subject keyword scorer.
+
+    Args:
+        keywords: {subject: [keyword, ...]} or {subject: {keyword: weight}}.
+            Subject order breaks ties (the first subject wins, as with max()).
+
+    A subject's score is the sum, over its keywords found in the text, of
+    weight * (1 + ln(term frequency)). Each extra mention still counts, but
+    one keyword repeated all lecture can't outweigh broad coverage.
+    """
+
+    def __init__(self, keywords: dict):
+        self.subjects = list(keywords)
+        self.keywords = []      # (subject, keyword, weight) per output id
+        self._goto = [{}]       # state -> {token: next state}
+        self._fail = [0]
+        self._out = [()]        # state -> keyword ids ending here (incl. via fail links)
+
+        for subject, entries in keywords.items():
+            weights = entries if isinstance(entries, dict) else dict.fromkeys(entries, 1.0)
+            for kw, weight in weights.items():
+                tokens = tokenize(kw)
+                if not tokens:
+                    raise ValueError(f"Empty keyword for subject {subject!r}")
+                state = 0
+                for tok in tokens:
+                    nxt = self._goto[state].get(tok)
+                    if nxt is None:
+                        nxt = len(self._goto)
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._out.append(())
+                        self._goto[state][tok] = nxt
+                    state = nxt
+                self._out[state] += (len(self.keywords),)
+                self.keywords.append((subject, kw, float(weight)))
+
+        self._build_fail_links()
+
+    def _build_fail_links(self):
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = deque(goto[0].values())   # depth-1 states fail to the root
+        while queue:
+            state = queue.popleft()
+            for tok, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and tok not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(tok, 0)
+                out[nxt] += out[fail[nxt]]
+
+    def term_frequencies(self, text: str) -> list:
+        """Occurrences of each keyword (indexed like self.keywords), in one pass."""
+        goto, fail, out = self._goto, self._fail, self._out
+        counts = [0] * len(self.keywords)
+        state = 0
+
+        for tok in tokenize(text):
+            while state and tok not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(tok, 0)
+            for kw_id in out[state]:
+                counts[kw_id] += 1
+
+        return counts
+
+    def classify(self, text: str) -> dict:
+        """
+        Returns:
+            dict: {
+                "subject": best-scoring subject,
+                "scores": {subject: weighted score},
+                "term_frequencies": {subject: {keyword: count}} (matched keywords only),
+                "margin": (best - runner-up) / best, 0.0 when nothing matched
+            }
+        """
+        scores = dict.fromkeys(self.subjects, 0.0)
+        frequencies = {subject: {} for subject in self.subjects}
+
+        for kw_id, count in enumerate(self.term_frequencies(text)):
+            if count:
+                subject, kw, weight = self.keywords[kw_id]
+                scores[subject] += weight * (1.0 + math.log(count))
+                frequencies[subject][kw] = count
+
+        ranked = sorted(scores.values(), reverse=True)
+        best = max(scores, key=scores.get)
+        top = ranked[0]
+        runner_up = ranked[1] if len(ranked) > 1 else 0.0
+        margin = (top - runner_up) / top if top > 0 else 0.0
+
+        return {
+            "subject": best,
+            "scores": scores,
+            "term_frequencies": frequencies,
+            "margin": margin,
+        }
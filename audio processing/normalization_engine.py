@@ -0,0 +1,479 @@
+"""
+Single-pass transcript normalization for AllMerged.
+
+The text is tokenized once (lowercase, strip disallowed characters, keep only
+Devanagari/Latin/digit/math tokens) and every later stage is a generator over
+that one token stream:
+
+    fillers -> token repetition -> n-gram repetition -> numeric spam
+
+Each stage is the token-level equivalent of the matching function in
+post_processing.py, including the regex corner cases (a removed filler or
+number run glues its neighbours together exactly as re.sub would), so
+NormalizationEngine(FILLERS).normalize(text) is byte-for-byte equal to:
+
+    remove_numeric_spam(collapse_ngram_repetition(collapse_token_repetition(
+        remove_fillers(filter_by_script(normalize_text(text))))))
+
+The stages take any token iterator and hold only a few tokens of lookahead,
+except the n-gram memory: global by default (exact), or bounded with a
+sliding window / LRU for full-lecture transcripts and live streams.
+NormalizationEngine.tokens_from takes the text itself as a stream of pieces
+(e.g. segments as they are transcribed), so with a bounded n-gram memory a
+live stream is cleaned in constant memory. UniqueRatio is the incremental
+is_low_entropy.
+
+Equivalence and throughput: python bench_normalization.py
+"""
+import re
+from collections import Counter, OrderedDict, deque
+from functools import lru_cache
+from itertools import islice
+
+# normalize_text: drop everything except word chars, whitespace and . , = + - * / ^ ( )
+_DISALLOWED = re.compile(r"[^\w\s\.\,\=\+\-\*/\^\(\)]+")
+
+# filter_by_script: whole whitespace-delimited tokens made only of these characters
+_SCRIPT_TOKEN = re.compile(
+    r"(?<!\S)[ऀ-ॿa-zA-Z0-9\+\-\*/=\^\(\)\[\]\{\}<>,\.:]+(?!\S)"
+)
+
+
+def _is_word(ch: str) -> bool:
+    """Same test as the regex \\w / \\b on str patterns."""
+    return ch.isalnum() or ch == "_"
+
+
+def tokenize(text: str) -> list:
+    """normalize_text + filter_by_script, returned as tokens instead of a joined string."""
+    return _SCRIPT_TOKEN.findall(_DISALLOWED.sub("", text.lower()))
+
+
+def iter_tokens(pieces):
+    """
+    Lazy tokenize over text pieces, one piece in memory at a time. Pieces are
+    whitespace-separated, so the tokens are those of " ".join(pieces).
+    """
+    for piece in pieces:
+        for match in _SCRIPT_TOKEN.finditer(_DISALLOWED.sub("", piece.lower())):
+            yield match.group()
+
+
+class _Lookahead:
+    """Token iterator with a push-back buffer, for stages that need to peek ahead."""
+
+    __slots__ = ("src", "buf")
+
+    def __init__(self, tokens):
+        self.src = iter(tokens)
+        self.buf = deque()
+
+    def next(self):
+        if self.buf:
+            return self.buf.popleft()
+        return next(self.src, None)
+
+    def fill(self, n: int) -> bool:
+        """Make sure at least n tokens are buffered; False if the stream ends first."""
+        buf = self.buf
+        while len(buf) < n:
+            tok = next(self.src, None)
+            if tok is None:
+                return False
+            buf.append(tok)
+        return True
+
+    def drop(self, n: int):
+        for _ in range(n):
+            self.buf.popleft()
+
+
+def _run_prefix(tok: str, word: str):
+    """
+    If `tok` can open a repeated run of `word` (it ends with `word` on a word
+    boundary), the part of `tok` before it; otherwise None.
+    """
+    if not tok.endswith(word):
+        return None
+    cut = len(tok) - len(word)
+    if cut and _is_word(tok[cut - 1]):
+        return None
+    return tok[:cut]
+
+
+def _starts_with_word(tok: str, word: str) -> bool:
+    """`tok` is `word` followed by a non-word character (e.g. "okay," for "okay")."""
+    return len(tok) > len(word) and tok.startswith(word) and not _is_word(tok[len(word)])
+
+
+def remove_filler_runs(tokens, filler: str):
+    """
+    Token-level re.sub(rf"(\\b{filler}\\b\\s*){{2,}}", "", text).
+
+    Two or more back-to-back occurrences are removed. The first one may be the
+    tail of a token ("(okay") and the last one the head of a token ("okay,"):
+    whatever is left of those tokens is glued together, as with re.sub.
+    """
+    words = filler.split(" ")
+    k = len(words)
+    first, last = words[0], words[-1]
+    stream = _Lookahead(tokens)
+    carry = ""   # text left over from a removed run, glued onto the next token
+
+    def occurrence(pos):
+        """'full' / 'partial' (last word is a token head) / None for an occurrence at buf[pos]."""
+        if not stream.fill(pos + k):
+            return None
+        buf = stream.buf
+        for i in range(k - 1):
+            if buf[pos + i] != words[i]:
+                return None
+        tail = buf[pos + k - 1]
+        if tail == last:
+            return "full"
+        if _starts_with_word(tail, last):
+            return "partial"
+        return None
+
+    buf = stream.buf
+    src = stream.src
+
+    while True:
+        if buf:
+            tok = buf.popleft()
+        else:
+            # Fast path: pass tokens straight through until one could open a run
+            for tok in src:
+                if first in tok:
+                    break
+                if carry:
+                    tok = carry + tok
+                    carry = ""
+                yield tok
+            else:
+                break
+
+        pre = _run_prefix(tok, first)
+        if pre is not None and k > 1:
+            # The rest of the first occurrence must be whole tokens
+            if not stream.fill(k - 1) or any(stream.buf[i] != words[i + 1] for i in range(k - 1)):
+                pre = None
+        kind = occurrence(k - 1) if pre is not None else None
+
+        if kind is None:
+            yield carry + tok
+            carry = ""
+            continue
+
+        carry += pre
+        consumed = k - 1   # buffered tokens of the first occurrence
+        while kind == "full":
+            stream.drop(consumed + k)
+            consumed = 0
+            kind = occurrence(0)
+
+        if kind == "partial":
+            stream.drop(consumed + k - 1)
+            rest = stream.buf.popleft()[len(last):]
+            # The remainder is scanned like any other token, still glued to carry
+            stream.buf.appendleft(rest)
+
+    if carry:
+        yield carry
+
+
+def collapse_token_runs(tokens, max_repeat: int = 2):
+    """Token-level collapse_token_repetition: at most max_repeat - 1 extra copies of a token in a row."""
+    prev = None
+    count = 0
+    for tok in tokens:
+        if tok == prev:
+            count += 1
+            if count < max_repeat:
+                yield tok
+        else:
+            prev = tok
+            count = 1
+            yield tok
+
+
+class _RecentGrams:
+    """The last `size` n-grams remembered (a sliding window over the stream)."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._order = deque()
+        self._grams = set()
+
+    def __contains__(self, gram) -> bool:
+        return gram in self._grams
+
+    def add(self, gram):
+        self._grams.add(gram)
+        self._order.append(gram)
+        if len(self._order) > self.size:
+            self._grams.discard(self._order.popleft())
+
+
+class _LruGrams:
+    """At most `size` distinct n-grams; a repeat refreshes it, the least recently seen is dropped."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._grams = OrderedDict()
+
+    def __contains__(self, gram) -> bool:
+        if gram in self._grams:
+            self._grams.move_to_end(gram)
+            return True
+        return False
+
+    def add(self, gram):
+        self._grams[gram] = None
+        if len(self._grams) > self.size:
+            self._grams.popitem(last=False)
+
+
+def collapse_ngram_runs(tokens, n: int = 3, window: int = None, max_grams: int = None):
+    """
+    Token-level collapse_ngram_repetition: skip an n-gram that was already seen.
+
+    By default "seen" means anywhere earlier in the stream, exactly like
+    collapse_ngram_repetition; memory then grows with the number of distinct
+    n-grams. For full lectures or live streams, bound it with one of:
+        window: only the n-grams of the last `window` kept positions count
+        max_grams: remember at most this many n-grams (least recently seen dropped)
+    """
+    if window is not None and max_grams is not None:
+        raise ValueError("Pass either window or max_grams, not both")
+    if window is not None:
+        seen = _RecentGrams(window)
+    elif max_grams is not None:
+        seen = _LruGrams(max_grams)
+    else:
+        seen = set()
+
+    src = iter(tokens)
+    buf = deque(islice(src, n - 1))
+
+    for tok in src:
+        buf.append(tok)
+        gram = tuple(buf)
+        if gram in seen:
+            buf.clear()
+            buf.extend(islice(src, n - 1))
+            continue
+        seen.add(gram)
+        yield buf.popleft()
+
+    # Fewer than n tokens left: no full n-gram to repeat
+    yield from buf
+
+
+class UniqueRatio:
+    """
+    Incremental is_low_entropy: share of distinct tokens, updated one token at a time.
+
+    Args:
+        threshold: is_low() below this ratio (is_low_entropy uses 0.4)
+        window: only the last `window` tokens count; None counts the whole
+            stream, exactly like is_low_entropy (memory grows with the
+            vocabulary, not with the length)
+    """
+
+    def __init__(self, threshold: float = 0.4, window: int = None):
+        self.threshold = threshold
+        self.window = window
+        self.total = 0
+        self._counts = Counter() if window is not None else None
+        self._recent = deque() if window is not None else None
+        self._distinct = set() if window is None else None
+
+    def update(self, tok: str):
+        if self.window is None:
+            self._distinct.add(tok)
+            self.total += 1
+            return
+
+        self._recent.append(tok)
+        self._counts[tok] += 1
+        if len(self._recent) > self.window:
+            old = self._recent.popleft()
+            self._counts[old] -= 1
+            if not self._counts[old]:
+                del self._counts[old]
+        self.total = len(self._recent)
+
+    def observe(self, tokens):
+        """Pass `tokens` through unchanged, counting them on the way."""
+        for tok in tokens:
+            self.update(tok)
+            yield tok
+
+    @property
+    def distinct(self) -> int:
+        return len(self._distinct) if self.window is None else len(self._counts)
+
+    @property
+    def ratio(self) -> float:
+        return self.distinct / self.total if self.total else 0.0
+
+    def is_low(self) -> bool:
+        """True for an empty stream or a ratio below the threshold."""
+        return not self.total or self.ratio < self.threshold
+
+
+def _number_tail(tok: str):
+    """Trailing digit run of `tok` when it starts on a word boundary, else None."""
+    i = len(tok)
+    while i and tok[i - 1].isdecimal():
+        i -= 1
+    if i == len(tok) or (i and _is_word(tok[i - 1])):
+        return None
+    return tok[i:]
+
+
+def remove_number_runs(tokens):
+    """Token-level re.sub(r"\\b(\\d+)(\\s+\\1){2,}\\b", r"\\1", text)."""
+    stream = _Lookahead(tokens)
+    buf = stream.buf
+    carry = ""
+
+    src = stream.src
+
+    while True:
+        if buf:
+            tok = buf.popleft()
+        else:
+            # Fast path: pass tokens straight through until one ends in a digit
+            for tok in src:
+                if tok[-1].isdecimal():
+                    break
+                if carry:
+                    tok = carry + tok
+                    carry = ""
+                yield tok
+            else:
+                break
+
+        digits = _number_tail(tok)
+        if digits is not None:
+            full = 0
+            while stream.fill(full + 1) and buf[full] == digits:
+                full += 1
+            partial = stream.fill(full + 1) and _starts_with_word(buf[full], digits)
+
+            if full + partial >= 2:
+                stream.drop(full)
+                if partial:
+                    # "7 7 7.5" -> "7.5": the head of the last copy is replaced,
+                    # the rest of that token is glued on and scanned again
+                    carry += tok
+                    buf[0] = buf[0][len(digits):]
+                    continue
+
+        yield carry + tok
+        carry = ""
+
+    if carry:
+        yield carry
+
+
+class NormalizationEngine:
+    """
+    Precompiled AllMerged text cleanup over a single token stream.
+
+    Args:
+        fillers: filler phrases, removed when repeated back to back
+        max_repeat: collapse_token_repetition limit
+        ngram: collapse_ngram_repetition n
+        ngram_window / ngram_max_grams: bound the n-gram memory (see
+            collapse_ngram_runs); leave both unset for output identical to
+            the post_processing functions
+        hot_cache: distinct tokens whose filler lookup is remembered
+    """
+
+    def __init__(self, fillers, max_repeat: int = 2, ngram: int = 3,
+                 ngram_window: int = None, ngram_max_grams: int = None, hot_cache: int = 65536):
+        self.max_repeat = max_repeat
+        self.ngram = ngram
+        self.ngram_window = ngram_window
+        self.ngram_max_grams = ngram_max_grams
+        self.fillers = []
+        for f in fillers:
+            # A filler that normalization would alter can never occur in normalized text
+            if " ".join(tokenize(f)) != f:
+                continue
+            if not (_is_word(f[0]) and _is_word(f[-1])):
+                raise ValueError(f"Filler must start and end with a word character: {f!r}")
+            self.fillers.append(f)
+
+        self._split = [f.split(" ") for f in self.fillers]
+        self._hot = lru_cache(maxsize=hot_cache)(self._runs_joined)
+
+    def _runs_joined(self, tok: str) -> tuple:
+        """Indices of the fillers whose repeated runs `tok` could be part of."""
+        return tuple(
+            i for i, words in enumerate(self._split)
+            if tok in words
+            or _run_prefix(tok, words[0]) is not None
+            or _starts_with_word(tok, words[-1])
+        )
+
+    def _filler_chain(self, segment: list):
+        # A stage can only remove something if it sees two tokens that could
+        # join its runs, and earlier stages never add such tokens
+        counts = [0] * len(self.fillers)
+        for tok in segment:
+            for i in self._hot(tok):
+                counts[i] += 1
+
+        tokens = iter(segment)
+        for i, f in enumerate(self.fillers):
+            if counts[i] > 1:
+                tokens = remove_filler_runs(tokens, f)
+        return tokens
+
+    def _remove_fillers(self, tokens):
+        """
+        All filler stages, run only where they can change something.
+
+        A token that can't join any filler run passes every stage untouched and
+        leaves every stage idle, so only stretches of such "hot" tokens (plus
+        the token after, which a removed run may be glued onto) go through the
+        stage chain. A stretch with a single hot token can't hold a run at all.
+        Whether a token is hot is looked up as it arrives (cached per token).
+        """
+        hot = self._hot
+        segment = []
+        for tok in tokens:
+            if hot(tok):
+                segment.append(tok)
+            elif segment:
+                segment.append(tok)
+                yield from (self._filler_chain(segment) if len(segment) > 2 else segment)
+                segment = []
+            else:
+                yield tok
+
+        if segment:
+            yield from (self._filler_chain(segment) if len(segment) > 1 else segment)
+
+    def tokens_from(self, pieces):
+        """
+        Cleaned token stream for text arriving in whitespace-separated pieces
+        (lazy: each piece is tokenized as the stream reaches it).
+        """
+        if isinstance(pieces, str):
+            pieces = (pieces,)
+        stream = self._remove_fillers(iter_tokens(pieces))
+        stream = collapse_token_runs(stream, self.max_repeat)
+        stream = collapse_ngram_runs(stream, self.ngram, self.ngram_window, self.ngram_max_grams)
+        return remove_number_runs(stream)
+
+    def tokens(self, text: str):
+        """Cleaned token stream for `text` (lazy; nothing is joined until consumed)."""
+        return self.tokens_from((text,))
+
+    def normalize(self, text: str) -> str:
+        return " ".join(self.tokens(text))
@@ -5,6 +5,8 @@ import os
 # Add parent directory to path to import from openRouter
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from openRouter.openrouter import call_openrouter
+from normalization_engine import NormalizationEngine, UniqueRatio
+from keyword_classifier import KeywordClassifier
 # =========================
 # UNIVERSAL BASE PROMPT
 # =========================
@@ -150,81 +152,75 @@ SYSTEM_PROMPTS = {
     "WebDev": SYSTEM_PROMPT_WEBDEV,
 }
 
-def subject_classifier(text):
-    """categorizes raw lecture text for normalization"""
+SUBJECT_KEYWORDS = {
+    "DSA": [
+        "algorithm", "data structure", "array", "string", "linked list",
+        "stack", "queue", "heap", "hash", "hashmap", "tree", "binary tree",
+        "bst", "graph", "dfs", "bfs", "recursion", "dynamic programming",
+        "greedy", "two pointer", "sliding window",
+        "time complexity", "space complexity", "big o", "optimization",
+        "pseudo code", "edge case"
+    ],
+    "Maths": [
+        "formula", "equation", "expression", "theorem", "proof",
+        "derivative", "integral", "limit", "matrix", "determinant",
+        "vector", "eigen", "probability", "statistics", "mean", "variance",
+        "standard deviation", "permutation", "combination",
+        "logarithm", "exponential"
+    ],
+    "DBMS": [
+        "database", "dbms", "table", "row", "column", "schema",
+        "primary key", "foreign key", "index", "normalization",
+        "sql", "select", "insert", "update", "delete",
+        "join", "inner join", "left join", "right join",
+        "transaction", "acid", "lock", "deadlock",
+        "mongodb", "collection", "document", "aggregation"
+    ],
+    "GenAI": [
+        "model", "training", "testing", "validation",
+        "neural network", "deep learning", "machine learning",
+        "dataset", "label", "loss", "optimizer",
+        "gradient", "backpropagation",
+        "transformer", "attention", "embedding",
+        "llm", "prompt", "fine tuning", "inference",
+        "overfitting", "underfitting"
+    ],
+    "WebDev": [
+        "html", "css", "javascript", "js", "typescript", "ts",
+        "frontend", "backend", "full stack", "full-stack",
+        "react", "next js", "next.js", "vue", "angular",
+        "component", "props", "state", "hook", "use state", "use effect",
+        "dom", "event listener", "event handler",
+        "api", "rest", "rest api", "http", "request", "response",
+        "endpoint", "route", "router", "controller",
+        "express", "node", "node js", "node.js",
+        "json", "fetch", "axios",
+        "layout", "flexbox", "grid", "responsive", "media query",
+        "tailwind", "bootstrap", "css module", "styled components"
+    ]
+}
 
-    word_dict = {
-        "DSA": [
-            "algorithm", "data structure", "array", "string", "linked list",
-            "stack", "queue", "heap", "hash", "hashmap", "tree", "binary tree",
-            "bst", "graph", "dfs", "bfs", "recursion", "dynamic programming",
-            "greedy", "two pointer", "sliding window",
-            "time complexity", "space complexity", "big o", "optimization",
-            "pseudo code", "edge case"
-        ],
-        "Maths": [
-            "formula", "equation", "expression", "theorem", "proof",
-            "derivative", "integral", "limit", "matrix", "determinant",
-            "vector", "eigen", "probability", "statistics", "mean", "variance",
-            "standard deviation", "permutation", "combination",
-            "logarithm", "exponential"
-        ],
-        "DBMS": [
-            "database", "dbms", "table", "row", "column", "schema",
-            "primary key", "foreign key", "index", "normalization",
-            "sql", "select", "insert", "update", "delete",
-            "join", "inner join", "left join", "right join",
-            "transaction", "acid", "lock", "deadlock",
-            "mongodb", "collection", "document", "aggregation"
-        ],
-        "GenAI": [
-            "model", "training", "testing", "validation",
-            "neural network", "deep learning", "machine learning",
-            "dataset", "label", "loss", "optimizer",
-            "gradient", "backpropagation",
-            "transformer", "attention", "embedding",
-            "llm", "prompt", "fine tuning", "inference",
-            "overfitting", "underfitting"
-        ],
-        "WebDev": [
-            "html", "css", "javascript", "js", "typescript", "ts",
-            "frontend", "backend", "full stack", "full-stack",
-            "react", "next js", "next.js", "vue", "angular",
-            "component", "props", "state", "hook", "use state", "use effect",
-            "dom", "event listener", "event handler",
-            "api", "rest", "rest api", "http", "request", "response",
-            "endpoint", "route", "router", "controller",
-            "express", "node", "node js", "node.js",
-            "json", "fetch", "axios",
-            "layout", "flexbox", "grid", "responsive", "media query",
-            "tailwind", "bootstrap", "css module", "styled components"
-        ]
-    }
+# Built once: one automaton over every subject's keywords
+SUBJECT_CLASSIFIER = KeywordClassifier(SUBJECT_KEYWORDS)
 
-    text = text.lower()
-    scores = {k: 0 for k in word_dict}
+def subject_classifier(text):
+    """categorizes raw lecture text for normalization"""
+    return SUBJECT_CLASSIFIER.classify(text)["subject"]
 
-    for subject, keywords in word_dict.items():
-        for kw in keywords:
-            if kw in text:
-                scores[subject] += 1
 
-    return max(scores, key=scores.get)
 
 
+# Unicode ranges
+DEVANAGARI = r"\u0900-\u097F"
+LATIN = r"a-zA-Z"
+DIGITS = r"0-9"
+MATH = r"\+\-\*/=\^\(\)\[\]\{\}<>,\.:"
 
+ALLOWED_PATTERN = re.compile(
+    rf"[{DEVANAGARI}{LATIN}{DIGITS}{MATH}\s]+"
+)
 
 def filter_by_script(text: str) -> str:
-    # Unicode ranges
-
-    DEVANAGARI = r"\u0900-\u097F"
-    LATIN = r"a-zA-Z"
-    DIGITS = r"0-9"
-    MATH = r"\+\-\*/=\^\(\)\[\]\{\}<>,\.:"
-
-    ALLOWED_PATTERN = re.compile(
-        rf"[{DEVANAGARI}{LATIN}{DIGITS}{MATH}\s]+"
-    )
     tokens = text.split()
     kept = []
     for t in tokens:
@@ -233,10 +229,13 @@ def filter_by_script(text: str) -> str:
     return " ".join(kept)
 
 
+WHITESPACE_PATTERN = re.compile(r"\s+")
+DISALLOWED_PATTERN = re.compile(r"[^\w\s\.\,\=\+\-\*/\^\(\)]")
+
 def normalize_text(text: str) -> str:
     text = text.lower()
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"[^\w\s\.\,\=\+\-\*/\^\(\)]", "", text)
+    text = WHITESPACE_PATTERN.sub(" ", text)
+    text = DISALLOWED_PATTERN.sub("", text)
     return text.strip()
 
 
@@ -246,10 +245,12 @@ FILLERS = [
     "देखो", "समझो"
 ]
 
+# remove only if repeated or standalone
+FILLER_PATTERNS = [re.compile(rf"(\b{f}\b\s*){{2,}}") for f in FILLERS]
+
 def remove_fillers(text: str) -> str:
-    for f in FILLERS:
-        # remove only if repeated or standalone
-        text = re.sub(rf"(\b{f}\b\s*){{2,}}", "", text)
+    for pattern in FILLER_PATTERNS:
+        text = pattern.sub("", text)
     return text.strip()
 
 
@@ -292,8 +293,13 @@ def collapse_ngram_repetition(text: str, n=3):
 
 
 
+NUMERIC_SPAM_PATTERN = re.compile(r"\b(\d+)(\s+\1){2,}\b")
+
 def remove_numeric_spam(text: str) -> str:
-    return re.sub(r"\b(\d+)(\s+\1){2,}\b", r"\1", text)
+    return NUMERIC_SPAM_PATTERN.sub(r"\1", text)
+
+
+NORMALIZER = NormalizationEngine(FILLERS)
 
 
 def is_low_entropy(text: str) -> bool:
@@ -303,24 +309,31 @@ def is_low_entropy(text: str) -> bool:
     unique_ratio = len(set(words)) / len(words)
     return unique_ratio < 0.4
 
-def AllMerged(text: str) -> str:
-    text = normalize_text(text)
-    text = filter_by_script(text)
-    text = remove_fillers(text)
-    text = collapse_token_repetition(text)
-    text = collapse_ngram_repetition(text)
-    text = remove_numeric_spam(text)
-    if is_low_entropy(text):
-        return     ""  # drop chunk
+def clean_for_llm(text: str):
+    """Local cleanup stages of AllMerged: (cleaned text, system prompt), or None to drop the chunk."""
+    # One tokenization, identical output to normalize_text -> filter_by_script ->
+    # remove_fillers -> collapse_token_repetition -> collapse_ngram_repetition ->
+    # remove_numeric_spam (see normalization_engine.py / bench_normalization.py);
+    # the is_low_entropy ratio is counted on the same pass
+    uniqueness = UniqueRatio()
+    text = " ".join(uniqueness.observe(NORMALIZER.tokens(text)))
+    if uniqueness.is_low():
+        return None  # drop chunk
     subject = subject_classifier(text)
     SYSTEM_PROMPT = SYSTEM_PROMPTS.get(subject, SYSTEM_PROMPTS["Maths"])  # Default to Maths if subject not found
+    return text, SYSTEM_PROMPT
+
+def AllMerged(text: str) -> str:
+    cleaned = clean_for_llm(text)
+    if cleaned is None:
+        return     ""  # drop chunk
+    text, SYSTEM_PROMPT = cleaned
     text = call_openrouter(text, system_prompt = SYSTEM_PROMPT)
 
 
 
     return text
 
-
 if __name__ == "__main__":
     AllMerged(text)
 
@@ -1,86 +1,255 @@
 #!/usr/bin/env python3
 """
 Process a single audio chunk: transcribe and post-process.
+
+Usage:
+    python process_chunk.py <audio_chunk_path>   # one-shot
+    python process_chunk.py --worker             # long-lived JSON-lines worker
+
+In worker mode the Whisper model is loaded once and jobs are read from stdin,
+one JSON object per line:
+    {"id": 1, "path": "/abs/path/chunk_0.wav", "batch_size": 8}
+or, to read a window of the lecture WAV through a memory map instead of a
+chunk file:
+    {"id": 1, "audio": "/abs/path/<lectureHash>.wav", "start": 600, "end": 1205}
+("batch_size" is optional; "keep_until" drops words starting at/after that
+many seconds into the audio, i.e. the overlap owned by the next chunk;
+"offset" shifts segment timestamps, defaulting to "start") and answered on
+stdout, one JSON object per line:
+    {"id": 1, "text": "...", "segments": [{"start": 600.0, "end": 604.2, "text": "..."}]}
+or
+    {"id": 1, "error": "..."}
+
+Batched mode: set WHISPER_BATCH_SIZE (or "batch_size" per job) > 1 to decode
+the VAD segments of a chunk together through faster-whisper's
+BatchedInferencePipeline instead of one by one.
 """
 import sys
 import os
-from faster_whisper import WhisperModel
+import json
+from faster_whisper import WhisperModel, BatchedInferencePipeline
 from post_processing import AllMerged
+from wav_reader import open_wav
 
 # Initialize Whisper model (cache it globally for efficiency)
 _model = None
+_batched_pipeline = None
+
+# 0/1 = sequential segment decoding (original behaviour)
+DEFAULT_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "0"))
+
+# Shared by the sequential and batched paths so both decode the same way
+TRANSCRIBE_OPTIONS = dict(
+    # decoding
+    beam_size=5,
+    temperature=0.0,
+    best_of=1,
+    
+    # CRITICAL: stop repetition + punctuation collapse
+    repetition_penalty=1.2,
+    no_repeat_ngram_size=3,
+    
+    # Hindi-safe thresholds
+    compression_ratio_threshold=1.6,
+    log_prob_threshold=-1.2,
+    no_speech_threshold=0.7,
+    
+    # break loops
+    condition_on_previous_text=False,
+    
+    # VAD (keep)
+    vad_filter=True,
+    vad_parameters={
+        "min_silence_duration_ms": 700
+    },
+    
+    # DO NOT suppress tokens or blanks
+    suppress_blank=False,
+    suppress_tokens=None,
+)
 
 def get_model():
     global _model
     if _model is None:
+        # Set by the Node worker pool so parallel workers split the cores
+        # instead of each grabbing all of them (0 = faster-whisper default)
         _model = WhisperModel(
             "base",
             device="auto",
             compute_type="int8",
+            cpu_threads=int(os.getenv("WHISPER_CPU_THREADS", "0")),
+            num_workers=int(os.getenv("WHISPER_NUM_WORKERS", "1")),
         )
     return _model
 
-def transcribe_chunk(audio_path: str) -> str:
-    """Transcribe a single audio chunk using Whisper."""
-    model = get_model()
-    
-    segments, info = model.transcribe(
-        audio_path,
-        # decoding
-        beam_size=5,
-        temperature=0.0,
-        best_of=1,
-        
-        # CRITICAL: stop repetition + punctuation collapse
-        repetition_penalty=1.2,
-        no_repeat_ngram_size=3,
-        
-        # Hindi-safe thresholds
-        compression_ratio_threshold=1.6,
-        log_prob_threshold=-1.2,
-        no_speech_threshold=0.7,
-        
-        # break loops
-        condition_on_previous_text=False,
+def get_batched_pipeline():
+    global _batched_pipeline
+    if _batched_pipeline is None:
+        _batched_pipeline = BatchedInferencePipeline(model=get_model())
+    return _batched_pipeline
+
+def transcribe_segments(audio, batch_size: int = None, keep_until: float = None) -> list:
+    """
+    Transcribe a single audio chunk into timestamped segments.
+    
+    `audio` is a file path or a 16 kHz float32 NumPy array. With batch_size > 1
+    the chunk's VAD segments are decoded in batches; otherwise they are decoded
+    sequentially.
+    
+    keep_until (seconds into `audio`) marks the seam with the next chunk:
+    words starting at or after it are dropped, because the next chunk
+    transcribes them from its own start. Decoding stops at the seam.
+    
+    Returns:
+        [{"start": float, "end": float, "text": str}, ...] with empty segments removed
+    """
+    if batch_size is None:
+        batch_size = DEFAULT_BATCH_SIZE
+    
+    # Per-word timings cost an alignment pass: only needed to cut an overlap at the seam
+    word_timestamps = keep_until is not None
+    
+    if batch_size > 1:
+        segments, info = get_batched_pipeline().transcribe(
+            audio,
+            batch_size=batch_size,
+            word_timestamps=word_timestamps,
+            **TRANSCRIBE_OPTIONS,
+        )
+    else:
+        segments, info = get_model().transcribe(audio, word_timestamps=word_timestamps, **TRANSCRIBE_OPTIONS)
+    
+    result = []
+    for seg in segments:
+        text = seg.text
+        end = seg.end
         
-        # VAD (keep)
-        vad_filter=True,
-        vad_parameters={
-            "min_silence_duration_ms": 700
-        },
+        if keep_until is not None:
+            if seg.start >= keep_until:
+                # segments is lazy: stop decoding the overlap entirely
+                break
+            if seg.end > keep_until and seg.words:
+                kept = [w for w in seg.words if w.start < keep_until]
+                text = "".join(w.word for w in kept)
+                end = kept[-1].end if kept else seg.start
         
-        # DO NOT suppress tokens or blanks
-        suppress_blank=False,
-        suppress_tokens=None,
-    )
+        text = text.strip()
+        if text:
+            result.append({"start": seg.start, "end": end, "text": text})
     
-    text = " ".join(seg.text.strip() for seg in segments if seg.text.strip())
-    return text
+    return result
+
+def transcribe_chunk(audio, batch_size: int = None, keep_until: float = None) -> str:
+    """Transcribe a single audio chunk using Whisper."""
+    segments = transcribe_segments(audio, batch_size=batch_size, keep_until=keep_until)
+    return " ".join(seg["text"] for seg in segments)
 
-def process_chunk(audio_path: str) -> str:
+def process_chunk_segments(audio, batch_size: int = None, keep_until: float = None, offset: float = 0) -> dict:
     """
-    Process a single chunk: transcribe and post-process.
+    Process a single chunk and keep its raw segment timestamps.
     
     Args:
-        audio_path: Path to the audio chunk file
+        audio: Path to the audio chunk file, or a 16 kHz float32 array
+        batch_size: Batched decoding size (defaults to WHISPER_BATCH_SIZE)
+        keep_until: Seam with the next chunk, in seconds into `audio`
+        offset: Added to segment timestamps (e.g. the chunk's lecture start time)
         
     Returns:
-        Processed text string
+        {"text": processed text, "segments": raw [{"start", "end", "text"}]}
     """
     # Transcribe
-    raw_text = transcribe_chunk(audio_path)
+    segments = transcribe_segments(audio, batch_size=batch_size, keep_until=keep_until)
+    raw_text = " ".join(seg["text"] for seg in segments)
+    
+    for seg in segments:
+        seg["start"] = round(seg["start"] + offset, 3)
+        seg["end"] = round(seg["end"] + offset, 3)
     
     if not raw_text.strip():
-        return ""
+        return {"text": "", "segments": segments}
     
     # Post-process
-    processed_text = AllMerged(raw_text)
+    return {"text": AllMerged(raw_text), "segments": segments}
+
+def process_chunk(audio, batch_size: int = None, keep_until: float = None) -> str:
+    """
+    Process a single chunk: transcribe and post-process.
+    
+    Args:
+        audio: Path to the audio chunk file, or a 16 kHz float32 array
+        batch_size: Batched decoding size (defaults to WHISPER_BATCH_SIZE)
+        keep_until: Seam with the next chunk, in seconds into `audio`
+        
+    Returns:
+        Processed text string
+    """
+    return process_chunk_segments(audio, batch_size=batch_size, keep_until=keep_until)["text"]
+
+def process_window(wav_path: str, start: float, end: float = None, batch_size: int = None, keep_until: float = None) -> dict:
+    """
+    Process [start, end) seconds of the lecture WAV without writing a chunk file.
     
-    return processed_text
+    Returns the same dict as process_chunk_segments, with lecture-absolute timestamps.
+    """
+    audio = open_wav(wav_path).window_float32(start, end)
+    return process_chunk_segments(audio, batch_size=batch_size, keep_until=keep_until, offset=start)
+
+def run_worker():
+    """
+    Serve chunk jobs over stdin/stdout until stdin is closed.
+
+    stdout is reserved for protocol messages; anything else printed while a
+    job runs is redirected to stderr.
+    """
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    # Pay the model load once, before the first job arrives
+    get_model()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        job_id = None
+        try:
+            job = json.loads(line)
+            job_id = job.get("id")
+            audio_path = job["audio"] if "audio" in job else job["path"]
+            if not os.path.exists(audio_path):
+                raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+            if "audio" in job:
+                result = process_window(
+                    audio_path,
+                    job.get("start", 0),
+                    job.get("end"),
+                    batch_size=job.get("batch_size"),
+                    keep_until=job.get("keep_until"),
+                )
+            else:
+                result = process_chunk_segments(
+                    audio_path,
+                    batch_size=job.get("batch_size"),
+                    keep_until=job.get("keep_until"),
+                    offset=job.get("offset", 0),
+                )
+            reply = {"id": job_id, **result}
+        except Exception as e:
+            reply = {"id": job_id, "error": str(e)}
+
+        out.write(json.dumps(reply) + "\n")
+        out.flush()
+
 
 if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--worker":
+        run_worker()
+        sys.exit(0)
+
     if len(sys.argv) < 2:
-        print("Usage: python process_chunk.py <audio_chunk_path>", file=sys.stderr)
+        print("Usage: python process_chunk.py <audio_chunk_path> | --worker", file=sys.stderr)
         sys.exit(1)
     
     audio_path = sys.argv[1]
@@ -1,51 +1,79 @@
-import { exec } from "child_process";
-import { promisify } from "util";
 import path from "path";
-import fs from "fs";
-import extractAudio from "./audio_extraction.js";
-import { chunkAudio } from "./chunking.js";
+import extractAudio, { streamAudioChunks } from "./audio_extraction.js";
+import { planChunks } from "./chunking.js";
+import { planAdaptiveChunks } from "./boundary_planner.js";
 import { getAudioDuration } from "./get_duration.js";
+import { getTranscriptionPool } from "./transcription_worker.js";
 import ProcessedLecture from "../models/processedLectures.js";
 
-const execAsync = promisify(exec);
+// AUDIO_STREAMING=1: transcribe chunks while the HLS stream is still downloading
+const STREAMING = process.env.AUDIO_STREAMING === "1";
+// ADAPTIVE_CHUNKS=0: fixed 10-minute windows with overlap instead of cuts in silences
+const ADAPTIVE_CHUNKS = process.env.ADAPTIVE_CHUNKS !== "0";
+const CHUNK_SIZE = 600; // 10 minutes
+const OVERLAP = 5;      // 5 seconds overlap (fixed windows only)
 
 /**
- * Process a single audio chunk using Python script
- * @param {string} chunkPath - Path to the audio chunk
- * @returns {Promise<string>} Processed text
+ * Process a single audio chunk using the resident Python transcription pool
+ * @param {Object} job - `{ path, ... }` for an audio chunk file, or
+ *   `{ audio, start, end, ... }` for a window of the lecture WAV (read via mmap)
+ * @returns {Promise<{text: string, segments: Array}>} Processed text and raw segment timestamps
  */
-async function processChunkPython(chunkPath) {
-  const audioProcessingDir = path.join(process.cwd(), "audio processing");
-  const scriptPath = path.join(audioProcessingDir, "process_chunk.py");
-  const venvPythonPath = path.join(audioProcessingDir, "whisper-env", "bin", "python3");
-  
-  // Use virtual environment Python if it exists, otherwise fall back to system python3
-  const pythonCmd = fs.existsSync(venvPythonPath) ? venvPythonPath : "python3";
-  
+async function processChunkPython(job) {
   try {
-    // Change to audio processing directory so imports work correctly
-    const { stdout, stderr } = await execAsync(
-      `cd "${audioProcessingDir}" && "${pythonCmd}" "process_chunk.py" "${chunkPath}"`
+    return await getTranscriptionPool().process(job);
+  } catch (error) {
+    const label = job.path ?? `${job.audio} [${job.start}s, ${job.end}s)`;
+    console.error(`Error processing chunk ${label}:`, error.message);
+    throw error;
+  }
+}
+
+/**
+ * Transcribe + post-process one chunk into a processedChunks entry
+ * @param {Object} chunk - { index, start, end, windowEnd } plus either `path`
+ *   (chunk file covering [start, windowEnd)) or `audio` (the lecture WAV)
+ * @returns {Promise<Object|null>} Entry, or null if the chunk was empty or failed
+ */
+async function transcribeChunk(chunk) {
+  console.log(`Processing chunk ${chunk.index}...`);
+  // Words past the chunk's own end belong to the next chunk (seam de-duplication);
+  // without an overlap there is nothing to cut, and no word timings to pay for
+  const keep_until = chunk.windowEnd > chunk.end ? chunk.end - chunk.start : undefined;
+  try {
+    const { text: processedText, segments } = await processChunkPython(
+      chunk.path
+        ? { path: chunk.path, offset: chunk.start, keep_until }
+        : { audio: chunk.audio, start: chunk.start, end: chunk.windowEnd, keep_until }
     );
     
-    if (stderr && !stderr.includes("WARNING")) {
-      console.error(`Python stderr for ${chunkPath}:`, stderr);
+    if (processedText && processedText.trim()) {
+      console.log(`Chunk ${chunk.index} processed successfully`);
+      return {
+        chunkNumber: chunk.index,
+        startTime: chunk.start,
+        endTime: chunk.end,
+        text: processedText,
+        segments
+      };
     }
-    
-    return stdout.trim();
+    console.warn(`Chunk ${chunk.index} produced empty or no text, skipping`);
   } catch (error) {
-    console.error(`Error processing chunk ${chunkPath}:`, error.message);
-    throw error;
+    console.error(`Error processing chunk ${chunk.index}:`, error.message);
+    // Continue with other chunks even if one fails
   }
+  return null;
 }
 
 /**
  * Process a complete lecture: extract, chunk, transcribe, and post-process
  * @param {string} lectureHash - The lecture hash/ID (used to identify the lecture in the database)
  * @param {string} m3u8Url - The m3u8 URL for the lecture (must be provided explicitly)
+ * @param {Object} [options]
+ * @param {boolean} [options.streaming] - Start transcribing before the download finishes (default: AUDIO_STREAMING env)
  * @returns {Promise<Object>} Processing results
  */
-export async function processLecture(lectureHash, m3u8Url) {
+export async function processLecture(lectureHash, m3u8Url, { streaming = STREAMING } = {}) {
   try {
     if (!m3u8Url) {
       throw new Error("m3u8Url is required");
@@ -53,57 +81,74 @@ export async function processLecture(lectureHash, m3u8Url) {
 
     console.log(`Processing lecture ${lectureHash}...`);
     
-    // Step 1: Extract audio (limited to 1.5 hours)
     const outputDir = path.join(process.cwd(), "audios");
-    const audioPath = await extractAudio({
-      m3u8Url,
-      outputDir,
-      lectureId: lectureHash
-    });
-    
-    console.log(`Audio extracted to: ${audioPath}`);
-    
-    // Step 2: Get audio duration
-    const duration = await getAudioDuration(audioPath);
-    console.log(`Audio duration: ${duration} seconds`);
-    
-    // Step 3: Chunk the audio
     const chunksDir = path.join(outputDir, "chunks", lectureHash);
-    const chunks = await chunkAudio({
-      inputWav: audioPath,
-      outputDir: chunksDir,
-      duration: Math.min(duration, 5400), // Max 1.5 hours
-      chunkSize: 600,  // 10 minutes
-      overlap: 5       // 5 seconds overlap
-    });
-    
-    console.log(`Created ${chunks.length} chunks`);
+    let audioPath;
+    let chunks;
+    let results;
     
-    // Step 4: Process each chunk (transcribe + post-process)
-    const processedChunks = [];
-    
-    for (const chunk of chunks) {
-      console.log(`Processing chunk ${chunk.index}...`);
-      try {
-        const processedText = await processChunkPython(chunk.path);
-        
-        if (processedText && processedText.trim()) {
-          processedChunks.push({
-            chunkNumber: chunk.index,
-            startTime: chunk.start,
-            endTime: chunk.end,
-            text: processedText
+    if (streaming) {
+      // Steps 1-4 overlapped: each window is queued on the pool as soon as it
+      // has been downloaded (limited to 1.5 hours)
+      const pending = [];
+      const streamed = await streamAudioChunks({
+        m3u8Url,
+        outputDir,
+        chunksDir,
+        lectureId: lectureHash,
+        chunkSize: CHUNK_SIZE,
+        overlap: OVERLAP,
+        onChunk: (chunk) => pending.push(transcribeChunk(chunk))
+      });
+      audioPath = streamed.audioPath;
+      chunks = streamed.chunks;
+      
+      console.log(`Audio streamed to: ${audioPath} (${streamed.duration} seconds, ${chunks.length} chunks)`);
+      results = await Promise.all(pending);
+    } else {
+      // Step 1: Extract audio (limited to 1.5 hours)
+      audioPath = await extractAudio({
+        m3u8Url,
+        outputDir,
+        lectureId: lectureHash
+      });
+      
+      console.log(`Audio extracted to: ${audioPath}`);
+      
+      // Step 2: Get audio duration
+      const duration = await getAudioDuration(audioPath);
+      console.log(`Audio duration: ${duration} seconds`);
+      
+      // Step 3: Plan chunk windows; workers read them straight from the
+      // lecture WAV through a memory map, so no chunk files are written.
+      // Adaptive plans cut in silences (no overlap) and balance the pool.
+      const cappedDuration = Math.min(duration, 5400); // Max 1.5 hours
+      const windows = ADAPTIVE_CHUNKS
+        ? await planAdaptiveChunks({
+            inputWav: audioPath,
+            duration: cappedDuration,
+            targetSize: CHUNK_SIZE,
+            workers: getTranscriptionPool().size
+          })
+        : planChunks({
+            duration: cappedDuration,
+            chunkSize: CHUNK_SIZE,
+            overlap: OVERLAP
           });
-          console.log(`Chunk ${chunk.index} processed successfully`);
-        } else {
-          console.warn(`Chunk ${chunk.index} produced empty or no text, skipping`);
-        }
-      } catch (error) {
-        console.error(`Error processing chunk ${chunk.index}:`, error.message);
-        // Continue with other chunks even if one fails
-      }
+      chunks = windows.map((w) => ({ ...w, audio: audioPath }));
+      
+      console.log(`Planned ${chunks.length} chunks`);
+      
+      // Step 4: Process chunks in parallel (transcribe + post-process);
+      // the pool bounds how many run at once
+      results = await Promise.all(chunks.map(transcribeChunk));
     }
     
+    // Reassemble in chunk order regardless of completion order
+    const processedChunks = results
+      .filter(Boolean)
+      .sort((a, b) => a.chunkNumber - b.chunkNumber);
+    
     console.log(`Successfully processed ${processedChunks.length} chunks`);
     
     // Step 5: Save processed lecture data to database
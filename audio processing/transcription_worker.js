@@ -0,0 +1,120 @@
+import os from "os";
+import path from "path";
+import fs from "fs";
+import { fileURLToPath } from "url";
+import { JsonLinesWorker, WorkerPool } from "../json_lines_worker.js";
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+/**
+ * Resolve the Python interpreter for transcription.
+ * Uses the whisper-env venv if it exists, otherwise falls back to system python3.
+ * @returns {string}
+ */
+function resolvePythonCmd() {
+  const venvPythonPath = path.join(__dirname, "whisper-env", "bin", "python3");
+  return fs.existsSync(venvPythonPath) ? venvPythonPath : "python3";
+}
+
+/**
+ * Long-lived `process_chunk.py --worker` process.
+ *
+ * The Python side loads WhisperModel once and then answers JSON-lines jobs,
+ * so chunks (and lectures) reuse the same interpreter and model.
+ * The process is spawned lazily on the first job and respawned if it dies.
+ */
+export class TranscriptionWorker extends JsonLinesWorker {
+  constructor({ pythonCmd, args = [], env = {} } = {}) {
+    super({
+      name: "Transcription worker",
+      pythonCmd: pythonCmd || resolvePythonCmd(),
+      // Run from "audio processing" so local imports work correctly
+      args: ["process_chunk.py", "--worker", ...args],
+      cwd: __dirname,
+      env,
+      logStderr: (text) => Boolean(text.trim()) && !text.includes("WARNING"),
+    });
+  }
+
+  /**
+   * Transcribe and post-process a single chunk.
+   * @param {string|Object} job - Path to a chunk file, `{ path, keep_until?, offset? }`,
+   *   or `{ audio, start, end, keep_until? }` for a [start, end) window (seconds)
+   *   of the lecture WAV
+   * @returns {Promise<{text: string, segments: Array<{start: number, end: number, text: string}>}>}
+   *   Processed text plus raw segment timestamps (lecture time)
+   */
+  async process(job) {
+    const payload = typeof job === "string" ? { path: job } : { ...job };
+    if (payload.path) payload.path = path.resolve(payload.path);
+    if (payload.audio) payload.audio = path.resolve(payload.audio);
+
+    const reply = await this.request(payload);
+    return { text: (reply.text || "").trim(), segments: reply.segments || [] };
+  }
+}
+
+// Whisper "base" int8 stops scaling well past a few threads, so by default
+// more cores buy more workers rather than more threads per worker.
+const DEFAULT_THREADS_PER_WORKER = 4;
+
+/**
+ * Pool of TranscriptionWorkers that transcribes several chunks at once.
+ *
+ * Cores are split evenly across workers via cpu_threads so the WhisperModels
+ * don't oversubscribe the machine.
+ */
+export class TranscriptionPool extends WorkerPool {
+  constructor({ size, cpuThreads, numWorkers = 1 } = {}) {
+    const cores = os.cpus().length || 1;
+    const poolSize = Math.max(
+      1,
+      size || Number(process.env.TRANSCRIBE_WORKERS) || Math.floor(cores / DEFAULT_THREADS_PER_WORKER)
+    );
+    const threads = cpuThreads || Math.max(1, Math.floor(cores / poolSize));
+
+    super(Array.from({ length: poolSize }, () => new TranscriptionWorker({
+      env: {
+        WHISPER_CPU_THREADS: String(threads),
+        WHISPER_NUM_WORKERS: String(numWorkers),
+      },
+    })));
+    this.cpuThreads = threads;
+  }
+
+  /**
+   * Queue a chunk; it runs as soon as a worker is free.
+   * @param {string|Object} job - See TranscriptionWorker.process
+   * @returns {Promise<{text: string, segments: Array}>} See TranscriptionWorker.process
+   */
+  process(job) {
+    return this.run((worker) => worker.process(job));
+  }
+}
+
+let sharedPool = null;
+
+/**
+ * Shared pool reused across chunks and lectures within this Node process.
+ * @returns {TranscriptionPool}
+ */
+export function getTranscriptionPool() {
+  if (!sharedPool) {
+    sharedPool = new TranscriptionPool();
+    console.log(
+      `Transcription pool: ${sharedPool.size} worker(s) x ${sharedPool.cpuThreads} thread(s)`
+    );
+  }
+  return sharedPool;
+}
+
+/**
+ * Stop the shared pool (call before exiting CLI scripts / on server shutdown).
+ */
+export async function shutdownTranscriptionPool() {
+  if (!sharedPool) return;
+  const pool = sharedPool;
+  sharedPool = null;
+  await pool.close();
+}
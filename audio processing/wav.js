@@ -0,0 +1,94 @@
+import fs from "fs";
+
+// Lecture audio is always normalized to 16 kHz mono pcm_s16le (see audio_extraction.js)
+export const SAMPLE_RATE = 16000;
+export const CHANNELS = 1;
+export const BYTES_PER_SAMPLE = 2;
+export const BYTES_PER_SECOND = SAMPLE_RATE * CHANNELS * BYTES_PER_SAMPLE;
+export const WAV_HEADER_SIZE = 44;
+
+/**
+ * Convert seconds to a sample-aligned PCM byte offset.
+ * @param {number} seconds
+ * @returns {number}
+ */
+export function secondsToBytes(seconds) {
+  return Math.round(seconds * SAMPLE_RATE) * CHANNELS * BYTES_PER_SAMPLE;
+}
+
+/**
+ * Build a canonical 44-byte PCM WAV header.
+ * @param {number} dataBytes - Size of the PCM payload in bytes
+ * @returns {Buffer}
+ */
+export function wavHeader(dataBytes) {
+  const header = Buffer.alloc(WAV_HEADER_SIZE);
+  header.write("RIFF", 0, "ascii");
+  header.writeUInt32LE(36 + dataBytes, 4);
+  header.write("WAVE", 8, "ascii");
+  header.write("fmt ", 12, "ascii");
+  header.writeUInt32LE(16, 16);                        // fmt chunk size
+  header.writeUInt16LE(1, 20);                         // PCM
+  header.writeUInt16LE(CHANNELS, 22);
+  header.writeUInt32LE(SAMPLE_RATE, 24);
+  header.writeUInt32LE(BYTES_PER_SECOND, 28);          // byte rate
+  header.writeUInt16LE(CHANNELS * BYTES_PER_SAMPLE, 32); // block align
+  header.writeUInt16LE(BYTES_PER_SAMPLE * 8, 34);      // bits per sample
+  header.write("data", 36, "ascii");
+  header.writeUInt32LE(dataBytes, 40);
+  return header;
+}
+
+/**
+ * Locate the PCM payload of a WAV file by walking its RIFF chunks.
+ * @param {string} wavPath
+ * @returns {Promise<{sampleRate: number, channels: number, bitsPerSample: number, format: number, dataOffset: number, dataSize: number}>}
+ */
+export async function readWavInfo(wavPath) {
+  const fd = await fs.promises.open(wavPath, "r");
+  try {
+    const { size } = await fd.stat();
+    const head = Buffer.alloc(12);
+    await fd.read(head, 0, 12, 0);
+    if (head.toString("ascii", 0, 4) !== "RIFF" || head.toString("ascii", 8, 12) !== "WAVE") {
+      throw new Error(`Not a RIFF/WAVE file: ${wavPath}`);
+    }
+
+    const info = {};
+    const chunkHeader = Buffer.alloc(8);
+    let offset = 12;
+
+    while (offset + 8 <= size) {
+      await fd.read(chunkHeader, 0, 8, offset);
+      const id = chunkHeader.toString("ascii", 0, 4);
+      let chunkSize = chunkHeader.readUInt32LE(4);
+      const body = offset + 8;
+
+      if (id === "fmt ") {
+        const fmt = Buffer.alloc(16);
+        await fd.read(fmt, 0, 16, body);
+        info.format = fmt.readUInt16LE(0);
+        info.channels = fmt.readUInt16LE(2);
+        info.sampleRate = fmt.readUInt32LE(4);
+        info.bitsPerSample = fmt.readUInt16LE(14);
+      } else if (id === "data") {
+        // Streamed writers may leave 0 / 0xFFFFFFFF here; trust the file size then
+        if (chunkSize === 0 || body + chunkSize > size) {
+          chunkSize = size - body;
+        }
+        info.dataOffset = body;
+        info.dataSize = chunkSize;
+        break;
+      }
+
+      offset = body + chunkSize + (chunkSize % 2); // chunks are word-aligned
+    }
+
+    if (info.dataOffset === undefined || info.format === undefined) {
+      throw new Error(`WAV file has no fmt/data chunk: ${wavPath}`);
+    }
+    return info;
+  } finally {
+    await fd.close();
+  }
+}
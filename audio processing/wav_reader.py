@@ -0,0 +1,125 @@
+"""
+Memory-mapped reader for the normalized lecture WAV (16 kHz mono pcm_s16le).
+
+Windows are served straight from the page cache: `window()` returns a
+zero-copy int16 view of the mapped file, and `window_float32()` converts only
+the requested window to the float32 [-1, 1) array WhisperModel.transcribe
+expects. Overlapping windows share the same mapped pages instead of being
+duplicated as chunk files on disk.
+"""
+import mmap
+import os
+import struct
+from collections import OrderedDict
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+class PcmWav:
+    """A 16 kHz mono s16le WAV file mapped into memory."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        offset, size = self._find_data_chunk()
+        count = size // 2
+        self.samples = np.frombuffer(self._mmap, dtype="<i2", count=count, offset=offset)
+
+    def _find_data_chunk(self):
+        mm = self._mmap
+        if mm[0:4] != b"RIFF" or mm[8:12] != b"WAVE":
+            raise ValueError(f"Not a RIFF/WAVE file: {self.path}")
+
+        fmt = None
+        pos = 12
+        while pos + 8 <= len(mm):
+            chunk_id = mm[pos:pos + 4]
+            chunk_size = struct.unpack_from("<I", mm, pos + 4)[0]
+            body = pos + 8
+
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack_from("<HHIIHH", mm, body)
+            elif chunk_id == b"data":
+                # Streamed writers may leave 0 / 0xFFFFFFFF here; trust the file size then
+                if chunk_size == 0 or body + chunk_size > len(mm):
+                    chunk_size = len(mm) - body
+                if fmt is None:
+                    raise ValueError(f"WAV data chunk before fmt chunk: {self.path}")
+                audio_format, channels, rate, _, _, bits = fmt
+                if (audio_format, channels, rate, bits) != (1, 1, SAMPLE_RATE, 16):
+                    raise ValueError(
+                        f"Expected 16 kHz mono pcm_s16le, got format={audio_format} "
+                        f"channels={channels} rate={rate} bits={bits}: {self.path}"
+                    )
+                return body, chunk_size
+
+            pos = body + chunk_size + (chunk_size % 2)
+
+        raise ValueError(f"WAV file has no data chunk: {self.path}")
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / SAMPLE_RATE
+
+    def window(self, start: float, end: float = None) -> np.ndarray:
+        """Zero-copy int16 view of [start, end) seconds (clamped to the file)."""
+        first = max(0, int(round(start * SAMPLE_RATE)))
+        last = len(self.samples) if end is None else min(len(self.samples), int(round(end * SAMPLE_RATE)))
+        return self.samples[first:max(first, last)]
+
+    def window_float32(self, start: float, end: float = None) -> np.ndarray:
+        """float32 samples in [-1, 1) for [start, end) seconds, as Whisper expects."""
+        audio = self.window(start, end).astype(np.float32)
+        audio *= 1.0 / 32768.0
+        return audio
+
+    def close(self):
+        # Drop our view first; mmap refuses to close while buffers are exported
+        self.samples = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A caller still holds a window view; the mapping is released
+            # when that view is garbage-collected
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_open_files = OrderedDict()
+MAX_OPEN_FILES = 2
+
+
+def open_wav(path: str) -> PcmWav:
+    """
+    Shared PcmWav for `path`, reused across chunk jobs of the same lecture.
+
+    Keyed on (path, size, mtime) so a re-extracted lecture is never served
+    from a stale mapping; only the most recent MAX_OPEN_FILES stay mapped.
+    """
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+    wav = _open_files.pop(key, None)
+    if wav is None:
+        wav = PcmWav(path)
+    _open_files[key] = wav
+
+    while len(_open_files) > MAX_OPEN_FILES:
+        _, old = _open_files.popitem(last=False)
+        old.close()
+
+    return wav
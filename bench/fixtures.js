@@ -0,0 +1,406 @@
+/**
+ * Offline fixtures for the end-to-end benchmark (no CDN, no real lectures).
+ *
+ * - Speech-like 16 kHz mono WAV: voiced "utterances" (harmonic stack at a
+ *   drifting pitch, syllable-rate envelope) separated by pauses, so chunk
+ *   planning, VAD and decoding all have work to do.
+ * - Lecture text and PDF sections built from the same topic vocabulary, so the
+ *   section router and note generation see related content.
+ * - PDFs written by hand (no dependencies): text pages with larger-font headings
+ *   (pdfplumber path) and scanned pages holding only a bitmap image of the text
+ *   (Tesseract path).
+ *
+ * Everything is seeded: the same options always produce the same bytes.
+ *
+ * Usage:
+ *   node bench/fixtures.js [outDir] [--minutes 10] [--pages 8] [--scanned-pages 4] [--seed 1]
+ */
+
+import fs from "fs";
+import path from "path";
+import zlib from "zlib";
+import { fileURLToPath } from "url";
+import { SAMPLE_RATE, wavHeader } from "../audio processing/wav.js";
+
+const __filename = fileURLToPath(import.meta.url);
+
+const TOPICS = [
+  ["Authentication Basics", "password hashing bcrypt salt rounds login credentials verify user identity"],
+  ["JSON Web Tokens", "jwt header payload signature base64 expiry access token refresh token verify"],
+  ["Sessions and Cookies", "session id cookie httpOnly secure sameSite server store expiry logout"],
+  ["Middleware", "express middleware request response next protected route authorization header"],
+  ["Authorization Roles", "roles permissions admin user access control policy check forbidden"],
+  ["OAuth Flow", "oauth provider redirect authorization code client id secret scope consent"],
+  ["Security Pitfalls", "xss csrf token storage localStorage rotation revoke brute force rate limit"],
+  ["Database Models", "schema model mongoose index unique email password field validation"],
+];
+
+const FILLER = "so basically matlab yeh jo hai na you know right okay toh dekho".split(" ");
+
+/**
+ * Deterministic PRNG (mulberry32).
+ * @param {number} seed
+ * @returns {() => number}
+ */
+export function seededRandom(seed) {
+  let a = seed >>> 0;
+  return () => {
+    a = (a + 0x6d2b79f5) >>> 0;
+    let t = a;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+// ---------- Audio ----------
+
+/**
+ * Write a speech-like 16 kHz mono pcm_s16le WAV.
+ * @param {string} outPath
+ * @param {number} seconds
+ * @param {number} [seed]
+ * @returns {string} outPath
+ */
+export function writeSpeechLikeWav(outPath, seconds, seed = 1) {
+  const rand = seededRandom(seed);
+  const total = Math.round(seconds * SAMPLE_RATE);
+  const pcm = Buffer.alloc(total * 2);
+
+  let i = 0;
+  let phase = 0;
+  while (i < total) {
+    // Utterance 0.8-4 s, then a 0.2-1.5 s pause (occasionally a long one)
+    const talk = Math.min(total - i, Math.round((0.8 + rand() * 3.2) * SAMPLE_RATE));
+    const basePitch = 110 + rand() * 110;
+    const syllableRate = 3 + rand() * 3;
+
+    for (let n = 0; n < talk; n++, i++) {
+      const t = n / SAMPLE_RATE;
+      const pitch = basePitch * (1 + 0.08 * Math.sin(2 * Math.PI * 0.7 * t));
+      phase += (2 * Math.PI * pitch) / SAMPLE_RATE;
+      const envelope = Math.max(0, Math.sin(Math.PI * syllableRate * t)) ** 0.6;
+      let sample = 0;
+      for (let h = 1; h <= 6; h++) sample += Math.sin(h * phase) / h;
+      sample = sample * envelope * 0.25 + (rand() - 0.5) * 0.01;
+      pcm.writeInt16LE(Math.max(-32768, Math.min(32767, Math.round(sample * 32767))), i * 2);
+    }
+
+    const pause = Math.round((rand() < 0.1 ? 1.5 + rand() * 2 : 0.2 + rand() * 1.3) * SAMPLE_RATE);
+    for (let n = 0; n < pause && i < total; n++, i++) {
+      pcm.writeInt16LE(Math.round((rand() - 0.5) * 60), i * 2);
+    }
+  }
+
+  fs.mkdirSync(path.dirname(outPath), { recursive: true });
+  fs.writeFileSync(outPath, Buffer.concat([wavHeader(pcm.length), pcm]));
+  return outPath;
+}
+
+// ---------- Text ----------
+
+/**
+ * PDF-style sections over the benchmark topics.
+ * @param {number} count
+ * @param {number} [seed]
+ * @returns {Array<{ title: string, paragraphs: string[] }>}
+ */
+export function makeSections(count, seed = 1) {
+  const rand = seededRandom(seed);
+  const sections = [];
+  for (let s = 0; s < count; s++) {
+    const [title, vocab] = TOPICS[s % TOPICS.length];
+    const words = vocab.split(" ");
+    const paragraphs = [];
+    const nParagraphs = 2 + Math.floor(rand() * 3);
+    for (let p = 0; p < nParagraphs; p++) {
+      const sentence = [];
+      const length = 25 + Math.floor(rand() * 30);
+      for (let w = 0; w < length; w++) sentence.push(words[Math.floor(rand() * words.length)]);
+      paragraphs.push(sentence.join(" ") + ".");
+    }
+    sections.push({ title: count > TOPICS.length ? `${title} ${Math.floor(s / TOPICS.length) + 1}` : title, paragraphs });
+  }
+  return sections;
+}
+
+/**
+ * Hinglish-style lecture transcript walking the topics in order, with fillers.
+ * @param {number} words
+ * @param {number} [seed]
+ * @returns {string}
+ */
+export function makeLectureText(words, seed = 1) {
+  const rand = seededRandom(seed);
+  const out = [];
+  while (out.length < words) {
+    const topic = Math.min(TOPICS.length - 1, Math.floor((out.length / words) * TOPICS.length));
+    const vocab = TOPICS[topic][1].split(" ");
+    out.push(rand() < 0.25 ? FILLER[Math.floor(rand() * FILLER.length)] : vocab[Math.floor(rand() * vocab.length)]);
+  }
+  return out.join(" ");
+}
+
+// ---------- PDF ----------
+
+const PAGE_W = 612;
+const PAGE_H = 792;
+
+function pdfEscape(text) {
+  return text.replace(/[\\()]/g, (c) => `\\${c}`).replace(/[^\x20-\x7e]/g, "?");
+}
+
+function wrap(text, width) {
+  const lines = [];
+  let line = "";
+  for (const word of text.split(" ")) {
+    if (line && line.length + 1 + word.length > width) {
+      lines.push(line);
+      line = word;
+    } else {
+      line = line ? `${line} ${word}` : word;
+    }
+  }
+  if (line) lines.push(line);
+  return lines;
+}
+
+/**
+ * Lay sections out as pages of { text, size } lines (headings 18 pt, body 11 pt).
+ * @returns {Array<Array<{ text: string, size: number, y: number }>>}
+ */
+function layout(sections, { headingSize = 18, bodySize = 11, width = 90 } = {}) {
+  const pages = [[]];
+  let y = PAGE_H - 72;
+  const place = (text, size, gapBefore) => {
+    y -= gapBefore;
+    if (y < 72) {
+      pages.push([]);
+      y = PAGE_H - 72;
+    }
+    pages[pages.length - 1].push({ text, size, y });
+    y -= size * 1.3;
+  };
+
+  for (const section of sections) {
+    place(section.title, headingSize, 18);
+    for (const paragraph of section.paragraphs) {
+      wrap(paragraph, width).forEach((line, i) => place(line, bodySize, i === 0 ? 12 : 0));
+    }
+  }
+  return pages;
+}
+
+/**
+ * Serialize a list of page content streams (plus optional per-page image) into a PDF.
+ * @param {Array<{ content: string, image?: { width: number, height: number, data: Buffer } }>} pages
+ * @returns {Buffer}
+ */
+function buildPdf(pages) {
+  const objects = []; // index i -> object number i + 1
+  const add = (body) => {
+    objects.push(body);
+    return objects.length;
+  };
+
+  const catalog = add(null);
+  const pagesObj = add(null);
+  const font = add(Buffer.from("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"));
+
+  const kids = [];
+  for (const page of pages) {
+    let xobject = "";
+    if (page.image) {
+      const { width, height, data } = page.image;
+      const compressed = zlib.deflateSync(data);
+      const img = add(
+        Buffer.concat([
+          Buffer.from(
+            `<< /Type /XObject /Subtype /Image /Width ${width} /Height ${height} /ColorSpace /DeviceGray ` +
+              `/BitsPerComponent 8 /Filter /FlateDecode /Length ${compressed.length} >>\nstream\n`
+          ),
+          compressed,
+          Buffer.from("\nendstream"),
+        ])
+      );
+      xobject = ` /XObject << /Im1 ${img} 0 R >>`;
+    }
+    const content = Buffer.from(page.content, "latin1");
+    const stream = add(
+      Buffer.concat([Buffer.from(`<< /Length ${content.length} >>\nstream\n`), content, Buffer.from("\nendstream")])
+    );
+    kids.push(
+      add(
+        Buffer.from(
+          `<< /Type /Page /Parent ${pagesObj} 0 R /MediaBox [0 0 ${PAGE_W} ${PAGE_H}] ` +
+            `/Resources << /Font << /F1 ${font} 0 R >>${xobject} >> /Contents ${stream} 0 R >>`
+        )
+      )
+    );
+  }
+
+  objects[catalog - 1] = Buffer.from(`<< /Type /Catalog /Pages ${pagesObj} 0 R >>`);
+  objects[pagesObj - 1] = Buffer.from(
+    `<< /Type /Pages /Kids [${kids.map((k) => `${k} 0 R`).join(" ")}] /Count ${kids.length} >>`
+  );
+
+  const parts = [Buffer.from("%PDF-1.4\n%\xe2\xe3\xcf\xd3\n", "latin1")];
+  let offset = parts[0].length;
+  const offsets = [];
+  objects.forEach((body, i) => {
+    const chunk = Buffer.concat([Buffer.from(`${i + 1} 0 obj\n`), body, Buffer.from("\nendobj\n")]);
+    offsets.push(offset);
+    offset += chunk.length;
+    parts.push(chunk);
+  });
+
+  const xref = [`xref\n0 ${objects.length + 1}\n`, "0000000000 65535 f \n"];
+  for (const o of offsets) xref.push(`${String(o).padStart(10, "0")} 00000 n \n`);
+  xref.push(`trailer\n<< /Size ${objects.length + 1} /Root ${catalog} 0 R >>\nstartxref\n${offset}\n%%EOF\n`);
+  parts.push(Buffer.from(xref.join("")));
+
+  return Buffer.concat(parts);
+}
+
+// Classic 5x7 font, 5 column bytes per glyph (bit 0 = top row)
+const GLYPHS = {
+  " ": [0x00, 0x00, 0x00, 0x00, 0x00], ".": [0x00, 0x60, 0x60, 0x00, 0x00],
+  ",": [0x00, 0x50, 0x30, 0x00, 0x00], "-": [0x08, 0x08, 0x08, 0x08, 0x08],
+  ":": [0x00, 0x36, 0x36, 0x00, 0x00], "?": [0x02, 0x01, 0x51, 0x09, 0x06],
+  "0": [0x3e, 0x51, 0x49, 0x45, 0x3e], "1": [0x00, 0x42, 0x7f, 0x40, 0x00],
+  "2": [0x42, 0x61, 0x51, 0x49, 0x46], "3": [0x21, 0x41, 0x45, 0x4b, 0x31],
+  "4": [0x18, 0x14, 0x12, 0x7f, 0x10], "5": [0x27, 0x45, 0x45, 0x45, 0x39],
+  "6": [0x3c, 0x4a, 0x49, 0x49, 0x30], "7": [0x01, 0x71, 0x09, 0x05, 0x03],
+  "8": [0x36, 0x49, 0x49, 0x49, 0x36], "9": [0x06, 0x49, 0x49, 0x29, 0x1e],
+  A: [0x7e, 0x11, 0x11, 0x11, 0x7e], B: [0x7f, 0x49, 0x49, 0x49, 0x36],
+  C: [0x3e, 0x41, 0x41, 0x41, 0x22], D: [0x7f, 0x41, 0x41, 0x22, 0x1c],
+  E: [0x7f, 0x49, 0x49, 0x49, 0x41], F: [0x7f, 0x09, 0x09, 0x09, 0x01],
+  G: [0x3e, 0x41, 0x49, 0x49, 0x7a], H: [0x7f, 0x08, 0x08, 0x08, 0x7f],
+  I: [0x00, 0x41, 0x7f, 0x41, 0x00], J: [0x20, 0x40, 0x41, 0x3f, 0x01],
+  K: [0x7f, 0x08, 0x14, 0x22, 0x41], L: [0x7f, 0x40, 0x40, 0x40, 0x40],
+  M: [0x7f, 0x02, 0x0c, 0x02, 0x7f], N: [0x7f, 0x04, 0x08, 0x10, 0x7f],
+  O: [0x3e, 0x41, 0x41, 0x41, 0x3e], P: [0x7f, 0x09, 0x09, 0x09, 0x06],
+  Q: [0x3e, 0x41, 0x51, 0x21, 0x5e], R: [0x7f, 0x09, 0x19, 0x29, 0x46],
+  S: [0x46, 0x49, 0x49, 0x49, 0x31], T: [0x01, 0x01, 0x7f, 0x01, 0x01],
+  U: [0x3f, 0x40, 0x40, 0x40, 0x3f], V: [0x1f, 0x20, 0x40, 0x20, 0x1f],
+  W: [0x3f, 0x40, 0x38, 0x40, 0x3f], X: [0x63, 0x14, 0x08, 0x14, 0x63],
+  Y: [0x07, 0x08, 0x70, 0x08, 0x07], Z: [0x61, 0x51, 0x49, 0x45, 0x43],
+};
+
+/**
+ * Render page lines into an 8-bit grayscale bitmap (black text on white), as a
+ * scanner would produce. Glyph dots are `scale` pixels; headings get 1.6x.
+ */
+function rasterize(lines, dpi = 150) {
+  const width = Math.round((PAGE_W / 72) * dpi);
+  const height = Math.round((PAGE_H / 72) * dpi);
+  const px = Buffer.alloc(width * height, 0xff);
+  const toPx = dpi / 72;
+
+  for (const { text, size, y } of lines) {
+    const scale = Math.max(1, Math.round((size / 11) * 1.6 * (dpi / 150) * 1.5));
+    let x = Math.round(72 * toPx);
+    const top = Math.round((PAGE_H - y - size) * toPx);
+    for (const ch of text.toUpperCase()) {
+      const glyph = GLYPHS[ch] || GLYPHS["?"];
+      glyph.forEach((column, cx) => {
+        for (let cy = 0; cy < 7; cy++) {
+          if (!(column & (1 << cy))) continue;
+          for (let dy = 0; dy < scale; dy++) {
+            const row = top + cy * scale + dy;
+            if (row < 0 || row >= height) continue;
+            const start = row * width + x + cx * scale;
+            if (start + scale <= (row + 1) * width) px.fill(0x00, start, start + scale);
+          }
+        }
+      });
+      x += 6 * scale;
+      if (x + 6 * scale >= width) break;
+    }
+  }
+
+  return { width, height, data: px };
+}
+
+/**
+ * Write a lecture PDF: the first `textPages` pages carry a text layer, the rest
+ * are image-only "scans" of the same kind of content.
+ * @param {string} outPath
+ * @param {{ sections: Array<{ title: string, paragraphs: string[] }>, scannedFrom?: number }} opts
+ *   scannedFrom: page index from which pages are rasterized (default: none)
+ * @returns {{ path: string, pages: number, scanned: number }}
+ */
+export function writeLecturePdf(outPath, { sections, scannedFrom = Infinity }) {
+  const pages = layout(sections).map((lines, index) => {
+    if (index >= scannedFrom) {
+      // Scaled image covering the whole page; no text operators at all
+      return { content: `q ${PAGE_W} 0 0 ${PAGE_H} 0 0 cm /Im1 Do Q`, image: rasterize(lines) };
+    }
+    const ops = lines.map(({ text, size, y }) => `BT /F1 ${size} Tf 72 ${y.toFixed(1)} Td (${pdfEscape(text)}) Tj ET`);
+    return { content: ops.join("\n") };
+  });
+
+  fs.mkdirSync(path.dirname(outPath), { recursive: true });
+  fs.writeFileSync(outPath, buildPdf(pages));
+  return { path: outPath, pages: pages.length, scanned: Math.max(0, pages.length - Math.min(scannedFrom, pages.length)) };
+}
+
+/**
+ * Write the standard benchmark fixture set.
+ * @param {string} outDir
+ * @param {{ minutes?: number, pages?: number, scannedPages?: number, seed?: number }} [opts]
+ * @returns {{ wav: string, pdf: string, lecture: string, sections: string, audioSeconds: number, pdfPages: number, scannedPages: number }}
+ */
+export function writeFixtures(outDir, { minutes = 10, pages = 8, scannedPages = 4, seed = 1 } = {}) {
+  fs.mkdirSync(outDir, { recursive: true });
+
+  // Grow the section list until the layout fills the requested page count
+  let count = TOPICS.length;
+  let sections = makeSections(count, seed);
+  while (layout(sections).length < pages) {
+    count += TOPICS.length;
+    sections = makeSections(count, seed);
+  }
+
+  // The last `scannedPages` pages (of however many the layout produced) are scans
+  const pdf = writeLecturePdf(path.join(outDir, "lecture.pdf"), {
+    sections,
+    scannedFrom: Math.max(0, layout(sections).length - scannedPages),
+  });
+  const wav = writeSpeechLikeWav(path.join(outDir, "lecture.wav"), minutes * 60, seed);
+
+  // ~150 spoken words per minute
+  const lecturePath = path.join(outDir, "lecture.txt");
+  fs.writeFileSync(lecturePath, makeLectureText(minutes * 150, seed));
+  const sectionsPath = path.join(outDir, "lecture.sections.json");
+  fs.writeFileSync(sectionsPath, JSON.stringify(sections));
+
+  return {
+    wav,
+    pdf: pdf.path,
+    lecture: lecturePath,
+    sections: sectionsPath,
+    audioSeconds: minutes * 60,
+    pdfPages: pdf.pages,
+    scannedPages: pdf.scanned,
+  };
+}
+
+function parseArgs(argv) {
+  const args = { outDir: path.join(process.cwd(), "bench", ".fixtures") };
+  for (let i = 0; i < argv.length; i++) {
+    const flag = argv[i];
+    if (flag === "--minutes") args.minutes = Number(argv[++i]);
+    else if (flag === "--pages") args.pages = Number(argv[++i]);
+    else if (flag === "--scanned-pages") args.scannedPages = Number(argv[++i]);
+    else if (flag === "--seed") args.seed = Number(argv[++i]);
+    else args.outDir = path.resolve(flag);
+  }
+  return args;
+}
+
+if (process.argv[1] && path.resolve(process.argv[1]) === __filename) {
+  const { outDir, ...opts } = parseArgs(process.argv.slice(2));
+  const written = writeFixtures(outDir, opts);
+  console.log(JSON.stringify(written, null, 2));
+}
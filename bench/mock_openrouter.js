@@ -0,0 +1,192 @@
+/**
+ * Local OpenAI-compatible stand-in for OpenRouter.
+ *
+ * Answers POST <anything>/chat/completions after a configurable latency plus
+ * output-token generation time, with optional injected failures (status code
+ * and Retry-After), so the clients' concurrency, retries and caching can be
+ * measured offline. Replies are plausible notes: one bullet block per "## "
+ * heading found in the prompt, padded to the configured output length.
+ *
+ * Point the clients at it with OPENROUTER_BASE_URL=http://127.0.0.1:<port>/api/v1
+ * (Node callOpenRouter and Python call_openrouter both honour it).
+ *
+ * GET /stats returns call counts and timings; POST /reset clears them.
+ *
+ * Usage:
+ *   node bench/mock_openrouter.js [--port 8787] [--latency 800] [--tokens-per-sec 80]
+ *     [--output-tokens 600] [--error-rate 0] [--error-status 429] [--retry-after 1] [--seed 1]
+ */
+
+import http from "http";
+import path from "path";
+import { fileURLToPath } from "url";
+import { countTokens } from "../token_budget.js";
+import { seededRandom } from "./fixtures.js";
+
+const __filename = fileURLToPath(import.meta.url);
+
+export const DEFAULT_OPTIONS = {
+  port: 8787,
+  latency: 800, // ms before the first token
+  tokensPerSec: 80, // generation speed
+  outputTokens: 600, // reply length (capped by max_tokens)
+  errorRate: 0, // fraction of requests answered with errorStatus
+  errorStatus: 429,
+  retryAfter: null, // seconds, sent with injected errors
+  seed: 1,
+};
+
+function emptyStats() {
+  return {
+    calls: 0,
+    completed: 0,
+    errors: 0,
+    badRequests: 0,
+    inFlight: 0,
+    maxInFlight: 0,
+    promptTokens: 0,
+    completionTokens: 0,
+    busyMs: 0,
+  };
+}
+
+function mockNotes(prompt, outputTokens) {
+  const headings = prompt
+    .split("\n")
+    .filter((line) => line.startsWith("## "))
+    .map((line) => line.slice(3).trim());
+  const blocks = (headings.length ? headings : ["Notes"]).map(
+    (h) => `## ${h}\n- Key definition of ${h.toLowerCase()}.\n- Exam hint: revise ${h.toLowerCase()}.`
+  );
+
+  let text = blocks.join("\n\n");
+  while (countTokens(text) < outputTokens) text += "\n- Supporting point restated from the PDF section.";
+  return text;
+}
+
+function sendJson(res, status, body, headers = {}) {
+  res.writeHead(status, { "Content-Type": "application/json", ...headers });
+  res.end(JSON.stringify(body));
+}
+
+/**
+ * Start the mock server.
+ * @param {Partial<typeof DEFAULT_OPTIONS>} [options] port 0 picks a free port
+ * @returns {Promise<{ url: string, baseUrl: string, stats: ReturnType<typeof emptyStats>, reset: () => void, close: () => Promise<void> }>}
+ */
+export function startMockOpenRouter(options = {}) {
+  const opts = { ...DEFAULT_OPTIONS, ...options };
+  const rand = seededRandom(opts.seed);
+  const state = { stats: emptyStats() };
+
+  const server = http.createServer((req, res) => {
+    if (req.method === "GET" && req.url === "/stats") return sendJson(res, 200, state.stats);
+    if (req.method === "POST" && req.url === "/reset") {
+      state.stats = emptyStats();
+      return sendJson(res, 200, { ok: true });
+    }
+    if (req.method !== "POST" || !req.url.endsWith("/chat/completions")) {
+      return sendJson(res, 404, { error: { message: `No route for ${req.method} ${req.url}` } });
+    }
+
+    let raw = "";
+    req.on("data", (d) => (raw += d));
+    req.on("end", () => {
+      const stats = state.stats;
+      stats.calls++;
+
+      let body;
+      try {
+        body = JSON.parse(raw);
+      } catch {
+        stats.badRequests++;
+        return sendJson(res, 400, { error: { message: "Invalid JSON body" } });
+      }
+      if (!Array.isArray(body.messages) || !body.messages.length) {
+        stats.badRequests++;
+        return sendJson(res, 400, { error: { message: "messages is required" } });
+      }
+
+      if (rand() < opts.errorRate) {
+        stats.errors++;
+        const headers = opts.retryAfter != null ? { "Retry-After": String(opts.retryAfter) } : {};
+        return setTimeout(
+          () => sendJson(res, opts.errorStatus, { error: { message: "Injected failure" } }, headers),
+          Math.min(opts.latency, 100)
+        );
+      }
+
+      const prompt = body.messages.map((m) => m.content ?? "").join("\n");
+      const promptTokens = countTokens(prompt);
+      const completionTokens = Math.min(opts.outputTokens, body.max_tokens ?? Infinity);
+      const content = mockNotes(body.messages[body.messages.length - 1].content ?? "", completionTokens);
+      const delay = opts.latency + (completionTokens / opts.tokensPerSec) * 1000;
+
+      stats.inFlight++;
+      stats.maxInFlight = Math.max(stats.maxInFlight, stats.inFlight);
+      setTimeout(() => {
+        stats.inFlight--;
+        stats.completed++;
+        stats.promptTokens += promptTokens;
+        stats.completionTokens += completionTokens;
+        stats.busyMs += delay;
+        sendJson(res, 200, {
+          id: `mock-${stats.calls}`,
+          object: "chat.completion",
+          created: Math.floor(Date.now() / 1000),
+          model: body.model ?? "mock",
+          choices: [{ index: 0, message: { role: "assistant", content }, finish_reason: "stop" }],
+          usage: {
+            prompt_tokens: promptTokens,
+            completion_tokens: completionTokens,
+            total_tokens: promptTokens + completionTokens,
+          },
+        });
+      }, delay);
+    });
+  });
+
+  return new Promise((resolve, reject) => {
+    server.once("error", reject);
+    server.listen(opts.port, "127.0.0.1", () => {
+      const url = `http://127.0.0.1:${server.address().port}`;
+      resolve({
+        url,
+        baseUrl: `${url}/api/v1`,
+        get stats() {
+          return state.stats;
+        },
+        reset: () => {
+          state.stats = emptyStats();
+        },
+        close: () => new Promise((done) => server.close(() => done())),
+      });
+    });
+  });
+}
+
+function parseArgs(argv) {
+  const flags = {
+    "--port": "port",
+    "--latency": "latency",
+    "--tokens-per-sec": "tokensPerSec",
+    "--output-tokens": "outputTokens",
+    "--error-rate": "errorRate",
+    "--error-status": "errorStatus",
+    "--retry-after": "retryAfter",
+    "--seed": "seed",
+  };
+  const opts = {};
+  for (let i = 0; i < argv.length; i++) {
+    const key = flags[argv[i]];
+    if (!key) throw new Error(`Unknown option: ${argv[i]}`);
+    opts[key] = Number(argv[++i]);
+  }
+  return opts;
+}
+
+if (process.argv[1] && path.resolve(process.argv[1]) === __filename) {
+  const mock = await startMockOpenRouter(parseArgs(process.argv.slice(2)));
+  console.log(`Mock OpenRouter listening on ${mock.url}`);
+  console.log(`  export OPENROUTER_BASE_URL=${mock.baseUrl}`);
+}
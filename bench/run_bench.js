@@ -0,0 +1,278 @@
+/**
+ * End-to-end throughput benchmark, fully offline.
+ *
+ * Generates (or reuses) fixtures, serves them over a local HTTP server in
+ * place of the CDN, points both OpenRouter clients at bench/mock_openrouter.js,
+ * and runs processPdf → processLecture → note generation. Reports per-stage
+ * wall time, the lecture stage's real-time factor (wall time / audio time) and
+ * LLM calls per stage.
+ *
+ * MongoDB is not needed: command buffering is disabled, so processLecture's
+ * save fails fast and is logged (it never fails the run).
+ * Requires the same Python environments as the real pipeline (whisper-env,
+ * PDF_processing/pdf_env) and ffmpeg.
+ *
+ * Usage:
+ *   node bench/run_bench.js [--minutes 10] [--pages 8] [--scanned-pages 4]
+ *     [--wav file.wav] [--pdf file.pdf]         real inputs instead of synthetic ones
+ *     [--latency 800] [--tokens-per-sec 80] [--output-tokens 600] [--error-rate 0]
+ *     [--map-reduce] [--router bm25|tfidf] [--concurrency 4]
+ *     [--skip pdf,lecture,notes] [--live] [--json report.json]
+ *
+ * --live keeps the configured OPENROUTER_BASE_URL (real API, real cost).
+ */
+
+import fs from "fs";
+import http from "http";
+import path from "path";
+import { performance } from "perf_hooks";
+import { writeFixtures } from "./fixtures.js";
+import { startMockOpenRouter } from "./mock_openrouter.js";
+
+function parseArgs(argv) {
+  const args = {
+    minutes: 10,
+    pages: 8,
+    scannedPages: 4,
+    wav: null,
+    pdf: null,
+    latency: 800,
+    tokensPerSec: 80,
+    outputTokens: 600,
+    errorRate: 0,
+    mapReduce: false,
+    router: null,
+    concurrency: 4,
+    skip: new Set(),
+    live: false,
+    json: null,
+  };
+  const numeric = {
+    "--minutes": "minutes",
+    "--pages": "pages",
+    "--scanned-pages": "scannedPages",
+    "--latency": "latency",
+    "--tokens-per-sec": "tokensPerSec",
+    "--output-tokens": "outputTokens",
+    "--error-rate": "errorRate",
+    "--concurrency": "concurrency",
+  };
+  for (let i = 0; i < argv.length; i++) {
+    const flag = argv[i];
+    if (numeric[flag]) args[numeric[flag]] = Number(argv[++i]);
+    else if (flag === "--wav") args.wav = path.resolve(argv[++i]);
+    else if (flag === "--pdf") args.pdf = path.resolve(argv[++i]);
+    else if (flag === "--map-reduce") args.mapReduce = true;
+    else if (flag === "--router") args.router = argv[++i];
+    else if (flag === "--skip") args.skip = new Set(argv[++i].split(","));
+    else if (flag === "--live") args.live = true;
+    else if (flag === "--json") args.json = path.resolve(argv[++i]);
+    else throw new Error(`Unknown option: ${flag}`);
+  }
+  return args;
+}
+
+// ---------- Local "CDN" for the fixtures ----------
+function serveFiles(files) {
+  const server = http.createServer((req, res) => {
+    const file = files[decodeURIComponent(req.url.slice(1))];
+    if (!file) {
+      res.writeHead(404);
+      res.end();
+      return;
+    }
+    const type = file.endsWith(".pdf") ? "application/pdf" : "audio/wav";
+    res.writeHead(200, { "Content-Type": type, "Content-Length": fs.statSync(file).size });
+    fs.createReadStream(file).pipe(res);
+  });
+  return new Promise((resolve) => {
+    server.listen(0, "127.0.0.1", () => {
+      const url = `http://127.0.0.1:${server.address().port}`;
+      resolve({ url, close: () => new Promise((done) => server.close(() => done())) });
+    });
+  });
+}
+
+async function timed(fn) {
+  const t0 = performance.now();
+  const result = await fn();
+  return { result, seconds: (performance.now() - t0) / 1000 };
+}
+
+function llmDelta(mock, before) {
+  if (!mock) return null;
+  const s = mock.stats;
+  return { calls: s.calls - before.calls, completed: s.completed - before.completed, errors: s.errors - before.errors };
+}
+
+async function main() {
+  const args = parseArgs(process.argv.slice(2));
+
+  // ---------- Fixtures ----------
+  const fixturesDir = path.join(process.cwd(), "bench", ".fixtures");
+  const fixtures = writeFixtures(fixturesDir, {
+    minutes: args.minutes,
+    pages: args.pages,
+    scannedPages: args.scannedPages,
+  });
+  const wavPath = args.wav || fixtures.wav;
+  const pdfPath = args.pdf || fixtures.pdf;
+
+  // ---------- Stand-ins (env must be set before the pipeline modules load) ----------
+  let mock = null;
+  if (!args.live) {
+    mock = await startMockOpenRouter({
+      port: 0,
+      latency: args.latency,
+      tokensPerSec: args.tokensPerSec,
+      outputTokens: args.outputTokens,
+      errorRate: args.errorRate,
+      retryAfter: args.errorRate > 0 ? 1 : null,
+    });
+    process.env.OPENROUTER_BASE_URL = mock.baseUrl;
+    process.env.OPENROUTER_KEY = process.env.OPENROUTER_KEY || "bench";
+    process.env.OPENROUTER_CACHE = "0"; // every run pays for every call
+  }
+  process.env.PDF_CACHE = process.env.PDF_CACHE || "0"; // measure extraction, not the sections cache
+  const cdn = await serveFiles({ "lecture.pdf": pdfPath, "lecture.wav": wavPath });
+
+  const mongoose = (await import("mongoose")).default;
+  mongoose.set("bufferCommands", false);
+
+  const { processPdf } = await import("../PDF_processing/pdf_pipeline.js");
+  const { processLecture } = await import("../audio processing/process_lecture.js");
+  const { getAudioDuration } = await import("../audio processing/get_duration.js");
+  const { shutdownTranscriptionPool } = await import("../audio processing/transcription_worker.js");
+  const { shutdownPdfPool } = await import("../PDF_processing/pdf_worker.js");
+  const { callOpenRouter, SYSTEM_PROMPT } = await import("../overall_pipeline.js");
+  const { buildNotesMessage, generateSectionNotes, parseSections } = await import("../section_notes.js");
+  const { countTokens, packPrompt } = await import("../token_budget.js");
+  const { mergeChunkTranscripts } = await import("../transcript_merge.js");
+  const { cleanupTempFiles } = await import("../cleanup.js");
+
+  const hash = `bench-${Date.now()}`;
+  const stages = {};
+  const zero = { calls: 0, completed: 0, errors: 0 };
+
+  try {
+    // ---------- PDF ----------
+    let pdfText = null;
+    let sections = null;
+    if (!args.skip.has("pdf")) {
+      const before = { ...(mock?.stats ?? zero) };
+      const { result, seconds } = await timed(() => processPdf(`${cdn.url}/lecture.pdf`, hash));
+      pdfText = result.text;
+      sections = result.sections;
+      stages.pdf = {
+        seconds,
+        pages: args.pdf ? null : fixtures.pdfPages,
+        scannedPages: args.pdf ? null : fixtures.scannedPages,
+        tokens: countTokens(pdfText),
+        llm: llmDelta(mock, before),
+      };
+    }
+    if (!pdfText) {
+      sections = JSON.parse(fs.readFileSync(fixtures.sections, "utf8"));
+      pdfText = sections.map((s) => [`## ${s.title}`, ...s.paragraphs].join("\n")).join("\n\n");
+    }
+
+    // ---------- Lecture ----------
+    let lectureText = null;
+    if (!args.skip.has("lecture")) {
+      const before = { ...(mock?.stats ?? zero) };
+      const { result, seconds } = await timed(() => processLecture(hash, `${cdn.url}/lecture.wav`));
+      const audioSeconds = await getAudioDuration(result.audioPath);
+      lectureText = mergeChunkTranscripts(result.chunks);
+      stages.lecture = {
+        seconds,
+        audioSeconds,
+        rtf: seconds / audioSeconds,
+        chunks: result.totalChunks,
+        transcribedChunks: result.processedChunks,
+        tokens: countTokens(lectureText),
+        llm: llmDelta(mock, before),
+      };
+    }
+    let transcriptSource = "pipeline";
+    if (!lectureText?.trim()) {
+      // Synthetic audio may decode to nothing; keep the notes stage measurable
+      lectureText = fs.readFileSync(fixtures.lecture, "utf8");
+      transcriptSource = "fixture";
+    }
+
+    // ---------- Notes ----------
+    if (!args.skip.has("notes")) {
+      const before = { ...(mock?.stats ?? zero) };
+      const { result, seconds } = await timed(async () => {
+        if (args.mapReduce || args.router) {
+          return generateSectionNotes({
+            sections: sections || parseSections(pdfText),
+            lectureText,
+            systemPrompt: SYSTEM_PROMPT,
+            callLLM: (message, systemPrompt) => callOpenRouter(message, systemPrompt),
+            concurrency: args.concurrency,
+            router: args.router,
+          });
+        }
+        const packed = packPrompt({ systemPrompt: SYSTEM_PROMPT, pdfText, lectureText, buildMessage: buildNotesMessage });
+        return { notes: await callOpenRouter(packed.message, SYSTEM_PROMPT), groups: 1 };
+      });
+      stages.notes = {
+        seconds,
+        mode: args.router ? `map-reduce + ${args.router}` : args.mapReduce ? "map-reduce" : "single",
+        groups: result.groups,
+        transcript: transcriptSource,
+        outputTokens: countTokens(result.notes),
+        llm: llmDelta(mock, before),
+      };
+    }
+  } finally {
+    await shutdownTranscriptionPool();
+    await shutdownPdfPool();
+    await cdn.close();
+    if (mock) await mock.close();
+    cleanupTempFiles(hash);
+  }
+
+  // ---------- Report ----------
+  const total = Object.values(stages).reduce((sum, s) => sum + s.seconds, 0);
+  const report = {
+    hash,
+    llm: args.live ? "live" : { latencyMs: args.latency, tokensPerSec: args.tokensPerSec, errorRate: args.errorRate },
+    stages,
+    totalSeconds: total,
+  };
+
+  console.log("\n=== Benchmark ===");
+  const fmtLlm = (llm) => (llm ? `${llm.completed} ok / ${llm.errors} err` : "n/a");
+  if (stages.pdf) {
+    const p = stages.pdf;
+    const pages = p.pages != null ? `${p.pages} pages (${p.scannedPages} scanned), ` : "";
+    console.log(`pdf      ${p.seconds.toFixed(2).padStart(8)} s  ${pages}${p.tokens} tokens  LLM: ${fmtLlm(p.llm)}`);
+  }
+  if (stages.lecture) {
+    const l = stages.lecture;
+    console.log(
+      `lecture  ${l.seconds.toFixed(2).padStart(8)} s  ${l.audioSeconds.toFixed(0)} s audio, RTF ${l.rtf.toFixed(3)}, ` +
+        `${l.transcribedChunks}/${l.chunks} chunks, ${l.tokens} tokens  LLM: ${fmtLlm(l.llm)}`
+    );
+  }
+  if (stages.notes) {
+    const n = stages.notes;
+    console.log(
+      `notes    ${n.seconds.toFixed(2).padStart(8)} s  ${n.mode}, ${n.groups} request(s), ` +
+        `${n.transcript} transcript, ${n.outputTokens} tokens out  LLM: ${fmtLlm(n.llm)}`
+    );
+  }
+  console.log(`total    ${total.toFixed(2).padStart(8)} s`);
+
+  if (args.json) {
+    fs.writeFileSync(args.json, JSON.stringify(report, null, 2));
+    console.log(`Report written to ${args.json}`);
+  }
+}
+
+main().catch((err) => {
+  console.error("Benchmark failed:", err?.stack || String(err));
+  process.exit(1);
+});
@@ -43,6 +43,7 @@ export function cleanupTempFiles(lectureHash) {
     path.join(cwd, AUDIOS_DIR, "chunks", lectureHash),
     path.join(cwd, PDFS_DIR, `${lectureHash}.pdf`),
     path.join(cwd, PDFS_DIR, `${lectureHash}.txt`),
+    path.join(cwd, PDFS_DIR, `${lectureHash}.sections.json`),
   ];
 
   for (const p of targets) {
@@ -3,6 +3,8 @@ Generate structured academic notes from PDF and lecture transcript.
 
 Paste your PDF content and lecture transcript below, then run:
     python generate_notes.py
+    python generate_notes.py --map-reduce   # one request per PDF section group, in parallel
+    python generate_notes.py --route        # map-reduce, each group gets only its BM25-matched transcript
 """
 
 import sys
@@ -10,7 +12,8 @@ import os
 
 # Add parent directory to path to import from openRouter
 sys.path.append(os.path.join(os.path.dirname(__file__), '.'))
-from openRouter.openrouter import call_openrouter
+from openRouter.openrouter import call_openrouter, call_openrouter_many
+from openRouter.token_budget import describe, pack_prompt
 
 # =========================
 # PASTE YOUR CONTENT HERE
@@ -342,6 +345,23 @@ Structured notes strictly aligned to the PDF, enhanced only where the lecture ex
 # GENERATE AND OUTPUT NOTES
 # =========================
 
+NOTES_INSTRUCTION = "Generate structured academic notes following the PDF structure, enhanced only where the lecture explicitly adds value."
+
+
+def build_user_message(pdf_text, lecture_text, instruction=NOTES_INSTRUCTION):
+    return f"""PDF CONTENT (AUTHORITATIVE SOURCE):
+{pdf_text}
+
+---
+
+LECTURE TRANSCRIPT (SECONDARY SOURCE):
+{lecture_text}
+
+---
+
+{instruction}"""
+
+
 def generate_notes(pdf_text, lecture_text, model="tngtech/deepseek-r1t2-chimera:free", **kwargs):
     """
     Generate structured academic notes from PDF and lecture transcript.
@@ -352,18 +372,13 @@ def generate_notes(pdf_text, lecture_text, model="tngtech/deepseek-r1t2-chimera:
     if not lecture_text or not lecture_text.strip():
         raise ValueError("Lecture text cannot be empty")
     
-    # Construct user message with both inputs
-    user_message = f"""PDF CONTENT (AUTHORITATIVE SOURCE):
-{pdf_text}
-
----
-
-LECTURE TRANSCRIPT (SECONDARY SOURCE):
-{lecture_text}
-
----
-
-Generate structured academic notes following the PDF structure, enhanced only where the lecture explicitly adds value."""
+    # Construct user message with both inputs, trimmed to the context (PDF first)
+    packed = pack_prompt(
+        SYSTEM_PROMPT, pdf_text, lecture_text, build_user_message,
+        output_tokens=kwargs.get("max_tokens"),
+    )
+    print(describe(packed), file=sys.stderr)
+    user_message = packed["message"]
     
     # Call LLM with system prompt
     notes = call_openrouter(
@@ -376,10 +391,195 @@ Generate structured academic notes following the PDF structure, enhanced only wh
     return notes
 
 
+# =========================
+# MAP-REDUCE (PER SECTION)
+# =========================
+
+SECTION_INSTRUCTION = "Generate structured academic notes for these PDF sections only, following their structure, enhanced only where the lecture explicitly adds value."
+
+
+def parse_sections(pdf_text):
+    """
+    Split extracted PDF text ("## Title" + body, as written by
+    PDF_processing/pdf_summariser_ocr.py) into build_sections-style dicts.
+    """
+    sections = []
+    current = None
+
+    for line in pdf_text.splitlines():
+        if line.startswith("## "):
+            current = {"title": line[3:].strip(), "paragraphs": []}
+            sections.append(current)
+        elif line.strip():
+            if current is None:
+                current = {"title": "Introduction", "paragraphs": []}
+                sections.append(current)
+            current["paragraphs"].append(line.strip())
+
+    return sections
+
+
+def section_text(section):
+    return "\n".join([f"## {section['title']}", *section["paragraphs"]])
+
+
+def group_sections(sections, max_chars=8000):
+    """
+    Pack consecutive sections into groups of at most ~max_chars of PDF text, so
+    heading-only and tiny sections don't each cost a request. A section larger
+    than max_chars gets a group of its own.
+
+    Returns:
+        list: Groups (lists of sections) in PDF order
+    """
+    groups = []
+    current, size = [], 0
+
+    for section in sections:
+        length = len(section_text(section))
+        if current and size + length > max_chars:
+            groups.append(current)
+            current, size = [], 0
+        current.append(section)
+        size += length
+
+    if current:
+        groups.append(current)
+
+    return groups
+
+
+def group_text(group):
+    return "\n\n".join(section_text(s) for s in group)
+
+
+def slice_transcript(weights, lecture_text, overlap=0.05):
+    """
+    Contiguous transcript slice per group, proportional to each group's share
+    of the PDF (lectures walk the PDF in order), widened by `overlap` (a
+    fraction of the whole transcript) on both sides to absorb drift.
+    """
+    words = lecture_text.split()
+    total = sum(weights) or 1
+    margin = int(len(words) * overlap)
+
+    slices = []
+    start = 0.0
+    for weight in weights:
+        end = start + weight / total
+        lo = max(0, int(start * len(words)) - margin)
+        hi = min(len(words), int(round(end * len(words))) + margin)
+        slices.append(" ".join(words[lo:hi]))
+        start = end
+
+    return slices
+
+
+def routed_transcript(groups, lecture_text, router="bm25", top_k=3):
+    """
+    Transcript per group from section_router: the passages its sections
+    matched (top_k windows each), merged, in transcript order. Passages no
+    section matched are left out entirely.
+    """
+    from section_router import SectionRouter, merge_spans  # needs numpy
+
+    sections = [s for g in groups for s in g]
+    routed = SectionRouter(sections, scoring=router).route(lecture_text, top_k=top_k)
+    words = lecture_text.split()
+
+    slices, i = [], 0
+    for group in groups:
+        spans = merge_spans([tuple(span) for ss in routed["spans"][i:i + len(group)] for span in ss])
+        slices.append(" ... ".join(" ".join(words[a:b]) for a, b in spans))
+        i += len(group)
+
+    print(
+        f"Routed {routed['kept_words']}/{routed['total_words']} transcript words to sections",
+        file=sys.stderr,
+    )
+    return slices
+
+
+def generate_notes_by_section(
+    pdf,
+    lecture_text,
+    model="tngtech/deepseek-r1t2-chimera:free",
+    max_concurrency=4,
+    max_section_chars=8000,
+    overlap=0.05,
+    router=None,
+    top_k=3,
+    **kwargs
+):
+    """
+    Map-reduce note generation: one request per group of PDF sections, each
+    with only its slice of the transcript, sent concurrently and stitched back
+    in PDF order. Wall-clock time follows the slowest group rather than the
+    total input size, and every request stays far below the context limit.
+
+    Args:
+        pdf: Sections from build_sections ([{"title", "paragraphs"}]) or extracted PDF text
+        lecture_text: Merged lecture transcript
+        max_concurrency: Requests in flight at once
+        max_section_chars: PDF characters per request (consecutive sections are packed together)
+        overlap: Extra transcript on each side of a slice, as a fraction of the transcript
+        router: "bm25" or "tfidf" to send each group only the transcript passages
+            its sections match (section_router.py) instead of a proportional slice
+        top_k: Passages kept per section when routing
+        **kwargs: Passed through to call_openrouter
+    """
+    sections = parse_sections(pdf) if isinstance(pdf, str) else pdf
+    sections = [s for s in sections if s["title"].strip() or s["paragraphs"]]
+
+    if not sections:
+        raise ValueError("PDF text cannot be empty")
+
+    if not lecture_text or not lecture_text.strip():
+        raise ValueError("Lecture text cannot be empty")
+
+    groups = group_sections(sections, max_section_chars)
+    texts = [group_text(g) for g in groups]
+    if router:
+        slices = routed_transcript(groups, lecture_text, router, top_k)
+    else:
+        slices = slice_transcript([len(t) for t in texts], lecture_text, overlap)
+
+    messages = []
+    for i, (text, transcript) in enumerate(zip(texts, slices), 1):
+        packed = pack_prompt(
+            SYSTEM_PROMPT, text, transcript,
+            lambda p, l: build_user_message(p, l, SECTION_INSTRUCTION),
+            output_tokens=kwargs.get("max_tokens"),
+        )
+        print(f"Group {i}/{len(texts)}: {describe(packed)}", file=sys.stderr)
+        messages.append(packed["message"])
+
+    notes = call_openrouter_many(
+        messages,
+        max_concurrency=max_concurrency,
+        model=model,
+        system_prompt=SYSTEM_PROMPT,
+        **kwargs
+    )
+
+    # A reply without content would otherwise surface as an AttributeError here
+    for i, (group, note) in enumerate(zip(groups, notes), 1):
+        if note is None:
+            titles = ", ".join(s["title"] or "(untitled)" for s in group)
+            raise ValueError(f"Group {i}/{len(groups)} ({titles}) returned no notes")
+
+    return "\n\n".join(n.strip() for n in notes)
+
+
 if __name__ == "__main__":
     print("Generating notes...")
     try:
-        notes = generate_notes(pdf, lecture)
+        if "--route" in sys.argv:
+            notes = generate_notes_by_section(pdf, lecture, router="bm25")
+        elif "--map-reduce" in sys.argv:
+            notes = generate_notes_by_section(pdf, lecture)
+        else:
+            notes = generate_notes(pdf, lecture)
         print("\n" + "="*80)
         print("GENERATED NOTES")
         print("="*80)
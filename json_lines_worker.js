@@ -0,0 +1,183 @@
+import { spawn } from "child_process";
+import readline from "readline";
+
+/**
+ * Long-lived Python process answering JSON-lines jobs.
+ *
+ * Each request is written to the child's stdin as `{ id, ...payload }` and
+ * settled by the stdout line carrying the same id (`{ id, error }` rejects).
+ * The process is spawned lazily on the first job and respawned by the next
+ * job if it dies; jobs in flight when it dies are rejected.
+ *
+ * Shared by TranscriptionWorker (process_chunk.py --worker) and PdfWorker
+ * (pdf_summariser_ocr.py --worker).
+ */
+export class JsonLinesWorker {
+  /**
+   * @param {Object} opts
+   * @param {string} opts.name - For errors and log lines, e.g. "PDF worker"
+   * @param {string|(() => string)} opts.pythonCmd - Interpreter, or a resolver called at spawn time
+   * @param {string[]} opts.args - Script and arguments
+   * @param {string} opts.cwd - Working directory (so the script's local imports work)
+   * @param {Object} [opts.env] - Added to process.env
+   * @param {(text: string) => boolean} [opts.logStderr] - Which stderr output to echo
+   */
+  constructor({ name, pythonCmd, args, cwd, env = {}, logStderr = (text) => Boolean(text.trim()) }) {
+    this.name = name;
+    this.pythonCmd = pythonCmd;
+    this.args = args;
+    this.cwd = cwd;
+    this.env = env;
+    this.logStderr = logStderr;
+    this.child = null;
+    this.nextId = 1;
+    this.pending = new Map();
+    this.stderrTail = "";
+  }
+
+  start() {
+    if (this.child) return this.child;
+
+    const pythonCmd = typeof this.pythonCmd === "function" ? this.pythonCmd() : this.pythonCmd;
+    const child = spawn(pythonCmd, this.args, {
+      cwd: this.cwd,
+      env: { ...process.env, ...this.env },
+      stdio: ["pipe", "pipe", "pipe"],
+    });
+
+    readline.createInterface({ input: child.stdout }).on("line", (line) => {
+      this.handleLine(line);
+    });
+
+    child.stderr.on("data", (data) => {
+      const text = data.toString();
+      // Keep only the last bit of stderr for error reporting
+      this.stderrTail = (this.stderrTail + text).slice(-2000);
+      if (this.logStderr(text)) {
+        console.error(`[${this.name.toLowerCase()}] ${text.trimEnd()}`);
+      }
+    });
+
+    // A write to a worker that died (or is exiting) fails with EPIPE here;
+    // unhandled, that error would take down the whole Node process
+    child.stdin.on("error", (err) => this.handleExit(err, child));
+    child.on("error", (err) => this.handleExit(err, child));
+    child.on("exit", (code, signal) => {
+      this.handleExit(
+        new Error(
+          `${this.name} exited (code=${code}, signal=${signal})` +
+          (this.stderrTail ? `: ${this.stderrTail.trim()}` : "")
+        ),
+        child
+      );
+    });
+
+    this.child = child;
+    return child;
+  }
+
+  handleLine(line) {
+    let reply;
+    try {
+      reply = JSON.parse(line);
+    } catch {
+      console.warn(`[${this.name.toLowerCase()}] ignoring non-JSON output: ${line}`);
+      return;
+    }
+
+    const job = this.pending.get(reply.id);
+    if (!job) return;
+    this.pending.delete(reply.id);
+
+    if (reply.error) {
+      job.reject(new Error(reply.error));
+    } else {
+      job.resolve(reply);
+    }
+  }
+
+  handleExit(err, child) {
+    // Only the current process: a stale one's late exit must not fail a respawn's jobs
+    if (!this.child || this.child !== child) return;
+    this.child = null;
+    for (const job of this.pending.values()) {
+      job.reject(err);
+    }
+    this.pending.clear();
+  }
+
+  /**
+   * Send a job to the worker.
+   * @param {Object} payload - Job fields
+   * @returns {Promise<Object>} Worker reply
+   */
+  request(payload) {
+    const child = this.start();
+    const id = this.nextId++;
+
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject });
+      child.stdin.write(JSON.stringify({ id, ...payload }) + "\n");
+    });
+  }
+
+  /**
+   * Stop the worker. Closing stdin lets the Python loop exit cleanly.
+   */
+  close() {
+    if (!this.child) return Promise.resolve();
+    const child = this.child;
+    return new Promise((resolve) => {
+      child.once("exit", () => resolve());
+      child.stdin.end();
+    });
+  }
+}
+
+/**
+ * Fixed set of workers with a FIFO job queue: each task runs on the next
+ * free worker, so at most one task per worker is in flight.
+ */
+export class WorkerPool {
+  /**
+   * @param {JsonLinesWorker[]} workers
+   */
+  constructor(workers) {
+    this.workers = workers;
+    this.size = workers.length;
+    this.idle = [...workers];
+    this.queue = [];
+  }
+
+  /**
+   * Queue a task; it runs as soon as a worker is free.
+   * @template T
+   * @param {(worker: JsonLinesWorker) => Promise<T>} task
+   * @returns {Promise<T>}
+   */
+  run(task) {
+    return new Promise((resolve, reject) => {
+      this.queue.push({ task, resolve, reject });
+      this.dispatch();
+    });
+  }
+
+  dispatch() {
+    while (this.idle.length && this.queue.length) {
+      const worker = this.idle.pop();
+      const job = this.queue.shift();
+
+      Promise.resolve()
+        .then(() => job.task(worker))
+        .then(job.resolve, job.reject)
+        .finally(() => {
+          this.idle.push(worker);
+          this.dispatch();
+        });
+    }
+  }
+
+  close() {
+    return Promise.all(this.workers.map((w) => w.close()));
+  }
+}
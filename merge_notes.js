@@ -3,6 +3,8 @@ import { configDotenv } from "dotenv";
 import fs from "fs";
 import path from "path";
 import ProcessedLecture from "./models/processedLectures.js";
+import { mergeChunkTranscripts } from "./transcript_merge.js";
+import { countTokens, tokenizerName } from "./token_budget.js";
 
 configDotenv();
 
@@ -15,11 +17,6 @@ async function connectDB() {
   if (state !== 1) throw new Error("MongoDB not connected");
 }
 
-// Approx: 1 token ≈ 4 characters (rough but useful)
-function countTokens(text) {
-  return Math.ceil(text.length / 4);
-}
-
 function countWords(text) {
   return text.trim().split(/\s+/).filter((w) => w.length > 0).length;
 }
@@ -52,11 +49,7 @@ async function exportMergedNotesToFile({ lectureHash, outPath }) {
   let totalTokens = 0;
 
   for (const lecture of processedLectures) {
-    const sortedChunks = (lecture.processedChunks ?? [])
-      .slice()
-      .sort((a, b) => a.chunkNumber - b.chunkNumber);
-
-    const mergedText = sortedChunks.map((chunk) => chunk.text).join("\n\n");
+    const mergedText = mergeChunkTranscripts(lecture.processedChunks);
 
     const chars = mergedText.length;
     const words = countWords(mergedText);
@@ -82,11 +75,11 @@ async function exportMergedNotesToFile({ lectureHash, outPath }) {
   writeStream.write(`Total Lectures: ${processedLectures.length}\n`);
   writeStream.write(`Total Characters: ${totalCharacters}\n`);
   writeStream.write(`Total Words: ${totalWords}\n`);
-  writeStream.write(`Total Tokens (approx): ${totalTokens}\n`);
+  writeStream.write(`Total Tokens (${tokenizerName()}): ${totalTokens}\n`);
   writeStream.write(`${"=".repeat(80)}\n`);
   writeStream.end();
 
-  return { outPath: resolvedOutPath, totalLectures: processedLectures.length };
+  return { outPath: resolvedOutPath, totalLectures: processedLectures.length, totalTokens };
 }
 
 function printUsageAndExit() {
@@ -114,7 +107,7 @@ async function main() {
   const outPath = outPathArg ? path.resolve(process.cwd(), outPathArg) : undefined;
 
   const result = await exportMergedNotesToFile({ lectureHash, outPath });
-  console.log(`✓ Notes exported to: ${result.outPath}`);
+  console.log(`✓ Notes exported to: ${result.outPath} (${result.totalTokens} tokens, ${tokenizerName()})`);
 }
 
 if (import.meta.url === `file://${process.argv[1]}`) {
@@ -25,7 +25,16 @@ const ProcessedLectureSchema = new mongoose.Schema(
         text: {
           type: String,
           required: true
-        }
+        },
+        // Raw (pre-cleanup) segments, trimmed at the seam with the next chunk
+        segments: [
+          {
+            _id: false,
+            start: Number,
+            end: Number,
+            text: String
+          }
+        ]
       }
     ],
     totalChunks: {
@@ -0,0 +1,177 @@
+"""
+Content-addressed response cache for call_openrouter.
+
+Responses are stored in a local SQLite file keyed by a SHA-256 of
+(model, system_prompt, message, kwargs), so re-running a stage with the exact
+same request is served from disk instead of the network.
+
+Configuration (environment):
+    OPENROUTER_CACHE=1                enable the cache in call_openrouter
+    OPENROUTER_CACHE_BYPASS=1         skip lookups (responses are still stored)
+    OPENROUTER_CACHE_PATH             SQLite file (default: openRouter/.cache/responses.sqlite)
+    OPENROUTER_CACHE_TTL              seconds an entry stays valid (default 7 days, 0 = forever)
+    OPENROUTER_CACHE_MAX_ENTRIES      LRU bound on entry count (default 10000)
+    OPENROUTER_CACHE_MAX_MB           LRU bound on stored response size (default 256)
+
+Usage:
+    python openRouter/cache.py stats
+    python openRouter/cache.py clear
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "responses.sqlite")
+
+
+class ResponseCache:
+    """SQLite-backed LRU cache with TTL and persistent hit/miss counters."""
+
+    def __init__(self, path: str = None, ttl: float = None, max_entries: int = None, max_bytes: int = None):
+        self.path = path or os.getenv("OPENROUTER_CACHE_PATH") or DEFAULT_PATH
+        self.ttl = float(os.getenv("OPENROUTER_CACHE_TTL", 7 * 24 * 3600)) if ttl is None else ttl
+        self.max_entries = int(os.getenv("OPENROUTER_CACHE_MAX_ENTRIES", 10000)) if max_entries is None else max_entries
+        self.max_bytes = (
+            int(float(os.getenv("OPENROUTER_CACHE_MAX_MB", 256)) * 1024 * 1024)
+            if max_bytes is None else max_bytes
+        )
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # One connection shared by all threads, serialized by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, message: str, kwargs: dict) -> str:
+        """SHA-256 over a canonical JSON encoding of the request."""
+        payload = json.dumps(
+            {"model": model, "system_prompt": system_prompt, "message": message, "kwargs": kwargs},
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, name: str, n: int = 1):
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, n),
+        )
+
+    def get(self, key: str):
+        """Cached response for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self.ttl > 0 and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+
+            if row is None:
+                self._count("misses")
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._count("hits")
+            return row[0]
+
+    def put(self, key: str, value: str):
+        """Store a response, then evict least-recently-used entries over the bounds."""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            evicted += 1
+
+        self._count("evictions", evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+        return {
+            "path": self.path,
+            "entries": count,
+            "bytes": total,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+        }
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM counters")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide cache instance, configured from the environment."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache()
+        return _shared_cache
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = get_response_cache()
+
+    if command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+    elif command == "clear":
+        cache.clear()
+        print(f"Cleared {cache.path}")
+    else:
+        print("Usage: python openRouter/cache.py [stats|clear]", file=sys.stderr)
+        sys.exit(1)
@@ -1,42 +1,159 @@
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+try:
+    from openRouter.cache import get_response_cache
+    from openRouter.token_budget import check_prompt
+except ImportError:  # run as a script from inside openRouter/
+    from cache import get_response_cache
+    from token_budget import check_prompt
+
 # Load environment variables from .env file
 load_dotenv()
 
+# =========================
+# CLIENT CONFIG
+# =========================
+BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+CONNECT_TIMEOUT = float(os.getenv("OPENROUTER_CONNECT_TIMEOUT", 10))
+READ_TIMEOUT = float(os.getenv("OPENROUTER_READ_TIMEOUT", 300))   # long generations
+MAX_RETRIES = int(os.getenv("OPENROUTER_MAX_RETRIES", 4))
+BACKOFF_BASE = float(os.getenv("OPENROUTER_BACKOFF_BASE", 1.0))    # seconds
+BACKOFF_MAX = float(os.getenv("OPENROUTER_BACKOFF_MAX", 60.0))     # seconds
+POOL_SIZE = int(os.getenv("OPENROUTER_POOL_SIZE", 16))
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session, so calls reuse pooled TLS connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _retry_after(response) -> float:
+    """Seconds requested by a Retry-After header (delta-seconds or HTTP date), or None."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int, response=None) -> float:
+    """Delay before retry `attempt` (0-based): Retry-After if given, else exponential with full jitter."""
+    requested = _retry_after(response)
+    if requested is not None:
+        return min(requested, BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _post_with_retries(url, headers, payload, timeout, max_retries):
+    for attempt in range(max_retries + 1):
+        response = None
+        try:
+            response = get_session().post(url=url, headers=headers, json=payload, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == max_retries:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                # Check if request was successful
+                response.raise_for_status()
+                return response
+
+        time.sleep(_backoff(attempt, response))
+
 
 def call_openrouter(
     message: str,
     model: str = "tngtech/deepseek-r1t2-chimera:free",
     api_key: str = None,
     system_prompt: str = None,
+    cache: bool = None,
+    cache_bypass: bool = None,
+    timeout: tuple = None,
+    max_retries: int = None,
     **kwargs
 ) -> str:
     """
     Call OpenRouter API to get a chat completion response.
-    
+
+    Requests go through a shared keep-alive session. Connection errors,
+    timeouts and 408/429/5xx responses are retried with exponential backoff
+    (honouring Retry-After). Prompts that cannot fit the model context
+    (LLM_CONTEXT_TOKENS, see openRouter/token_budget.py) fail before any request.
+
     Args:
         message: The user message to send
         model: The model to use (default: "tngtech/deepseek-r1t2-chimera:free")
         api_key: OpenRouter API key (defaults to OPENROUTER_KEY env var)
         system_prompt: Optional system prompt
+        cache: Serve/store the response from the local response cache
+            (defaults to OPENROUTER_CACHE=1; see openRouter/cache.py)
+        cache_bypass: Skip the cache lookup but still store the fresh response
+            (defaults to OPENROUTER_CACHE_BYPASS=1)
+        timeout: (connect, read) seconds (defaults to OPENROUTER_CONNECT_TIMEOUT / OPENROUTER_READ_TIMEOUT)
+        max_retries: Retries after the first attempt (defaults to OPENROUTER_MAX_RETRIES)
         **kwargs: Additional parameters to pass to the API (temperature, max_tokens, etc.)
-    
+
     Returns:
         str: The response content from the model
-    
+
     Raises:
         ValueError: If API key is not found
-        requests.RequestException: If the API request fails
+        PromptTooLargeError: If the prompt leaves less than max_tokens / LLM_OUTPUT_TOKENS of the context
+        requests.RequestException: If the API request fails after all retries
     """
     # Get API key from parameter or environment
     if api_key is None:
         api_key = os.getenv('OPENROUTER_KEY')
-    
+
     if not api_key:
         raise ValueError("OPENROUTER_KEY not found in environment variables. Please check your .env file.")
-    
+
+    # Response cache (opt-in): identical requests are answered from disk
+    if cache is None:
+        cache = os.getenv("OPENROUTER_CACHE") == "1"
+    if cache_bypass is None:
+        cache_bypass = os.getenv("OPENROUTER_CACHE_BYPASS") == "1"
+
+    store = get_response_cache() if cache else None
+    cache_key = None
+    if store is not None:
+        cache_key = store.make_key(model, system_prompt, message, kwargs)
+        if not cache_bypass:
+            cached = store.get(cache_key)
+            if cached is not None:
+                return cached
+
+    # Refuse prompts that can't fit before paying for the round trip
+    check_prompt(message, system_prompt, output_tokens=kwargs.get("max_tokens"))
+
     # Build messages array
     messages = []
     if system_prompt:
@@ -48,17 +165,17 @@ def call_openrouter(
         "role": "user",
         "content": message
     })
-    
+
     # Prepare request payload
     payload = {
         "model": model,
         "messages": messages,
         **kwargs  # Allow additional parameters like temperature, max_tokens, etc.
     }
-    
+
     # Make the API request
-    response = requests.post(
-        url="https://openrouter.ai/api/v1/chat/completions",
+    response = _post_with_retries(
+        url=f"{BASE_URL}/chat/completions",
         headers={
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
@@ -66,22 +183,60 @@ def call_openrouter(
             # "HTTP-Referer": "https://your-site.com",
             # "X-Title": "Your Site Name",
         },
-        json=payload
+        payload=payload,
+        timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT),
+        max_retries=MAX_RETRIES if max_retries is None else max_retries,
     )
-    
-    # Check if request was successful
-    response.raise_for_status()
-    
+
     # Parse and extract the response
     result = response.json()
-    
+
     if 'choices' in result and len(result['choices']) > 0:
-        return result['choices'][0]['message']['content']
+        content = result['choices'][0]['message']['content']
+        if store is not None and content is not None:
+            store.put(cache_key, content)
+        return content
     else:
         raise ValueError("No response content found in API response")
 
 
+def call_openrouter_many(
+    requests_list: list,
+    max_concurrency: int = 4,
+    return_exceptions: bool = False,
+    **common
+) -> list:
+    """
+    Run several call_openrouter requests concurrently over the shared session.
+
+    Args:
+        requests_list: Messages (str) or dicts of call_openrouter arguments
+            (e.g. {"message": ..., "system_prompt": ...})
+        max_concurrency: Upper bound on requests in flight
+        return_exceptions: Put exceptions in the result list instead of raising the first one
+        **common: Arguments applied to every request (per-request dict values win)
+
+    Returns:
+        list: Responses in the same order as requests_list
+    """
+    def run(request):
+        call_kwargs = dict(common)
+        call_kwargs.update(request if isinstance(request, dict) else {"message": request})
+        try:
+            return call_openrouter(**call_kwargs)
+        except Exception as e:
+            if return_exceptions:
+                return e
+            raise
+
+    if not requests_list:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(requests_list)))) as pool:
+        return list(pool.map(run, requests_list))
+
+
 # Example usage (for testing)
 if __name__ == "__main__":
     response = call_openrouter("What is the meaning of life?")
-    print(response)
\ No newline at end of file
+    print(response)
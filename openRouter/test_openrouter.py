@@ -0,0 +1,241 @@
+"""
+Retry and concurrency tests for openrouter.py against a local HTTP server.
+
+Run from the repository root: python -m pytest openRouter
+"""
+import importlib
+import json
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+
+# =========================
+# LOCAL OPENROUTER
+# =========================
+class FakeOpenRouter(ThreadingHTTPServer):
+    """
+    /chat/completions endpoint answering from a script: each request pops the
+    next (status, headers, delay) step, and the last step repeats. Messages in
+    fail_messages get a 400, messages in delays wait that long. 200 replies
+    echo the user message back as the completion.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.script = [(200, {}, 0)]
+        self.fail_messages = set()
+        self.delays = {}
+        self.messages = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.release = threading.Event()   # ends delays early at teardown
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def attempts(self):
+        return len(self.messages)
+
+    def next_step(self, message):
+        with self.lock:
+            self.messages.append(message)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            step = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        status, headers, delay = step
+        if message in self.fail_messages:
+            status, headers = 400, {}
+        return status, headers, self.delays.get(message, delay)
+
+    def done(self):
+        with self.lock:
+            self.in_flight -= 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        message = body["messages"][-1]["content"]
+        status, headers, delay = self.server.next_step(message)
+        try:
+            if delay:
+                self.server.release.wait(delay)
+            payload = {"choices": [{"message": {"content": f"echo: {message}"}}]} if status == 200 else {"error": status}
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out and went away
+        finally:
+            self.server.done()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = FakeOpenRouter()
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.release.set()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def client(server, monkeypatch):
+    """openrouter imported against the local server, with backoff sleeps recorded instead of slept."""
+    monkeypatch.setenv("OPENROUTER_BASE_URL", server.url)
+    monkeypatch.setenv("OPENROUTER_KEY", "test-key")
+    monkeypatch.delenv("OPENROUTER_CACHE", raising=False)
+    import openrouter
+    openrouter = importlib.reload(openrouter)
+
+    sleeps = []
+    monkeypatch.setattr(openrouter, "time", _Clock(sleeps))
+    openrouter.sleeps = sleeps
+    yield openrouter
+    if openrouter._session is not None:
+        openrouter._session.close()
+
+
+class _Clock:
+    """Stands in for the time module inside openrouter: sleep() only records."""
+
+    def __init__(self, sleeps):
+        self.sleeps = sleeps
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+    def time(self):
+        return time.time()
+
+
+# =========================
+# RETRIES
+# =========================
+def test_429_retry_after_seconds_then_success(server, client):
+    server.script = [(429, {"Retry-After": "7"}, 0), (200, {}, 0)]
+
+    assert client.call_openrouter("hello") == "echo: hello"
+    assert server.attempts == 2
+    assert client.sleeps == [7.0]
+
+
+def test_429_retry_after_http_date_then_success(server, client):
+    server.script = [(429, {"Retry-After": formatdate(time.time() + 30, usegmt=True)}, 0), (200, {}, 0)]
+
+    assert client.call_openrouter("hello") == "echo: hello"
+    assert server.attempts == 2
+    assert len(client.sleeps) == 1
+    # HTTP dates have whole-second resolution
+    assert 28 <= client.sleeps[0] <= 30
+
+
+def test_retry_after_is_capped_at_backoff_max(server, client):
+    server.script = [(503, {"Retry-After": str(10 * client.BACKOFF_MAX)}, 0), (200, {}, 0)]
+
+    assert client.call_openrouter("hello") == "echo: hello"
+    assert client.sleeps == [client.BACKOFF_MAX]
+
+
+def test_5xx_until_retries_exhausted(server, client):
+    server.script = [(503, {}, 0)]
+
+    with pytest.raises(requests.HTTPError) as excinfo:
+        client.call_openrouter("hello", max_retries=2)
+    assert excinfo.value.response.status_code == 503
+    assert server.attempts == 3
+    assert len(client.sleeps) == 2
+    # Full jitter under the exponential cap
+    for attempt, delay in enumerate(client.sleeps):
+        assert 0 <= delay <= min(client.BACKOFF_MAX, client.BACKOFF_BASE * 2 ** attempt)
+
+
+def test_read_timeout_is_retried(server, client):
+    server.script = [(200, {}, 5), (200, {}, 0)]
+
+    assert client.call_openrouter("hello", timeout=(1, 0.3)) == "echo: hello"
+    assert server.attempts == 2
+    assert len(client.sleeps) == 1
+
+
+def test_read_timeout_raised_after_retries(server, client):
+    server.script = [(200, {}, 5)]
+
+    with pytest.raises(requests.Timeout):
+        client.call_openrouter("hello", timeout=(1, 0.2), max_retries=1)
+    assert server.attempts == 2
+
+
+def test_4xx_is_not_retried(server, client):
+    server.script = [(400, {}, 0), (200, {}, 0)]
+
+    with pytest.raises(requests.HTTPError) as excinfo:
+        client.call_openrouter("hello")
+    assert excinfo.value.response.status_code == 400
+    assert server.attempts == 1
+    assert client.sleeps == []
+
+
+# =========================
+# CONCURRENT CALLS
+# =========================
+def test_many_keeps_input_order(server, client):
+    # Earlier requests answer later, so completion order is the reverse of input order
+    messages = [f"m{i}" for i in range(6)]
+    server.delays = {m: 0.05 * (len(messages) - i) for i, m in enumerate(messages)}
+
+    results = client.call_openrouter_many(messages, max_concurrency=len(messages))
+    assert results == [f"echo: {m}" for m in messages]
+
+
+def test_many_bounds_requests_in_flight(server, client):
+    server.script = [(200, {}, 0.05)]
+
+    results = client.call_openrouter_many([f"m{i}" for i in range(10)], max_concurrency=3)
+    assert len(results) == 10
+    assert server.attempts == 10
+    assert server.max_in_flight <= 3
+
+
+def test_many_accepts_request_dicts_and_common_arguments(server, client):
+    results = client.call_openrouter_many(
+        ["plain", {"message": "dict", "system_prompt": "be brief"}],
+        system_prompt="default",
+    )
+    assert results == ["echo: plain", "echo: dict"]
+
+
+def test_many_surfaces_per_item_errors(server, client):
+    server.fail_messages = {"bad"}
+
+    results = client.call_openrouter_many(["ok1", "bad", "ok2"], return_exceptions=True)
+    assert results[0] == "echo: ok1"
+    assert isinstance(results[1], requests.HTTPError)
+    assert results[1].response.status_code == 400
+    assert results[2] == "echo: ok2"
+
+    with pytest.raises(requests.HTTPError):
+        client.call_openrouter_many(["ok1", "bad", "ok2"])
+
+
+def test_many_empty(client):
+    assert client.call_openrouter_many([]) == []
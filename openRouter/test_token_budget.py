@@ -0,0 +1,40 @@
+"""
+Prompt packing tests for token_budget.py, on the character heuristic so the
+counts don't depend on tiktoken's BPE file being available.
+
+Run from the repository root: python -m pytest openRouter
+"""
+import pytest
+
+import token_budget
+
+
+@pytest.fixture(autouse=True)
+def heuristic(monkeypatch):
+    monkeypatch.setattr(token_budget, "_encoder", None)
+    monkeypatch.setattr(token_budget, "_encoder_loaded", True)
+
+
+def quoted(pdf, lecture):
+    # Each PDF line gains a "> " prefix, so the message outgrows its parts
+    pdf = "\n".join(f"> {line}" for line in pdf.splitlines())
+    return f"SLIDES:\n{pdf}\n\nTRANSCRIPT:\n{lecture}"
+
+
+def test_pdf_larger_than_budget_is_trimmed_to_fit():
+    pdf = "\n".join(f"slide line {i} with some words" for i in range(2000))
+    lecture = "spoken words " * 500
+
+    packed = token_budget.pack_prompt("be brief", pdf, lecture, quoted, output_tokens=100, context_tokens=2000)
+
+    assert packed["trimmed"] == {"pdf": True, "lecture": True}
+    assert packed["tokens"]["lecture"] == 0
+    assert 0 < packed["tokens"]["total"] <= packed["tokens"]["budget"] == 1900
+    token_budget.check_prompt(packed["message"], "be brief", output_tokens=100, context_tokens=2000)
+
+
+def test_fitting_inputs_are_untouched():
+    packed = token_budget.pack_prompt("be brief", "slide", "lecture", quoted, output_tokens=100, context_tokens=2000)
+
+    assert packed["trimmed"] == {"pdf": False, "lecture": False}
+    assert packed["message"] == quoted("slide", "lecture")
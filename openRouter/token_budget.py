@@ -0,0 +1,211 @@
+"""
+Token accounting and prompt packing for OpenRouter calls.
+
+Counts come from tiktoken (openRouter/requirements.txt) with the
+TOKENIZER_ENCODING encoding, default cl100k_base. That is OpenAI's tokenizer:
+the OpenRouter models used here (DeepSeek etc.) have their own, so counts only
+approximate the model's; a prompt packed right up to the budget can come out
+slightly over it, which LLM_OUTPUT_TOKENS headroom absorbs. If tiktoken can't
+be imported or its encoding can't be loaded (the BPE file is fetched on first
+use), a warning is logged and counts fall back to a conservative character
+heuristic: ASCII text at ~4 characters per token and every other character
+(Devanagari etc.) as a token of its own. token_budget.js uses the same
+encoding and the same heuristic.
+
+A prompt is budgeted against the model context (LLM_CONTEXT_TOKENS) minus the
+room kept for the answer (max_tokens, else LLM_OUTPUT_TOKENS). pack_prompt
+fills the budget by priority: system prompt, then PDF, then transcript.
+check_prompt refuses an oversized prompt before any request is sent.
+"""
+import math
+import os
+import sys
+import threading
+
+# =========================
+# CONFIG
+# =========================
+CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", 163840))   # tngtech/deepseek-r1t2-chimera
+OUTPUT_TOKENS = int(os.getenv("LLM_OUTPUT_TOKENS", 8192))       # kept free for the completion
+ENCODING = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+MESSAGE_OVERHEAD = 4    # role/separator tokens per chat message
+
+_encoder = None
+_encoder_loaded = False
+_encoder_lock = threading.Lock()
+
+
+class PromptTooLargeError(ValueError):
+    """The prompt cannot fit the model context with the requested output room."""
+
+
+def get_encoder():
+    """tiktoken encoding, or None (not installed, or its BPE file can't be fetched offline)."""
+    global _encoder, _encoder_loaded
+    with _encoder_lock:
+        if not _encoder_loaded:
+            _encoder_loaded = True
+            try:
+                import tiktoken
+            except ImportError as e:
+                print(f"Warning: tiktoken not importable ({e}); token counts use the character heuristic. "
+                      "pip install -r openRouter/requirements.txt", file=sys.stderr)
+            else:
+                try:
+                    _encoder = tiktoken.get_encoding(ENCODING)
+                except Exception as e:
+                    print(f"Warning: tiktoken encoding {ENCODING!r} failed to load ({e}); "
+                          "token counts use the character heuristic", file=sys.stderr)
+        return _encoder
+
+
+def tokenizer_name():
+    return f"tiktoken:{ENCODING}" if get_encoder() is not None else "heuristic"
+
+
+def _estimate(text):
+    ascii_chars = sum(1 for c in text if c < "\x80")
+    return math.ceil(ascii_chars / 4) + (len(text) - ascii_chars)
+
+
+def count_tokens(text):
+    if not text:
+        return 0
+    encoder = get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return _estimate(text)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Longest prefix of text within max_tokens (cut at a word boundary with the heuristic)."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    encoder = get_encoder()
+    if encoder is not None:
+        return encoder.decode(encoder.encode(text, disallowed_special=())[:max_tokens])
+
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _estimate(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    cut = text.rfind(" ", 0, lo + 1)
+    return text[:cut if cut > 0 else lo].rstrip()
+
+
+def prompt_tokens(message, system_prompt=None):
+    """Tokens of a chat request: message contents plus per-message overhead."""
+    total = count_tokens(message) + MESSAGE_OVERHEAD
+    if system_prompt:
+        total += count_tokens(system_prompt) + MESSAGE_OVERHEAD
+    return total
+
+
+def input_budget(output_tokens=None, context_tokens=None):
+    context = CONTEXT_TOKENS if context_tokens is None else context_tokens
+    return context - (OUTPUT_TOKENS if output_tokens is None else output_tokens)
+
+
+def check_prompt(message, system_prompt=None, output_tokens=None, context_tokens=None):
+    """
+    Raise PromptTooLargeError if the prompt leaves less than output_tokens of
+    the context free. Returns the prompt's token count.
+    """
+    tokens = prompt_tokens(message, system_prompt)
+    budget = input_budget(output_tokens, context_tokens)
+    if tokens > budget:
+        raise PromptTooLargeError(
+            f"Prompt is {tokens} tokens ({tokenizer_name()}), over the {budget}-token input budget "
+            f"({CONTEXT_TOKENS if context_tokens is None else context_tokens} context). "
+            "Trim the inputs (pack_prompt) or use a model with a larger LLM_CONTEXT_TOKENS."
+        )
+    return tokens
+
+
+def pack_prompt(system_prompt, pdf_text, lecture_text, build_message, output_tokens=None, context_tokens=None):
+    """
+    Fit PDF and transcript into one prompt, PDF first: the transcript only gets
+    what the PDF leaves, and the PDF itself is cut only if it alone overflows.
+
+    Args:
+        build_message: (pdf_text, lecture_text) -> user message
+    Returns:
+        dict: {
+            "message": packed user message,
+            "tokens": {"system", "pdf", "lecture", "total", "budget"},
+            "trimmed": {"pdf": bool, "lecture": bool}
+        }
+    """
+    budget = input_budget(output_tokens, context_tokens)
+    fixed = prompt_tokens(build_message("", ""), system_prompt)
+
+    pdf_tokens = count_tokens(pdf_text)
+    lecture_tokens = count_tokens(lecture_text)
+    room = budget - fixed
+
+    if pdf_tokens > room:
+        pdf, lecture = truncate_to_tokens(pdf_text, room), ""
+    else:
+        pdf, lecture_room = pdf_text, room - pdf_tokens
+        lecture = truncate_to_tokens(lecture_text, lecture_room) if lecture_tokens > lecture_room else lecture_text
+
+    message = build_message(pdf, lecture)
+    total = prompt_tokens(message, system_prompt)
+    # Token boundaries at the joins can add a few tokens: take them from the
+    # transcript, or from the PDF once the transcript is gone (PDF alone overflowed)
+    while total > budget and (lecture or pdf):
+        if lecture:
+            lecture = truncate_to_tokens(lecture, count_tokens(lecture) - (total - budget))
+        else:
+            pdf = truncate_to_tokens(pdf, count_tokens(pdf) - (total - budget))
+        message = build_message(pdf, lecture)
+        total = prompt_tokens(message, system_prompt)
+
+    return {
+        "message": message,
+        "tokens": {
+            "system": count_tokens(system_prompt),
+            "pdf": count_tokens(pdf),
+            "lecture": count_tokens(lecture),
+            "total": total,
+            "budget": budget,
+        },
+        "trimmed": {"pdf": pdf != pdf_text, "lecture": lecture != lecture_text},
+    }
+
+
+def describe(packed):
+    """One-line log summary of a pack_prompt result."""
+    t = packed["tokens"]
+    line = (
+        f"prompt {t['total']}/{t['budget']} tokens ({tokenizer_name()}): "
+        f"system {t['system']}, PDF {t['pdf']}, transcript {t['lecture']}"
+    )
+    trimmed = [name for name, cut in (("PDF", packed["trimmed"]["pdf"]), ("transcript", packed["trimmed"]["lecture"])) if cut]
+    if trimmed:
+        line += f" — trimmed {' and '.join(trimmed)} to fit"
+    return line
+
+
+# =========================
+# ENTRY POINT
+# =========================
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python token_budget.py <file> [file ...]")
+        sys.exit(1)
+
+    budget = input_budget()
+    print(f"tokenizer: {tokenizer_name()}, input budget: {budget} tokens")
+    for path in sys.argv[1:]:
+        with open(path, encoding="utf-8") as f:
+            tokens = count_tokens(f.read())
+        print(f"{tokens:>9}  {'fits' if tokens <= budget else 'TOO LARGE'}  {path}")
@@ -26,13 +26,34 @@
 import { configDotenv } from "dotenv";
 import mongoose from "mongoose";
 import { processPdf } from "./PDF_processing/pdf_pipeline.js";
+import { shutdownPdfPool } from "./PDF_processing/pdf_worker.js";
 import { processLecture } from "./audio processing/process_lecture.js";
+import { shutdownTranscriptionPool } from "./audio processing/transcription_worker.js";
 import ProcessedLecture from "./models/processedLectures.js";
 import LectureNotes from "./models/lectureNotes.js";
 import { cleanupTempFiles } from "./cleanup.js";
+import { mergeChunkTranscripts } from "./transcript_merge.js";
+import { buildNotesMessage, generateSectionNotes } from "./section_notes.js";
+import { checkPrompt, countTokens, describePacked, packPrompt } from "./token_budget.js";
 
 configDotenv();
 
+// Any OpenAI-compatible endpoint (e.g. bench/mock_openrouter.js), same as OPENROUTER_BASE_URL in openrouter.py
+const OPENROUTER_BASE_URL = process.env.OPENROUTER_BASE_URL || "https://openrouter.ai/api/v1";
+// Retries as in openrouter.py: same env vars and defaults, same retried statuses
+const OPENROUTER_TIMEOUT_MS = (Number(process.env.OPENROUTER_READ_TIMEOUT) || 300) * 1000; // whole request, long generations
+const OPENROUTER_MAX_RETRIES = Number(process.env.OPENROUTER_MAX_RETRIES ?? 4);
+const OPENROUTER_BACKOFF_BASE_MS = (Number(process.env.OPENROUTER_BACKOFF_BASE) || 1) * 1000;
+const OPENROUTER_BACKOFF_MAX_MS = (Number(process.env.OPENROUTER_BACKOFF_MAX) || 60) * 1000;
+const RETRY_STATUSES = new Set([408, 429, 500, 502, 503, 504]);
+
+// One request per group of PDF sections instead of one request for everything
+const NOTES_MAP_REDUCE = process.env.NOTES_MAP_REDUCE === "1";
+const NOTES_CONCURRENCY = Number(process.env.NOTES_CONCURRENCY) || 4;
+// "bm25" / "tfidf": each section group gets only the transcript passages it matches
+const NOTES_ROUTER = process.env.NOTES_ROUTER || null;
+const NOTES_TOP_K = Number(process.env.NOTES_TOP_K) || 3;
+
 const SYSTEM_PROMPT = `You are an academic note generation engine.
 
 INPUTS:
@@ -100,25 +121,63 @@ async function getLectureTranscript(lectureHash) {
     throw new Error(`No processed lecture found for lectureHash=${lectureHash}`);
   }
   
-  // Sort chunks by chunkNumber and merge text
-  const sortedChunks = processedLecture.processedChunks
-    .slice()
-    .sort((a, b) => a.chunkNumber - b.chunkNumber);
-  
-  const transcript = sortedChunks.map((chunk) => chunk.text).join("\n\n");
-  return transcript;
+  // Sort chunks by chunkNumber and merge text (overlap at seams dropped)
+  return mergeChunkTranscripts(processedLecture.processedChunks);
 }
 
 // ---------- OpenRouter LLM call ----------
+// Milliseconds requested by a Retry-After header (delta-seconds or HTTP date), or null
+function retryAfterMs(res) {
+  const value = res?.headers.get("retry-after");
+  if (!value) return null;
+  const seconds = Number(value);
+  if (Number.isFinite(seconds)) return Math.max(0, seconds * 1000);
+  const date = Date.parse(value);
+  return Number.isNaN(date) ? null : Math.max(0, date - Date.now());
+}
+
+// Delay before retry `attempt` (0-based): Retry-After if given, else exponential with full jitter
+function backoffMs(attempt, res) {
+  const requested = retryAfterMs(res);
+  if (requested != null) return Math.min(requested, OPENROUTER_BACKOFF_MAX_MS);
+  return Math.random() * Math.min(OPENROUTER_BACKOFF_MAX_MS, OPENROUTER_BACKOFF_BASE_MS * 2 ** attempt);
+}
+
+/**
+ * POST with bounded retries: network errors, timeouts and 408/429/5xx are
+ * retried up to OPENROUTER_MAX_RETRIES times; other statuses are returned.
+ * The body is read inside the loop, so a response cut off mid-body is retried too.
+ * @returns {Promise<{ res: Response, body: string }>}
+ */
+async function postWithRetries(url, init, maxRetries = OPENROUTER_MAX_RETRIES) {
+  for (let attempt = 0; ; attempt++) {
+    let res = null;
+    try {
+      res = await fetch(url, { ...init, signal: AbortSignal.timeout(OPENROUTER_TIMEOUT_MS) });
+      if (!RETRY_STATUSES.has(res.status) || attempt >= maxRetries) {
+        return { res, body: await res.text() };
+      }
+      await res.body?.cancel(); // release the connection before waiting
+    } catch (err) {
+      if (attempt >= maxRetries) throw err;
+      res = null;
+    }
+    await new Promise((r) => setTimeout(r, backoffMs(attempt, res)));
+  }
+}
+
 async function callOpenRouter(message, systemPrompt, model = "tngtech/deepseek-r1t2-chimera:free") {
   const apiKey = process.env.OPENROUTER_KEY;
   if (!apiKey) throw new Error("OPENROUTER_KEY not set in .env");
   
+  // Refuse prompts that can't fit before paying for the round trip
+  checkPrompt(message, systemPrompt);
+
   const messages = [];
   if (systemPrompt) messages.push({ role: "system", content: systemPrompt });
   messages.push({ role: "user", content: message });
   
-  const res = await fetch("https://openrouter.ai/api/v1/chat/completions", {
+  const { res, body } = await postWithRetries(`${OPENROUTER_BASE_URL}/chat/completions`, {
     method: "POST",
     headers: {
       Authorization: `Bearer ${apiKey}`,
@@ -128,11 +187,10 @@ async function callOpenRouter(message, systemPrompt, model = "tngtech/deepseek-r
   });
   
   if (!res.ok) {
-    const errText = await res.text();
-    throw new Error(`OpenRouter API error: ${res.status} ${res.statusText} - ${errText}`);
+    throw new Error(`OpenRouter API error: ${res.status} ${res.statusText} - ${body}`);
   }
   
-  const data = await res.json();
+  const data = JSON.parse(body);
   const content = data?.choices?.[0]?.message?.content;
   if (content == null) throw new Error("OpenRouter: no content in response");
   
@@ -167,7 +225,7 @@ async function runOverallPipeline(pdfUrl, m3u8Url, lectureHash = null) {
     if (!pdfResult.text?.trim()) {
       throw new Error("PDF produced no text.");
     }
-    console.log(`   ✓ Extracted ${pdfResult.text.length} characters from PDF\n`);
+    console.log(`   ✓ Extracted ${pdfResult.text.length} characters (${countTokens(pdfResult.text)} tokens) from PDF\n`);
     
     // Step 2: Process Lecture (check if already processed)
     console.log("Step 2/4: Processing Lecture...");
@@ -193,23 +251,39 @@ async function runOverallPipeline(pdfUrl, m3u8Url, lectureHash = null) {
     if (!lectureText?.trim()) {
       throw new Error("Lecture transcript is empty.");
     }
-    console.log(`   ✓ Retrieved ${lectureText.length} characters from lecture\n`);
+    console.log(`   ✓ Retrieved ${lectureText.length} characters (${countTokens(lectureText)} tokens) from lecture\n`);
     
     // Step 4: Generate combined notes
     console.log("Step 4/4: Generating combined notes...");
-    const userMessage = `PDF CONTENT (AUTHORITATIVE SOURCE):
-${pdfResult.text}
-
----
-
-LECTURE TRANSCRIPT (SECONDARY SOURCE):
-${lectureText}
-
----
-
-Generate structured academic notes following the PDF structure, enhanced only where the lecture explicitly adds value.`;
-
-    const notes = await callOpenRouter(userMessage, SYSTEM_PROMPT);
+    let notes;
+    if (NOTES_MAP_REDUCE || NOTES_ROUTER) {
+      const result = await generateSectionNotes({
+        sections: pdfResult.sections,
+        pdfText: pdfResult.text,
+        lectureText,
+        systemPrompt: SYSTEM_PROMPT,
+        callLLM: (message, systemPrompt) => callOpenRouter(message, systemPrompt),
+        concurrency: NOTES_CONCURRENCY,
+        router: NOTES_ROUTER,
+        topK: NOTES_TOP_K,
+      });
+      notes = result.notes;
+      if (result.routed) {
+        const dropped = result.routed.total - result.routed.kept;
+        console.log(`   ✓ Routed ${result.routed.kept}/${result.routed.total} transcript words (${dropped} unused, not sent)`);
+      }
+      console.log(`   ✓ Generated notes for ${result.groups} section group(s)`);
+    } else {
+      // PDF first, transcript trimmed to whatever context is left
+      const packed = packPrompt({
+        systemPrompt: SYSTEM_PROMPT,
+        pdfText: pdfResult.text,
+        lectureText,
+        buildMessage: buildNotesMessage,
+      });
+      console.log(`   ${describePacked(packed)}`);
+      notes = await callOpenRouter(packed.message, SYSTEM_PROMPT);
+    }
 
     // Save to MongoDB (indexed by lectureHash)
     const doc = await LectureNotes.findOneAndUpdate(
@@ -255,6 +329,9 @@ Examples:
   node overall_pipeline.js "https://.../whiteboard.pdf" "https://.../master.m3u8"
 
 Env: OPENROUTER_KEY and MONGO_URI required in .env file.
+     NOTES_MAP_REDUCE=1 generates notes per PDF section group (NOTES_CONCURRENCY in flight, default 4).
+     LLM_CONTEXT_TOKENS / LLM_OUTPUT_TOKENS set the prompt budget (PDF kept first, transcript trimmed).
+     NOTES_ROUTER=bm25|tfidf also sends each group only its top NOTES_TOP_K matching transcript passages.
 `);
 }
 
@@ -271,12 +348,16 @@ async function main() {
   } catch (err) {
     console.error("✗ Error:", err?.message || err);
     if (err.stack) console.error(err.stack);
-    process.exit(1);
+    process.exitCode = 1;
+  } finally {
+    // The resident transcription pool and PDF worker would otherwise keep the CLI alive
+    await shutdownTranscriptionPool();
+    await shutdownPdfPool();
   }
 }
 
 // Export for programmatic use
-export { runOverallPipeline };
+export { runOverallPipeline, callOpenRouter, SYSTEM_PROMPT };
 
 // Run if called directly
 if (import.meta.url === `file://${process.argv[1]}`) {
@@ -0,0 +1,313 @@
+/**
+ * Section-aligned map-reduce note generation.
+ *
+ * Instead of one request carrying the whole PDF and the whole transcript, the
+ * PDF sections are packed into groups of at most ~maxChars, each group is sent
+ * with only its proportional slice of the transcript (lectures follow the PDF
+ * order), a bounded number of requests run at once, and the outputs are joined
+ * back in PDF order. Wall-clock time follows the slowest group instead of the
+ * total input size, and no request comes near the context limit.
+ *
+ * With a router ("bm25" / "tfidf"), each group instead gets only the transcript
+ * passages its sections match (section_router.py); passages no section matches
+ * are never sent.
+ *
+ * Mirrors generate_notes_by_section in generate_notes.py.
+ */
+
+import { spawn } from "child_process";
+import path from "path";
+import fs from "fs";
+import { fileURLToPath } from "url";
+import { describePacked, packPrompt } from "./token_budget.js";
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+const NOTES_INSTRUCTION =
+  "Generate structured academic notes following the PDF structure, enhanced only where the lecture explicitly adds value.";
+const SECTION_INSTRUCTION =
+  "Generate structured academic notes for these PDF sections only, following their structure, enhanced only where the lecture explicitly adds value.";
+
+/**
+ * User message for one notes request (same layout for single-shot and per-section calls).
+ * @param {string} pdfText
+ * @param {string} lectureText
+ * @param {string} [instruction]
+ * @returns {string}
+ */
+export function buildNotesMessage(pdfText, lectureText, instruction = NOTES_INSTRUCTION) {
+  return `PDF CONTENT (AUTHORITATIVE SOURCE):
+${pdfText}
+
+---
+
+LECTURE TRANSCRIPT (SECONDARY SOURCE):
+${lectureText}
+
+---
+
+${instruction}`;
+}
+
+/**
+ * Split extracted PDF text ("## Title" lines + body, as written by
+ * pdf_summariser_ocr.py) into { title, paragraphs } sections.
+ * @param {string} pdfText
+ * @returns {Array<{ title: string, paragraphs: string[] }>}
+ */
+export function parseSections(pdfText) {
+  const sections = [];
+  let current = null;
+
+  for (const line of pdfText.split("\n")) {
+    if (line.startsWith("## ")) {
+      current = { title: line.slice(3).trim(), paragraphs: [] };
+      sections.push(current);
+    } else if (line.trim()) {
+      if (!current) {
+        current = { title: "Introduction", paragraphs: [] };
+        sections.push(current);
+      }
+      current.paragraphs.push(line.trim());
+    }
+  }
+
+  return sections;
+}
+
+function sectionText(section) {
+  return [`## ${section.title}`, ...section.paragraphs].join("\n");
+}
+
+/**
+ * Pack consecutive sections into groups of at most ~maxChars of PDF text, so
+ * heading-only and tiny sections don't each cost a request. A section larger
+ * than maxChars gets a group of its own.
+ * @param {Array<{ title: string, paragraphs: string[] }>} sections
+ * @param {number} [maxChars]
+ * @returns {Array<Array<{ title: string, paragraphs: string[] }>>} Groups in PDF order
+ */
+export function groupSections(sections, maxChars = 8000) {
+  const groups = [];
+  let current = [];
+  let size = 0;
+
+  for (const section of sections) {
+    const length = sectionText(section).length;
+    if (current.length && size + length > maxChars) {
+      groups.push(current);
+      current = [];
+      size = 0;
+    }
+    current.push(section);
+    size += length;
+  }
+  if (current.length) groups.push(current);
+
+  return groups;
+}
+
+/**
+ * @param {Array<{ title: string, paragraphs: string[] }>} group
+ * @returns {string}
+ */
+export function groupText(group) {
+  return group.map(sectionText).join("\n\n");
+}
+
+/**
+ * Contiguous transcript slice per group, proportional to each group's share of
+ * the PDF, widened by `overlap` (a fraction of the whole transcript) on both
+ * sides to absorb drift between lecture and PDF order.
+ * @param {number[]} weights Group sizes
+ * @param {string} lectureText
+ * @param {number} [overlap]
+ * @returns {string[]}
+ */
+export function sliceTranscript(weights, lectureText, overlap = 0.05) {
+  const words = lectureText.split(/\s+/).filter(Boolean);
+  const total = weights.reduce((a, b) => a + b, 0) || 1;
+  const margin = Math.floor(words.length * overlap);
+
+  const slices = [];
+  let start = 0;
+  for (const weight of weights) {
+    const end = start + weight / total;
+    const lo = Math.max(0, Math.floor(start * words.length) - margin);
+    const hi = Math.min(words.length, Math.round(end * words.length) + margin);
+    slices.push(words.slice(lo, hi).join(" "));
+    start = end;
+  }
+
+  return slices;
+}
+
+/**
+ * Resolve the Python interpreter for section_router.py (needs numpy).
+ * Uses the whisper-env venv if it exists, otherwise falls back to system python3.
+ * @returns {string}
+ */
+function resolvePythonCmd() {
+  const venvPythonPath = path.join(__dirname, "audio processing", "whisper-env", "bin", "python3");
+  return fs.existsSync(venvPythonPath) ? venvPythonPath : "python3";
+}
+
+/**
+ * Rank transcript windows against the sections (section_router.py) and keep
+ * each section's top-k passages.
+ * @param {Array<{ title: string, paragraphs: string[] }>} sections
+ * @param {string} lectureText
+ * @param {{ scoring?: string, topK?: number }} [opts]
+ * @returns {Promise<{ spans: number[][][], passages: string[], kept_words: number, total_words: number }>}
+ */
+export function routeTranscript(sections, lectureText, { scoring = "bm25", topK = 3 } = {}) {
+  return new Promise((resolve, reject) => {
+    const child = spawn(resolvePythonCmd(), [path.join(__dirname, "section_router.py")], {
+      stdio: ["pipe", "pipe", "pipe"],
+    });
+    let stdout = "";
+    let stderr = "";
+    child.stdout.on("data", (d) => (stdout += d));
+    child.stderr.on("data", (d) => (stderr += d));
+    child.on("error", reject);
+    child.on("close", (code) => {
+      if (code !== 0) {
+        reject(new Error(`section_router.py exited with code ${code}: ${stderr.trim()}`));
+        return;
+      }
+      try {
+        resolve(JSON.parse(stdout));
+      } catch (err) {
+        reject(new Error(`section_router.py returned invalid JSON: ${err.message}`));
+      }
+    });
+    child.stdin.end(JSON.stringify({ sections, transcript: lectureText, scoring, top_k: topK }));
+  });
+}
+
+/**
+ * Per-group transcript from routed spans: the merged passages of the group's
+ * sections, in transcript order.
+ * @param {Array<Array<object>>} groups
+ * @param {number[][][]} spans Per section, [start, end) word ranges (section_router.py)
+ * @param {string} lectureText
+ * @returns {string[]}
+ */
+function routedSlices(groups, spans, lectureText) {
+  const words = lectureText.split(/\s+/).filter(Boolean);
+  const slices = [];
+  let i = 0;
+
+  for (const group of groups) {
+    const ranges = spans
+      .slice(i, i + group.length)
+      .flat()
+      .sort((a, b) => a[0] - b[0]);
+    const merged = [];
+    for (const [start, end] of ranges) {
+      const last = merged[merged.length - 1];
+      if (last && start <= last[1]) last[1] = Math.max(last[1], end);
+      else merged.push([start, end]);
+    }
+    slices.push(merged.map(([a, b]) => words.slice(a, b).join(" ")).join(" ... "));
+    i += group.length;
+  }
+
+  return slices;
+}
+
+/**
+ * Map over items with at most `limit` promises in flight; results keep input order.
+ * @template T, R
+ * @param {T[]} items
+ * @param {number} limit
+ * @param {(item: T, index: number) => Promise<R>} fn
+ * @returns {Promise<R[]>}
+ */
+export async function mapWithConcurrency(items, limit, fn) {
+  const results = new Array(items.length);
+  let next = 0;
+
+  async function worker() {
+    while (next < items.length) {
+      const i = next++;
+      results[i] = await fn(items[i], i);
+    }
+  }
+
+  const workers = Array.from({ length: Math.max(1, Math.min(limit, items.length)) }, worker);
+  await Promise.all(workers);
+  return results;
+}
+
+/**
+ * Generate notes group by group and stitch them in PDF order.
+ * @param {object} opts
+ * @param {Array<{ title: string, paragraphs: string[] }>} [opts.sections] From <hash>.sections.json (preferred)
+ * @param {string} [opts.pdfText] Extracted PDF text, parsed when sections are not given
+ * @param {string} opts.lectureText
+ * @param {string} opts.systemPrompt
+ * @param {(message: string, systemPrompt: string) => Promise<string>} opts.callLLM
+ * @param {number} [opts.concurrency] Requests in flight at once
+ * @param {number} [opts.maxChars] PDF characters per request
+ * @param {number} [opts.overlap] Transcript overlap per side, fraction of the transcript
+ * @param {string} [opts.router] "bm25" or "tfidf": send each group only its matched passages
+ * @param {number} [opts.topK] Passages kept per section when routing
+ * @returns {Promise<{ notes: string, groups: number, routed?: { kept: number, total: number } }>}
+ */
+export async function generateSectionNotes({
+  sections,
+  pdfText,
+  lectureText,
+  systemPrompt,
+  callLLM,
+  concurrency = 4,
+  maxChars = 8000,
+  overlap = 0.05,
+  router = null,
+  topK = 3,
+}) {
+  const usable = (sections || parseSections(pdfText || "")).filter(
+    (s) => s.title.trim() || s.paragraphs.length
+  );
+  if (!usable.length) throw new Error("PDF produced no sections.");
+
+  const groups = groupSections(usable, maxChars);
+  const texts = groups.map(groupText);
+
+  let slices;
+  let routed;
+  if (router) {
+    const result = await routeTranscript(groups.flat(), lectureText, { scoring: router, topK });
+    slices = routedSlices(groups, result.spans, lectureText);
+    routed = { kept: result.kept_words, total: result.total_words };
+  } else {
+    slices = sliceTranscript(texts.map((t) => t.length), lectureText, overlap);
+  }
+
+  const messages = texts.map((text, i) => {
+    const packed = packPrompt({
+      systemPrompt,
+      pdfText: text,
+      lectureText: slices[i],
+      buildMessage: (pdf, lecture) => buildNotesMessage(pdf, lecture, SECTION_INSTRUCTION),
+    });
+    console.log(`   Group ${i + 1}/${texts.length}: ${describePacked(packed)}`);
+    return packed.message;
+  });
+
+  const outputs = await mapWithConcurrency(messages, concurrency, (message) =>
+    callLLM(message, systemPrompt)
+  );
+
+  // A reply without content would otherwise surface as a TypeError here
+  outputs.forEach((note, i) => {
+    if (typeof note !== "string") {
+      const titles = groups[i].map((s) => s.title || "(untitled)").join(", ");
+      throw new Error(`Group ${i + 1}/${groups.length} (${titles}) returned no notes`);
+    }
+  });
+
+  return { notes: outputs.map((n) => n.trim()).join("\n\n"), groups: groups.length, routed };
+}
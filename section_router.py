@@ -0,0 +1,221 @@
+"""
+Route transcript passages to the PDF sections they talk about.
+
+The merged transcript is cut into overlapping word windows. Windows are ranked
+against every section from build_sections (title + paragraphs) with BM25
+(or TF-IDF cosine), and each section keeps only its top-k windows. Windows no
+section picked are dropped, so they never reach the LLM.
+
+Term counts are gathered sparsely (only terms that occur in some section can
+score, so the vocabulary is the sections' vocabulary) and all sections are
+scored against all windows with one matrix product.
+
+Usage (JSON on stdin, JSON on stdout; used by section_notes.js):
+    echo '{"sections": [...], "transcript": "...", "top_k": 3}' | python section_router.py
+    python section_router.py <sections.json> <transcript.txt> [--top-k 3] [--scoring bm25|tfidf]
+"""
+
+import json
+import re
+import sys
+
+import numpy as np
+
+# =========================
+# CONFIG
+# =========================
+WINDOW_WORDS = 120      # ~45 s of speech
+WINDOW_STRIDE = 60      # windows overlap by half, so no passage is split badly
+TOP_K = 3
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"\w+")
+
+# Function words (English + Hinglish) carry no topic signal
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have if in into is it its of on or
+so that the then there these this to was we were what when which will with you
+your can do does not no yes ok okay also just like very
+hai hain ho hota hoti hote ka ki ke ko se me mein par aur ya toh to bhi jo
+yeh ye woh wo kya kaise na nahi hum tum aap isko usko ab phir matlab basically
+""".split())
+
+
+# =========================
+# TOKENIZATION
+# =========================
+def tokenize(text):
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def section_text(section):
+    return " ".join([section["title"], *section["paragraphs"]])
+
+
+def transcript_windows(n_words, size=WINDOW_WORDS, stride=WINDOW_STRIDE):
+    """[start, end) word ranges covering the whole transcript."""
+    if n_words <= size:
+        return [(0, n_words)] if n_words else []
+    starts = list(range(0, n_words - size, stride)) + [n_words - size]
+    return [(s, s + size) for s in starts]
+
+
+def merge_spans(spans):
+    """Sort and merge overlapping/adjacent [start, end) spans."""
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+# =========================
+# SPARSE TERM COUNTS
+# =========================
+def _term_counts(token_ids, doc_ids, n_docs, n_terms):
+    """
+    Sparse (doc, term) -> count from parallel id arrays, densified over the
+    (section) vocabulary only. Tokens outside the vocabulary have id -1.
+    """
+    keep = token_ids >= 0
+    keys = doc_ids[keep] * n_terms + token_ids[keep]
+    keys, counts = np.unique(keys, return_counts=True)
+    matrix = np.zeros((n_docs, n_terms))
+    matrix[keys // n_terms, keys % n_terms] = counts
+    return matrix
+
+
+class SectionRouter:
+    """
+    Args:
+        sections: build_sections output ([{"title", "paragraphs"}])
+        scoring: "bm25" (default) or "tfidf" (cosine)
+    """
+
+    def __init__(self, sections, scoring="bm25", k1=BM25_K1, b=BM25_B):
+        if scoring not in ("bm25", "tfidf"):
+            raise ValueError(f"Unknown scoring {scoring!r} (expected 'bm25' or 'tfidf')")
+        self.scoring = scoring
+        self.k1 = k1
+        self.b = b
+
+        section_tokens = [tokenize(section_text(s)) for s in sections]
+        self.vocab = {}
+        for tokens in section_tokens:
+            for tok in tokens:
+                self.vocab.setdefault(tok, len(self.vocab))
+
+        ids = np.array([self.vocab[t] for tokens in section_tokens for t in tokens], dtype=np.int64)
+        docs = np.repeat(np.arange(len(sections)), [len(t) for t in section_tokens])
+        self.section_counts = _term_counts(ids, docs, len(sections), len(self.vocab))
+
+    def score(self, words, windows):
+        """(n_sections, n_windows) relevance of each window to each section."""
+        n_terms = len(self.vocab)
+        if not windows or not n_terms:
+            return np.zeros((len(self.section_counts), len(windows)))
+
+        # Scoring tokens of the transcript; window word ranges map to token ranges
+        per_word = [tokenize(w) for w in words]
+        offsets = np.concatenate([[0], np.cumsum([len(t) for t in per_word])])
+        lookup = self.vocab.get
+        token_ids = np.array([lookup(t, -1) for ts in per_word for t in ts], dtype=np.int64)
+
+        bounds = [(offsets[s], offsets[e]) for s, e in windows]
+        lengths = np.array([e - s for s, e in bounds])
+        positions = np.concatenate([np.arange(s, e) for s, e in bounds])
+        doc_ids = np.repeat(np.arange(len(windows)), lengths)
+        tf = _term_counts(token_ids[positions], doc_ids, len(windows), n_terms)
+
+        df = np.count_nonzero(tf, axis=0)
+        n = len(windows)
+
+        if self.scoring == "bm25":
+            idf = np.log1p((n - df + 0.5) / (df + 0.5))
+            # Window length in scoring tokens (stopwords etc. excluded)
+            norm = self.k1 * (1 - self.b + self.b * lengths / max(lengths.mean(), 1e-9))
+            weights = idf * tf * (self.k1 + 1) / (tf + norm[:, None])
+            return self.section_counts @ weights.T
+
+        idf = np.log((1 + n) / (1 + df)) + 1
+        windows_vec = _l2_rows(tf * idf)
+        sections_vec = _l2_rows(self.section_counts * idf)
+        return sections_vec @ windows_vec.T
+
+    def route(self, transcript, top_k=TOP_K, window=WINDOW_WORDS, stride=WINDOW_STRIDE):
+        """
+        Returns:
+            dict: {
+                "spans": per section, merged [start, end) word ranges of its passages,
+                "passages": per section, the passage text (transcript order, "..." between spans),
+                "kept_words": transcript words routed to at least one section,
+                "total_words": transcript words
+            }
+        """
+        words = transcript.split()
+        windows = transcript_windows(len(words), window, stride)
+        scores = self.score(words, windows)
+
+        spans = []
+        used = []
+        for row in scores:
+            k = min(top_k, len(windows))
+            best = np.argpartition(-row, k - 1)[:k] if k else []
+            picked = [windows[i] for i in best if row[i] > 0]
+            spans.append(merge_spans(picked))
+            used.extend(picked)
+
+        return {
+            "spans": spans,
+            "passages": [" ... ".join(" ".join(words[s:e]) for s, e in ss) for ss in spans],
+            "kept_words": sum(e - s for s, e in merge_spans(used)),
+            "total_words": len(words),
+        }
+
+
+def _l2_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def route_transcript(sections, transcript, top_k=TOP_K, scoring="bm25", window=WINDOW_WORDS, stride=WINDOW_STRIDE):
+    return SectionRouter(sections, scoring).route(transcript, top_k, window, stride)
+
+
+# =========================
+# ENTRY POINT
+# =========================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Route transcript passages to PDF sections.")
+    parser.add_argument("sections", nargs="?", help="sections JSON (default: JSON request on stdin)")
+    parser.add_argument("transcript", nargs="?", help="transcript text file")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--scoring", choices=["bm25", "tfidf"], default="bm25")
+    parser.add_argument("--window", type=int, default=WINDOW_WORDS)
+    parser.add_argument("--stride", type=int, default=WINDOW_STRIDE)
+    args = parser.parse_args()
+
+    if args.sections:
+        if not args.transcript:
+            parser.error("transcript file is required with a sections file")
+        with open(args.sections, encoding="utf-8") as f:
+            request = {"sections": json.load(f)}
+        with open(args.transcript, encoding="utf-8") as f:
+            request["transcript"] = f.read()
+    else:
+        request = json.load(sys.stdin)
+
+    result = route_transcript(
+        request["sections"],
+        request["transcript"],
+        top_k=request.get("top_k", args.top_k),
+        scoring=request.get("scoring", args.scoring),
+        window=request.get("window", args.window),
+        stride=request.get("stride", args.stride),
+    )
+    json.dump(result, sys.stdout, ensure_ascii=False)
@@ -5,6 +5,8 @@
  *   POST /api/pipeline  – Run pipeline. Body: { pdfUrl, m3u8Url, lectureHash? }
  *   GET  /api/notes/:lectureHash – Get notes for a lecture hash (from MongoDB)
  *
+ * The transcription worker pool (Whisper models) stays resident across requests.
+ *
  * Start: node server.js
  * Port: process.env.PORT or 3000
  */
@@ -15,6 +17,8 @@ import { configDotenv } from "dotenv";
 import { runOverallPipeline } from "./overall_pipeline.js";
 import LectureNotes from "./models/lectureNotes.js";
 import { cleanupTempFiles, cleanupAllTempFiles } from "./cleanup.js";
+import { shutdownTranscriptionPool } from "./audio processing/transcription_worker.js";
+import { shutdownPdfPool } from "./PDF_processing/pdf_worker.js";
 
 configDotenv();
 
@@ -132,6 +136,18 @@ app.get("/health", (req, res) => {
   res.status(200).json({ status: "ok" });
 });
 
+// ---------- Graceful shutdown ----------
+async function shutdown(signal) {
+  console.log(`${signal} received, shutting down...`);
+  await shutdownTranscriptionPool();
+  await shutdownPdfPool();
+  await mongoose.disconnect();
+  process.exit(0);
+}
+
+process.on("SIGINT", () => shutdown("SIGINT"));
+process.on("SIGTERM", () => shutdown("SIGTERM"));
+
 connectDB()
   .then(() => {
     app.listen(PORT, () => {
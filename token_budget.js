@@ -0,0 +1,198 @@
+/**
+ * Token accounting and prompt packing for OpenRouter calls.
+ *
+ * Counts come from js-tiktoken (a dependency in package.json) with the
+ * TOKENIZER_ENCODING encoding, default cl100k_base. That is OpenAI's
+ * tokenizer: the OpenRouter models used here (DeepSeek etc.) have their own,
+ * so counts only approximate the model's; a prompt packed right up to the
+ * budget can come out slightly over it, which LLM_OUTPUT_TOKENS headroom
+ * absorbs. If js-tiktoken can't be loaded, a warning is logged and counts fall
+ * back to a conservative character heuristic: ASCII text at ~4 characters per
+ * token and every other character (Devanagari etc.) as a token of its own.
+ * This is the same as openRouter/token_budget.py.
+ *
+ * A prompt is budgeted against the model context (LLM_CONTEXT_TOKENS) minus
+ * the room kept for the answer (LLM_OUTPUT_TOKENS). packPrompt fills the budget
+ * by priority: system prompt, then PDF, then transcript. checkPrompt refuses an
+ * oversized prompt before any request is sent.
+ */
+
+export const CONTEXT_TOKENS = Number(process.env.LLM_CONTEXT_TOKENS) || 163840; // tngtech/deepseek-r1t2-chimera
+export const OUTPUT_TOKENS = Number(process.env.LLM_OUTPUT_TOKENS) || 8192; // kept free for the completion
+const ENCODING = process.env.TOKENIZER_ENCODING || "cl100k_base";
+const MESSAGE_OVERHEAD = 4; // role/separator tokens per chat message
+
+async function loadEncoder() {
+  let getEncoding;
+  try {
+    ({ getEncoding } = await import("js-tiktoken"));
+  } catch (err) {
+    console.warn(`Warning: js-tiktoken not loadable (${err.message}); token counts use the character heuristic. Run npm install.`);
+    return null;
+  }
+  try {
+    return getEncoding(ENCODING);
+  } catch (err) {
+    console.warn(`Warning: tiktoken encoding "${ENCODING}" failed to load (${err.message}); token counts use the character heuristic`);
+    return null;
+  }
+}
+
+const encoder = await loadEncoder();
+
+export class PromptTooLargeError extends Error {}
+
+/** @returns {string} */
+export function tokenizerName() {
+  return encoder ? `tiktoken:${ENCODING}` : "heuristic";
+}
+
+function estimate(text) {
+  let ascii = 0;
+  for (let i = 0; i < text.length; i++) {
+    if (text.charCodeAt(i) < 0x80) ascii++;
+  }
+  // Non-ASCII counted per code point, like Python's len()
+  return Math.ceil(ascii / 4) + ([...text].length - ascii);
+}
+
+/**
+ * @param {string} text
+ * @returns {number}
+ */
+export function countTokens(text) {
+  if (!text) return 0;
+  return encoder ? encoder.encode(text, [], []).length : estimate(text);
+}
+
+/**
+ * Longest prefix of text within maxTokens (cut at a word boundary with the heuristic).
+ * @param {string} text
+ * @param {number} maxTokens
+ * @returns {string}
+ */
+export function truncateToTokens(text, maxTokens) {
+  if (maxTokens <= 0) return "";
+  if (countTokens(text) <= maxTokens) return text;
+
+  if (encoder) return encoder.decode(encoder.encode(text, [], []).slice(0, maxTokens));
+
+  let lo = 0;
+  let hi = text.length;
+  while (lo < hi) {
+    const mid = Math.floor((lo + hi + 1) / 2);
+    if (estimate(text.slice(0, mid)) <= maxTokens) lo = mid;
+    else hi = mid - 1;
+  }
+  const cut = text.lastIndexOf(" ", lo);
+  return text.slice(0, cut > 0 ? cut : lo).trimEnd();
+}
+
+/**
+ * Tokens of a chat request: message contents plus per-message overhead.
+ * @param {string} message
+ * @param {string} [systemPrompt]
+ * @returns {number}
+ */
+export function promptTokens(message, systemPrompt) {
+  let total = countTokens(message) + MESSAGE_OVERHEAD;
+  if (systemPrompt) total += countTokens(systemPrompt) + MESSAGE_OVERHEAD;
+  return total;
+}
+
+function inputBudget(outputTokens = OUTPUT_TOKENS, contextTokens = CONTEXT_TOKENS) {
+  return contextTokens - outputTokens;
+}
+
+/**
+ * Throw PromptTooLargeError if the prompt leaves less than outputTokens of the
+ * context free.
+ * @param {string} message
+ * @param {string} [systemPrompt]
+ * @param {{ outputTokens?: number, contextTokens?: number }} [opts]
+ * @returns {number} The prompt's token count
+ */
+export function checkPrompt(message, systemPrompt, { outputTokens, contextTokens } = {}) {
+  const tokens = promptTokens(message, systemPrompt);
+  const budget = inputBudget(outputTokens, contextTokens);
+  if (tokens > budget) {
+    throw new PromptTooLargeError(
+      `Prompt is ${tokens} tokens (${tokenizerName()}), over the ${budget}-token input budget ` +
+        `(${contextTokens ?? CONTEXT_TOKENS} context). ` +
+        "Trim the inputs (packPrompt) or use a model with a larger LLM_CONTEXT_TOKENS."
+    );
+  }
+  return tokens;
+}
+
+/**
+ * Fit PDF and transcript into one prompt, PDF first: the transcript only gets
+ * what the PDF leaves, and the PDF itself is cut only if it alone overflows.
+ * @param {object} opts
+ * @param {string} opts.systemPrompt
+ * @param {string} opts.pdfText
+ * @param {string} opts.lectureText
+ * @param {(pdfText: string, lectureText: string) => string} opts.buildMessage
+ * @param {number} [opts.outputTokens]
+ * @param {number} [opts.contextTokens]
+ * @returns {{ message: string, tokens: { system: number, pdf: number, lecture: number, total: number, budget: number }, trimmed: { pdf: boolean, lecture: boolean } }}
+ */
+export function packPrompt({ systemPrompt, pdfText, lectureText, buildMessage, outputTokens, contextTokens }) {
+  const budget = inputBudget(outputTokens, contextTokens);
+  const fixed = promptTokens(buildMessage("", ""), systemPrompt);
+
+  const pdfTokens = countTokens(pdfText);
+  const room = budget - fixed;
+
+  let pdf = pdfText;
+  let lecture = lectureText;
+  if (pdfTokens > room) {
+    pdf = truncateToTokens(pdfText, room);
+    lecture = "";
+  } else {
+    lecture = truncateToTokens(lectureText, room - pdfTokens);
+  }
+
+  let message = buildMessage(pdf, lecture);
+  let total = promptTokens(message, systemPrompt);
+  // Token boundaries at the joins can add a few tokens: take them from the
+  // transcript, or from the PDF once the transcript is gone (PDF alone overflowed)
+  while (total > budget && (lecture || pdf)) {
+    if (lecture) {
+      lecture = truncateToTokens(lecture, countTokens(lecture) - (total - budget));
+    } else {
+      pdf = truncateToTokens(pdf, countTokens(pdf) - (total - budget));
+    }
+    message = buildMessage(pdf, lecture);
+    total = promptTokens(message, systemPrompt);
+  }
+
+  return {
+    message,
+    tokens: {
+      system: countTokens(systemPrompt),
+      pdf: countTokens(pdf),
+      lecture: countTokens(lecture),
+      total,
+      budget,
+    },
+    trimmed: { pdf: pdf !== pdfText, lecture: lecture !== lectureText },
+  };
+}
+
+/**
+ * One-line log summary of a packPrompt result.
+ * @param {ReturnType<typeof packPrompt>} packed
+ * @returns {string}
+ */
+export function describePacked(packed) {
+  const t = packed.tokens;
+  let line =
+    `prompt ${t.total}/${t.budget} tokens (${tokenizerName()}): ` +
+    `system ${t.system}, PDF ${t.pdf}, transcript ${t.lecture}`;
+  const trimmed = [];
+  if (packed.trimmed.pdf) trimmed.push("PDF");
+  if (packed.trimmed.lecture) trimmed.push("transcript");
+  if (trimmed.length) line += ` — trimmed ${trimmed.join(" and ")} to fit`;
+  return line;
+}
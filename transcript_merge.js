@@ -0,0 +1,96 @@
+/**
+ * Merge ProcessedLecture chunks into one transcript.
+ *
+ * New chunks are already de-duplicated at the seam by process_chunk.py: words
+ * whose timestamp falls past a chunk's own end are dropped before cleanup,
+ * because the next chunk transcribes them from its start. Chunks stored before
+ * that (5 s overlap, no segments) still carry the overlap twice, so at each
+ * seam the longest run of words repeated from the previous chunk's tail is
+ * dropped from the next chunk's head.
+ */
+
+// 5 s of speech is well under this many words
+const MAX_SEAM_WORDS = 40;
+// Shorter repeats are too likely to be coincidence ("so the", "this is a")
+const MIN_SEAM_WORDS = 4;
+
+function normalizeWord(word) {
+  return word.toLowerCase().replace(/[^\p{L}\p{N}]/gu, "");
+}
+
+/**
+ * Number of leading words of `next` that repeat the trailing words of `prev`.
+ * @param {string[]} prev
+ * @param {string[]} next
+ * @returns {number}
+ */
+function seamOverlap(prev, next) {
+  const tail = prev.slice(-MAX_SEAM_WORDS).map(normalizeWord);
+  const head = next.slice(0, MAX_SEAM_WORDS).map(normalizeWord);
+
+  for (let k = Math.min(tail.length, head.length); k >= MIN_SEAM_WORDS; k--) {
+    let match = true;
+    for (let i = 0; i < k; i++) {
+      if (tail[tail.length - k + i] !== head[i]) {
+        match = false;
+        break;
+      }
+    }
+    if (match) return k;
+  }
+  return 0;
+}
+
+/**
+ * `text` without its first `count` words, original spacing kept.
+ * @param {string} text
+ * @param {number} count
+ * @returns {string}
+ */
+function dropLeadingWords(text, count) {
+  const word = /\S+/g;
+  for (let i = 0; i < count; i++) word.exec(text);
+  return text.slice(word.lastIndex).trimStart();
+}
+
+/**
+ * Chunk is legacy (overlap not cut at transcription time) if it has no
+ * segments recorded.
+ */
+function hasSeamTrim(chunk) {
+  return Array.isArray(chunk.segments) && chunk.segments.length > 0;
+}
+
+/**
+ * Sort chunks by chunkNumber and join their text, dropping overlap repeated at seams.
+ * @param {Array<{chunkNumber: number, text: string, segments?: Array}>} chunks
+ * @returns {string}
+ */
+export function mergeChunkTranscripts(chunks) {
+  const sorted = (chunks ?? [])
+    .slice()
+    .sort((a, b) => a.chunkNumber - b.chunkNumber);
+
+  const parts = [];
+  let prevWords = null;
+
+  for (const chunk of sorted) {
+    let text = (chunk.text ?? "").trim();
+    let words = text.split(/\s+/).filter(Boolean);
+
+    if (prevWords && !hasSeamTrim(chunk)) {
+      const overlap = seamOverlap(prevWords, words);
+      if (overlap) {
+        words = words.slice(overlap);
+        text = dropLeadingWords(text, overlap);
+      }
+    }
+
+    if (words.length) {
+      parts.push(text);
+      prevWords = words;
+    }
+  }
+
+  return parts.join("\n\n");
+}